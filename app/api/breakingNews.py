@@ -1,8 +1,10 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
 from pydantic import BaseModel
-from app.utils.auth import get_admin_user, get_optional_user
+from app.utils.auth import get_admin_user
+from app.utils.cache import cache_key
+from app.utils.http_cache import conditional_response, latest_timestamp
 from app.schemas.breakingNews import BreakingNewsCreate, BreakingNewsOut, BreakingNewsUpdate
-from app.services.breakinkNews_service import create_news, get_news, list_news, update_news, delete_news
+from app.services.breakinkNews_service import create_news, get_news, list_news, update_news, delete_news, CACHE_TAG
 from typing import List
 
 router = APIRouter()
@@ -31,10 +33,10 @@ async def add_news(news: BreakingNewsCreate, current_user=Depends(get_admin_user
 
 @router.get("")
 async def get_all_news(
+	request: Request,
 	skip: int = Query(0, ge=0),
 	limit: int = Query(20, ge=1, le=500),
 	search: str = None,
-	current_user=Depends(get_optional_user)
 ):
 	"""Lister les breaking news avec pagination et recherche optionnelle"""
 	from app.models.breakingNews import BreakingNews as BNModel
@@ -46,17 +48,33 @@ async def get_all_news(
 			{"description": {"$regex": search_lower, "$options": "i"}},
 			{"category": {"$regex": search_lower, "$options": "i"}},
 		]
-	total = await BNModel.find(query).count()
-	items = await BNModel.find(query).sort(-BNModel.created_at).skip(skip).limit(limit).to_list()
-	return {"items": items, "total": total, "skip": skip, "limit": limit}
+	async def _load():
+		total = await BNModel.find(query).count()
+		items = await BNModel.find(query).sort(-BNModel.created_at).skip(skip).limit(limit).to_list()
+		return {"items": items, "total": total, "skip": skip, "limit": limit}
+
+	# Cache 60 s, invalidé par le service à chaque création/modification/suppression ;
+	# ETag / Last-Modified permettent au client de revalider en 304
+	return await conditional_response(
+		request, f"news:list:{cache_key(skip, limit, search)}", _load,
+		ttl=60, tags=[CACHE_TAG], max_age=30, stale_while_revalidate=60,
+		last_modified=lambda page: latest_timestamp(page["items"]),
+	)
 
 @router.get("/{news_id}", response_model=BreakingNewsOut)
-async def get_one_news(news_id: str, current_user=Depends(get_optional_user)):
+async def get_one_news(news_id: str, request: Request):
 	"""Récupérer une breaking news par ID"""
-	news = await get_news(news_id)
-	if not news:
-		raise HTTPException(status_code=404, detail="News not found")
-	return news
+	async def _load():
+		news = await get_news(news_id)
+		if not news:
+			raise HTTPException(status_code=404, detail="News not found")
+		return BreakingNewsOut.model_validate(news)
+
+	return await conditional_response(
+		request, f"news:one:{news_id}", _load,
+		ttl=60, tags=[CACHE_TAG], max_age=30, stale_while_revalidate=60,
+		last_modified=lambda news: latest_timestamp([news]),
+	)
 
 @router.patch("/{news_id}", response_model=BreakingNewsOut)
 async def update_one_news(news_id: str, data: BreakingNewsUpdate, current_user=Depends(get_admin_user)):
@@ -4,11 +4,12 @@ Routes publiques  : GET /carousel, GET /carousel/{id}
 Routes admin      : POST, PUT, PATCH image, DELETE
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from typing import List
 from pydantic import BaseModel
 
 from app.utils.auth import get_admin_user
+from app.utils.http_cache import conditional_response, latest_timestamp
 from app.schemas.carousel import CarouselItemCreate, CarouselItemUpdate, CarouselItemOut, CarouselImageUpdate
 from app.services.carousel_service import (
     create_carousel_item,
@@ -17,6 +18,7 @@ from app.services.carousel_service import (
     update_carousel_item,
     update_carousel_image,
     delete_carousel_item,
+    CACHE_TAG,
 )
 
 router = APIRouter()
@@ -27,18 +29,32 @@ router = APIRouter()
 # ─────────────────────────────────────────
 
 @router.get("", response_model=List[CarouselItemOut])
-async def list_carousel_public():
+async def list_carousel_public(request: Request):
     """Retourne les slides actives triées par ordre (utilisé par le frontend)."""
-    items = await get_all_carousel_items(active_only=True)
-    return [CarouselItemOut.from_doc(i) for i in items]
+    async def _load():
+        items = await get_all_carousel_items(active_only=True)
+        return [CarouselItemOut.from_doc(i) for i in items]
+
+    return await conditional_response(
+        request, "carousel:public", _load,
+        ttl=300, tags=[CACHE_TAG], max_age=60, stale_while_revalidate=300,
+        last_modified=latest_timestamp,
+    )
 
 
 @router.get("/{item_id}", response_model=CarouselItemOut)
-async def get_one_carousel(item_id: str):
-    item = await get_carousel_item(item_id)
-    if not item:
-        raise HTTPException(status_code=404, detail="Slide introuvable")
-    return CarouselItemOut.from_doc(item)
+async def get_one_carousel(item_id: str, request: Request):
+    async def _load():
+        item = await get_carousel_item(item_id)
+        if not item:
+            raise HTTPException(status_code=404, detail="Slide introuvable")
+        return CarouselItemOut.from_doc(item)
+
+    return await conditional_response(
+        request, f"carousel:one:{item_id}", _load,
+        ttl=300, tags=[CACHE_TAG], max_age=60, stale_while_revalidate=300,
+        last_modified=lambda item: latest_timestamp([item]),
+    )
 
 
 # ─────────────────────────────────────────
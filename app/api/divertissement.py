@@ -2,9 +2,10 @@ from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import List, Optional
 from pydantic import BaseModel
 from app.utils.auth import get_admin_user, get_optional_user
+from app.utils.cache import cache_manager, cache_key
 from app.schemas.divertissement import DivertissementCreate, DivertissementUpdate, DivertissementOut
 from app.services.divertissement_service import (
-	create_divertissement, get_divertissement, list_divertissement, update_divertissement, delete_divertissement
+	create_divertissement, get_divertissement, list_divertissement, update_divertissement, delete_divertissement, CACHE_TAG
 )
 from app.models.divertissement import Divertissement
 
@@ -35,10 +36,15 @@ async def get_all_divertissement(
 			{"category": {"$regex": search_lower, "$options": "i"}},
 		]
 
-	total = await Divertissement.find(query).count()
-	items = await Divertissement.find(query).sort(-Divertissement.created_at).skip(skip).limit(limit).to_list()
+	async def _load():
+		total = await Divertissement.find(query).count()
+		items = await Divertissement.find(query).sort(-Divertissement.created_at).skip(skip).limit(limit).to_list()
+		return {"items": items, "total": total, "skip": skip, "limit": limit}
 
-	return {"items": items, "total": total, "skip": skip, "limit": limit}
+	# Cache 60 s, invalidé par le service à chaque création/modification/suppression
+	return await cache_manager.get_or_set(
+		f"divertissement:list:{cache_key(skip, limit, category, search)}", _load, ttl=60, tags=[CACHE_TAG]
+	)
 
 
 @router.get("/{divertissement_id}", response_model=DivertissementOut)
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, Request
+from app.utils.auth import get_optional_user
+from app.utils.rate_limiter import get_client_ip
+from app.schemas.engagement import EngagementStateRequest, EngagementStateResponse
+from app.services.engagement_service import get_engagement_state
+
+router = APIRouter()
+
+
+@router.post("/state", response_model=EngagementStateResponse)
+async def engagement_state(body: EngagementStateRequest, request: Request, current_user=Depends(get_optional_user)):
+    """
+    État d'engagement d'un lot de contenus (fil de 20 à 100 éléments) en un appel :
+    liked / favorited / viewed pour le visiteur, et compteurs likes, comments, shares, views.
+    Remplace /likes/check, /favorites/check et /views/{type}/{id} appelés par contenu.
+    """
+    user_id = str(current_user.id) if current_user else None
+    return await get_engagement_state(
+        [(item.content_type, item.content_id) for item in body.items],
+        user_id=user_id,
+        client_ip=get_client_ip(request),
+    )
@@ -2,9 +2,10 @@ from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import List, Optional
 from pydantic import BaseModel
 from app.utils.auth import get_admin_user, get_optional_user
+from app.utils.cache import cache_manager, cache_key
 from app.schemas.jtandmag import JTandMagCreate, JTandMagUpdate, JTandMagOut
 from app.services.jtandmag_service import (
-	create_jtandmag, get_jtandmag, list_jtandmag, update_jtandmag, delete_jtandmag
+	create_jtandmag, get_jtandmag, list_jtandmag, update_jtandmag, delete_jtandmag, CACHE_TAG
 )
 from app.models.jtandmag import JTandMag
 
@@ -36,10 +37,15 @@ async def get_all_jtandmag(
 			{"tags": {"$in": [search_lower]}},
 		]
 
-	total = await JTandMag.find(query).count()
-	items = await JTandMag.find(query).sort("-created_at").skip(skip).limit(limit).to_list()
+	async def _load():
+		total = await JTandMag.find(query).count()
+		items = await JTandMag.find(query).sort("-created_at").skip(skip).limit(limit).to_list()
+		return {"items": items, "total": total, "skip": skip, "limit": limit}
 
-	return {"items": items, "total": total, "skip": skip, "limit": limit}
+	# Cache 60 s, invalidé par le service à chaque création/modification/suppression
+	return await cache_manager.get_or_set(
+		f"jtandmag:list:{cache_key(skip, limit, category, search)}", _load, ttl=60, tags=[CACHE_TAG]
+	)
 
 
 @router.get("/{jtandmag_id}", response_model=JTandMagOut)
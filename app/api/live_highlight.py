@@ -4,17 +4,19 @@ Routes publiques : GET /live-highlights
 Routes admin      : POST, PUT, PATCH image/vidéo, DELETE
 """
 
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
 from typing import List, Optional
 from pydantic import BaseModel
 
 from app.utils.auth import get_admin_user
+from app.utils.http_cache import conditional_response, latest_timestamp
 from app.schemas.live_highlight import (
     LiveHighlightCreate, LiveHighlightUpdate, LiveHighlightOut,
     LiveHighlightImageUpdate, LiveHighlightVideoUpdate,
 )
 from app.services.live_highlight_service import (
     VALID_SECTIONS,
+    CACHE_TAG,
     create_highlight,
     get_highlights,
     get_highlight,
@@ -38,21 +40,37 @@ def _validate_section(section: str):
 
 @router.get("", response_model=List[LiveHighlightOut])
 async def list_highlights_public(
+    request: Request,
     section: Optional[str] = Query(None, description="a_ne_pas_manquer | moments_forts"),
 ):
     """Retourne les mises en avant actives, triées par ordre (utilisé par l'app mobile)."""
     if section:
         _validate_section(section)
-    items = await get_highlights(section=section, active_only=True)
-    return [LiveHighlightOut.from_doc(i) for i in items]
+
+    async def _load():
+        items = await get_highlights(section=section, active_only=True)
+        return [LiveHighlightOut.from_doc(i) for i in items]
+
+    return await conditional_response(
+        request, f"live_highlights:public:{section or 'all'}", _load,
+        ttl=120, tags=[CACHE_TAG], max_age=30, stale_while_revalidate=120,
+        last_modified=latest_timestamp,
+    )
 
 
 @router.get("/{item_id}", response_model=LiveHighlightOut)
-async def get_one_highlight(item_id: str):
-    item = await get_highlight(item_id)
-    if not item:
-        raise HTTPException(status_code=404, detail="Mise en avant introuvable")
-    return LiveHighlightOut.from_doc(item)
+async def get_one_highlight(item_id: str, request: Request):
+    async def _load():
+        item = await get_highlight(item_id)
+        if not item:
+            raise HTTPException(status_code=404, detail="Mise en avant introuvable")
+        return LiveHighlightOut.from_doc(item)
+
+    return await conditional_response(
+        request, f"live_highlights:one:{item_id}", _load,
+        ttl=120, tags=[CACHE_TAG], max_age=30, stale_while_revalidate=120,
+        last_modified=lambda item: latest_timestamp([item]),
+    )
 
 
 # ─────────────────────────────────────────
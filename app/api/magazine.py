@@ -2,9 +2,10 @@ from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import List, Optional
 from pydantic import BaseModel
 from app.utils.auth import get_admin_user, get_optional_user
+from app.utils.cache import cache_manager, cache_key
 from app.schemas.magazine import MagazineCreate, MagazineUpdate, MagazineOut
 from app.services.magazine_service import (
-	create_magazine, get_magazine, list_magazine, update_magazine, delete_magazine
+	create_magazine, get_magazine, list_magazine, update_magazine, delete_magazine, CACHE_TAG
 )
 from app.models.magazine import Magazine
 
@@ -36,10 +37,15 @@ async def get_all_magazine(
 			{"category": {"$regex": search_lower, "$options": "i"}},
 		]
 
-	total = await Magazine.find(query).count()
-	items = await Magazine.find(query).sort("-created_at").skip(skip).limit(limit).to_list()
+	async def _load():
+		total = await Magazine.find(query).count()
+		items = await Magazine.find(query).sort("-created_at").skip(skip).limit(limit).to_list()
+		return {"items": items, "total": total, "skip": skip, "limit": limit}
 
-	return {"items": items, "total": total, "skip": skip, "limit": limit}
+	# Cache 60 s, invalidé par le service à chaque création/modification/suppression
+	return await cache_manager.get_or_set(
+		f"magazine:list:{cache_key(skip, limit, category, search)}", _load, ttl=60, tags=[CACHE_TAG]
+	)
 
 
 @router.get("/{magazine_id}", response_model=MagazineOut)
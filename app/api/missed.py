@@ -3,6 +3,8 @@ from typing import Optional
 from app.schemas.missed import MissedCreate, MissedUpdate, MissedResponse, MissedListResponse
 from app.services.missed_service import missed_service
 from app.utils.auth import get_current_user, get_optional_user
+from app.services.engagement_service import invalidate_engagement_state
+from app.utils.engagement import increment_and_read
 
 router = APIRouter()
 
@@ -175,11 +177,12 @@ async def toggle_missed_like(
         Like.user_id == str(current_user.id)
     )
     
+    # Compteur via le tampon d'engagement (daté pour reconcile_counters), pas via save()
     if existing_like:
         await existing_like.delete()
-        missed.likes = max(0, missed.likes - 1)
-        await missed.save()
-        return {"liked": False, "count": missed.likes}
+        count = await increment_and_read("missed", missed_id, "likes", -1)
+        await invalidate_engagement_state(str(current_user.id))
+        return {"liked": False, "count": count or 0}
     else:
         like = Like(
             content_type="missed",
@@ -187,9 +190,9 @@ async def toggle_missed_like(
             user_id=str(current_user.id)
         )
         await like.insert()
-        missed.likes += 1
-        await missed.save()
-        return {"liked": True, "count": missed.likes}
+        count = await increment_and_read("missed", missed_id, "likes", 1)
+        await invalidate_engagement_state(str(current_user.id))
+        return {"liked": True, "count": count or 0}
 
 @router.get("/{missed_id}/likes/check")
 async def check_missed_liked(
@@ -234,6 +237,7 @@ async def add_missed_to_favorites(
         user_id=str(current_user.id)
     )
     await favorite.insert()
+    await invalidate_engagement_state(str(current_user.id))
     
     return {"success": True, "message": "Ajouté aux favoris"}
 
@@ -255,6 +259,7 @@ async def remove_missed_from_favorites(
         raise HTTPException(status_code=404, detail="Pas dans les favoris")
     
     await existing_fav.delete()
+    await invalidate_engagement_state(str(current_user.id))
     
     return {"success": True, "message": "Retiré des favoris"}
 
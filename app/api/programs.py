@@ -1,5 +1,5 @@
 """API Routes for Programs, Live Channels and Reminders"""
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
 from typing import List, Optional
 from datetime import datetime
 from pydantic import BaseModel
@@ -11,6 +11,7 @@ from app.schemas.program import (
     LiveChannelCreate, LiveChannelUpdate, LiveChannelOut
 )
 from app.services import program_service
+from app.utils.http_cache import conditional_response, latest_timestamp
 
 router = APIRouter()
 
@@ -217,24 +218,25 @@ async def mark_program_live(
 
 @router.get("/grid/weekly", response_model=ProgramWeekOut, tags=["Program Grid"])
 async def get_program_week(
+    request: Request,
     weeks_ahead: int = Query(0, ge=0, le=4, description="Semaines à l'avance (0 = cette semaine)"),
     type: Optional[str] = Query(None, description="Filtrer par type"),
-    current_user=Depends(get_optional_user)
 ):
     """
     Récupère la grille des programmes de la semaine, groupés par jour.
     Retourne aussi les types disponibles pour le filtrage.
     """
-    from app.utils.cache import cache_manager
-    cache_key = f"programs:week:{weeks_ahead}:{type or 'all'}"
-    cached = await cache_manager.get(cache_key)
-    if cached:
-        return cached
-
-    result = await program_service.get_program_week(weeks_ahead=weeks_ahead, type=type)
     # Cache 15 min — la grille hebdo ne change pas à la minute
-    await cache_manager.set(cache_key, result, ttl=900)
-    return result
+    return await conditional_response(
+        request,
+        f"programs:week:{weeks_ahead}:{type or 'all'}",
+        lambda: program_service.get_program_week(weeks_ahead=weeks_ahead, type=type),
+        ttl=900,
+        tags=[program_service.CACHE_TAG],
+        max_age=300,
+        stale_while_revalidate=900,
+        last_modified=lambda week: latest_timestamp(p for day in week.days for p in day.programs),
+    )
 
 
 @router.get("/grid/daily", response_model=ProgramGridOut, tags=["Program Grid"])
@@ -10,6 +10,8 @@ from app.services.reel_service import (
 	increment_reel_recent_share
 )
 from app.services import like_service, comment_service, share_service
+from app.utils.engagement import engagement_buffer, read_counters
+from app.utils.rate_limiter import get_client_ip
 
 router = APIRouter()
 
@@ -97,7 +99,7 @@ async def track_reel_view(
 	Anti-doublon 24h sur les vues uniques.
 	"""
 	user_id = str(current_user.id) if current_user else None
-	client_ip = request.client.host if request.client else None
+	client_ip = get_client_ip(request)
 	success = await track_reel_watch(
 		reel_id=reel_id,
 		watch_seconds=data.watch_seconds,
@@ -265,10 +267,11 @@ async def get_reel_stats(reel_id: str, current_user=Depends(get_optional_user)):
 		if not reel:
 			raise HTTPException(status_code=404, detail="Reel not found")
 		
-		# Récupérer toutes les stats en parallèle
-		likes_count = await like_service.count_likes(reel_id, "reel")
-		comments_count = await comment_service.count_comments(reel_id, "reel")
-		shares_count = await share_service.count_shares(reel_id, "reel")
+		# Compteurs dénormalisés : une seule lecture
+		counters = await read_counters("reel", reel_id)
+		likes_count = counters["likes"]
+		comments_count = counters["comments"]
+		shares_count = counters["shares"]
 		
 		# Vérifier si l'utilisateur a liké (si connecté)
 		user_has_liked = False
@@ -286,7 +289,8 @@ async def get_reel_stats(reel_id: str, current_user=Depends(get_optional_user)):
 			"likes": likes_count,
 			"comments": comments_count,
 			"shares": shares_count,
-			"views": reel_dict.get("views", 0) if isinstance(reel_dict, dict) else getattr(reel, "views", 0),
+			"views": (reel_dict.get("views", 0) if isinstance(reel_dict, dict) else getattr(reel, "views", 0))
+				+ engagement_buffer.pending_delta("reel", reel_id, "views"),
 			"user_has_liked": user_has_liked
 		}
 	except HTTPException:
@@ -2,8 +2,9 @@ from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import List, Optional
 from pydantic import BaseModel
 from app.utils.auth import get_admin_user, get_optional_user
+from app.utils.cache import cache_manager, cache_key
 from app.schemas.reportage import ReportageCreate, ReportageUpdate, ReportageOut
-from app.services.reportage_service import create_reportage, get_reportage, list_reportages, update_reportage, delete_reportage
+from app.services.reportage_service import create_reportage, get_reportage, list_reportages, update_reportage, delete_reportage, CACHE_TAG
 from app.models.reportage import Reportage
 
 router = APIRouter()
@@ -34,10 +35,15 @@ async def get_all_reportages(
 			{"tags": {"$in": [search_lower]}},
 		]
 
-	total = await Reportage.find(query).count()
-	items = await Reportage.find(query).sort("-created_at").skip(skip).limit(limit).to_list()
+	async def _load():
+		total = await Reportage.find(query).count()
+		items = await Reportage.find(query).sort("-created_at").skip(skip).limit(limit).to_list()
+		return {"items": items, "total": total, "skip": skip, "limit": limit}
 
-	return {"items": items, "total": total, "skip": skip, "limit": limit}
+	# Cache 60 s, invalidé par le service à chaque création/modification/suppression
+	return await cache_manager.get_or_set(
+		f"reportage:list:{cache_key(skip, limit, category, search)}", _load, ttl=60, tags=[CACHE_TAG]
+	)
 
 
 @router.get("/{reportage_id}", response_model=ReportageOut)
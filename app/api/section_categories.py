@@ -10,9 +10,10 @@ Sections disponibles :
   tele_realite     → Télé Réalité et Événements  (Pépites d'entreprises, Marathon, ...)
 """
 
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
 from typing import Optional, List
 from app.utils.auth import get_admin_user, get_optional_user
+from app.utils.http_cache import conditional_response
 from app.schemas.section_category import (
     SectionCategoryCreate, SectionCategoryUpdate, SectionCategoryOut,
     VALID_SECTIONS,
@@ -20,18 +21,25 @@ from app.schemas.section_category import (
 from app.services.section_category_service import (
     create_section_category, list_section_categories,
     get_section_category, update_section_category,
-    delete_section_category, get_sections_summary,
+    delete_section_category, get_sections_summary, CACHE_TAG,
 )
 
 router = APIRouter()
 
 
 @router.get("/summary")
-async def sections_summary(current_user=Depends(get_optional_user)):
+async def sections_summary(request: Request):
     """
     Toutes les sections avec leurs sous-catégories actives groupées.
     Pratique pour charger les menus / filtres du frontend en un seul appel.
     """
+    return await conditional_response(
+        request, "section_categories:summary", _load_sections_summary,
+        ttl=300, tags=[CACHE_TAG], max_age=60, stale_while_revalidate=300,
+    )
+
+
+async def _load_sections_summary() -> dict:
     raw = await get_sections_summary()
     return {
         section: [
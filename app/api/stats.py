@@ -83,12 +83,14 @@ async def safe_calculate_growth(model, field_name: str = "created_at") -> Dict[s
 async def get_dashboard_stats():
     """Récupère toutes les statistiques pour le dashboard avec croissance"""
     from app.utils.cache import cache_manager
-    import asyncio
 
-    cache_key = "stats:dashboard"
-    cached = await cache_manager.get(cache_key)
-    if cached:
-        return cached
+    # Cache 30 minutes — les stats du dashboard ne changent pas à la seconde.
+    # get_or_set regroupe les requêtes concurrentes sur un cache froid en un seul calcul.
+    return await cache_manager.get_or_set("stats:dashboard", _compute_dashboard_stats, ttl=1800)
+
+
+async def _compute_dashboard_stats() -> Dict[str, Any]:
+    import asyncio
 
     # Exécuter tous les calculs en parallèle pour améliorer les performances
     results = await asyncio.gather(
@@ -130,7 +132,31 @@ async def get_dashboard_stats():
         "archives":        results[15],
         "missed":          results[16],
     }
-    
-    # Cache 30 minutes — les stats du dashboard ne changent pas à la seconde
-    await cache_manager.set(cache_key, stats, ttl=1800)
     return stats
+
+
+@router.get("/cache")
+async def get_cache_stats(current_user=Depends(get_admin_user)):
+    """Compteurs hit/miss du cache par préfixe (admin seulement)"""
+    from app.utils.cache import cache_manager
+    return cache_manager.get_stats()
+
+
+@router.get("/db")
+async def get_db_stats(current_user=Depends(get_admin_user)):
+    """Commandes MongoDB par route pour ce worker : volume, temps, N+1 détectés (admin seulement)"""
+    from app.core.db_instrumentation import route_db_stats
+    return route_db_stats.snapshot()
+
+
+@router.get("/scheduler")
+async def get_scheduler_stats(limit: int = 50, current_user=Depends(get_admin_user)):
+    """Leader courant du scheduler et dernières exécutions des tâches planifiées (admin seulement)"""
+    from app.config import get_database
+    from app.core.lease import MongoLease
+    from app.core.scheduler import JOB_RUNS_COLLECTION, scheduler_status
+
+    db = get_database()
+    leader = await MongoLease("leader:scheduler").holder()
+    runs = await db[JOB_RUNS_COLLECTION].find({}, {"_id": 0}).sort("started_at", -1).limit(min(limit, 500)).to_list(None)
+    return {"leader": leader, "worker": scheduler_status(), "recent_runs": runs}
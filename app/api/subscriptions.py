@@ -74,9 +74,12 @@ async def check_premium_status(current_user=Depends(get_current_user)):
 @router.post("/admin/deactivate-expired")
 async def admin_deactivate_expired(current_user=Depends(get_admin_user)):
     """Désactiver tous les abonnements expirés (admin seulement)"""
-    count = await deactivate_expired_subscriptions()
+    report = await deactivate_expired_subscriptions()
+    count = report["deactivated"]
     return {
         "deactivated_count": count,
+        "users_updated": report["users_updated"],
+        "timings": report["timings"],
         "message": f"{count} abonnements expirés ont été désactivés"
     }
 
@@ -2,10 +2,11 @@ from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import Optional, List
 from pydantic import BaseModel
 from app.utils.auth import get_admin_user, get_optional_user
+from app.utils.cache import cache_manager, cache_key
 from app.schemas.tele_realite import TeleRealiteCreate, TeleRealiteUpdate, TeleRealiteOut
 from app.services.tele_realite_service import (
     create_tele_realite, get_tele_realite, list_tele_realite,
-    update_tele_realite, delete_tele_realite,
+    update_tele_realite, delete_tele_realite, CACHE_TAG,
 )
 
 router = APIRouter()
@@ -25,7 +26,13 @@ async def get_all_tele_realite(
     search: Optional[str] = Query(None, description="Recherche par titre, description, catégorie"),
     current_user=Depends(get_optional_user),
 ):
-    return await list_tele_realite(skip=skip, limit=limit, sub_type=sub_type, category=category, search=search)
+    # Cache 60 s, invalidé par le service à chaque création/modification/suppression
+    return await cache_manager.get_or_set(
+        f"tele_realite:list:{cache_key(skip, limit, sub_type, category, search)}",
+        lambda: list_tele_realite(skip=skip, limit=limit, sub_type=sub_type, category=category, search=search),
+        ttl=60,
+        tags=[CACHE_TAG],
+    )
 
 
 @router.get("/{item_id}", response_model=TeleRealiteOut)
@@ -1,13 +1,13 @@
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.responses import RedirectResponse, HTMLResponse
 from pydantic import BaseModel, EmailStr
-from app.utils.auth import get_current_user, get_admin_user
+from app.utils.auth import get_current_user, get_current_user_document, get_admin_user, invalidate_principal
 from app.schemas.user import UserCreate, UserOut, UserLoginSchema, UserLocationUpdate, FcmTokenUpdate, UserProfileUpdate
-from app.services.user_service import create_user, get_user, list_users, login_user_service, set_user_active, delete_user
+from app.services.user_service import create_user, get_user, list_users, login_user_service, build_login_response, set_user_active, delete_user
 from app.models.user import User
 from typing import List, Optional
 from datetime import datetime
-from passlib.context import CryptContext
+from app.utils.security import hash_password_async
 import secrets
 import os
 import urllib.parse
@@ -22,7 +22,6 @@ FRONTEND_URL = os.getenv("FRONTEND_URL", "https://bf1-tv-mobile.onrender.com")
 
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "changeme")
 ALGORITHM = "HS256"
-_pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 router = APIRouter()
 
@@ -63,9 +62,8 @@ async def register_user(user: UserCreate):
     created_user = await create_user(user)
     
     # Connecter automatiquement l'utilisateur après inscription
-    login_result = await login_user_service(user.username, user.password)
-    
-    return login_result
+    # (le mot de passe vient d'être haché : inutile de le re-vérifier)
+    return build_login_response(created_user)
 
 @router.post("/login")
 async def login_user(data: UserLoginSchema):
@@ -78,15 +76,11 @@ async def login_user(data: UserLoginSchema):
 @router.get("/me", response_model=UserOut)
 async def get_current_user_info(current_user=Depends(get_current_user)):
     """Récupérer les informations de l'utilisateur connecté (avec synchro abonnement)"""
-    from app.services.subscription_service import sync_user_premium_status
-    await sync_user_premium_status(str(current_user.id))
-    # Recharger depuis la DB pour avoir subscription_category à jour
-    from app.models.user import User
-    fresh = await User.get(current_user.id)
-    return fresh if fresh else current_user
+    # Le principal est déjà synchronisé avec les abonnements par get_current_user
+    return current_user
 
 @router.patch("/me/location", response_model=UserOut)
-async def update_user_location(location: UserLocationUpdate, current_user=Depends(get_current_user)):
+async def update_user_location(location: UserLocationUpdate, current_user=Depends(get_current_user_document)):
     """Mettre à jour la localisation de l'utilisateur connecté"""
     print(f"📍 [API] Mise à jour localisation pour {current_user.username}")
     print(f"📍 [API] Données reçues: {location.dict()}")
@@ -109,12 +103,13 @@ async def update_user_location(location: UserLocationUpdate, current_user=Depend
     current_user.updated_at = datetime.utcnow()
     
     await current_user.save()
+    await invalidate_principal(current_user.id)
     print(f"✅ [API] Localisation enregistrée pour {current_user.username}")
     
     return current_user
 
 @router.post("/fcm-token")
-async def save_fcm_token(body: FcmTokenUpdate, current_user=Depends(get_current_user)):
+async def save_fcm_token(body: FcmTokenUpdate, current_user=Depends(get_current_user_document)):
     """Enregistrer ou mettre à jour le token FCM Firebase de l'utilisateur"""
     token = body.fcm_token.strip()
     if not token:
@@ -134,7 +129,7 @@ async def save_fcm_token(body: FcmTokenUpdate, current_user=Depends(get_current_
 
 
 @router.delete("/fcm-token")
-async def remove_fcm_token(body: FcmTokenUpdate, current_user=Depends(get_current_user)):
+async def remove_fcm_token(body: FcmTokenUpdate, current_user=Depends(get_current_user_document)):
     """Supprimer un token FCM (déconnexion / désactivation des notifs)"""
     token = body.fcm_token.strip()
     if hasattr(current_user, 'fcm_tokens') and current_user.fcm_tokens:
@@ -233,7 +228,7 @@ async def google_auth_callback(code: str = None, error: str = None):
             user = User(
                 email=email,
                 username=username,
-                hashed_password=_pwd_context.hash(fake_password),
+                hashed_password=await hash_password_async(fake_password),
                 avatar_url=google_picture or None,
             )
             await user.insert()
@@ -315,7 +310,7 @@ async def google_mobile_auth(body: GoogleMobileTokenRequest):
             user = User(
                 email=email,
                 username=username,
-                hashed_password=_pwd_context.hash(fake_password),
+                hashed_password=await hash_password_async(fake_password),
                 avatar_url=google_picture or None,
             )
             await user.insert()
@@ -360,7 +355,7 @@ async def get_all_users(page: int = 1, limit: int = 20, current_user=Depends(get
 
 
 @router.patch("/me", response_model=UserOut)
-async def update_my_profile(data: UserProfileUpdate, current_user=Depends(get_current_user)):
+async def update_my_profile(data: UserProfileUpdate, current_user=Depends(get_current_user_document)):
     """Mettre à jour le profil de l'utilisateur connecté (username, email, phone, avatar)"""
     import base64, uuid, os
 
@@ -424,6 +419,7 @@ async def update_my_profile(data: UserProfileUpdate, current_user=Depends(get_cu
 
     current_user.updated_at = datetime.utcnow()
     await current_user.save()
+    await invalidate_principal(current_user.id)
     return current_user
 
 
@@ -459,6 +455,7 @@ async def admin_update_user(user_id: str, data: AdminUserUpdate, current_user=De
         user.is_active = data.is_active
     user.updated_at = datetime.utcnow()
     await user.save()
+    await invalidate_principal(user_id)
     return user
 
 
@@ -37,11 +37,22 @@ from app.models.missed import Missed
 from app.models.admin_notification import AdminNotification
 from app.api.contact import ContactMessageDoc
 from app.models import enums
+from app.core.db_instrumentation import DB_INSTRUMENTATION_ENABLED, db_command_listener
+from app.core.metrics import mongo_pool_listener
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Base Motor du process, pour les collections techniques hors modèles Beanie
+_database = None
+
+
+def get_database():
+    return _database
+
+
 async def init_db():
+    global _database
     db_url = os.getenv("MONGODB_URI", "mongodb://localhost:27017/Bf1_db_dev")
     db_name = os.getenv("MONGODB_DBNAME", "Bf1_db_dev")
     client = AsyncIOMotorClient(
@@ -52,9 +63,13 @@ async def init_db():
         serverSelectionTimeoutMS=5000,
         connectTimeoutMS=5000,
         socketTimeoutMS=10000,
+        # Comptage des commandes par requête HTTP (Server-Timing, détection N+1)
+        # + temps d'attente du pool pour /metrics
+        event_listeners=([db_command_listener] if DB_INSTRUMENTATION_ENABLED else []) + [mongo_pool_listener],
     )
+    _database = client[db_name]
     await init_beanie(
-        database=client[db_name],
+        database=_database,
         document_models=[
             Movie, User,  Favorite, Like, Comment, BreakingNews, Notification,
             Subscription, SubscriptionPlan, Message, Divertissement, Reel, Reportage, JTandMag, Share,
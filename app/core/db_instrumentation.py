@@ -0,0 +1,195 @@
+"""
+Instrumentation MongoDB par requête HTTP.
+
+Un CommandListener pymongo attribue chaque commande à la requête en cours
+via un contextvar (Motor copie le contexte dans ses threads d'exécution) :
+nombre de commandes, temps DB cumulé, commande la plus lente.
+
+Le middleware ajoute l'en-tête `Server-Timing`, journalise un avertissement
+quand une requête dépasse DB_QUERY_WARN_THRESHOLD commandes ou répète la
+même forme de requête (N+1 probable), et agrège des statistiques par route
+(par worker) consultables via GET /api/v1/stats/db.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from pymongo import monitoring
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+DB_INSTRUMENTATION_ENABLED = os.getenv("DB_INSTRUMENTATION", "true").lower() == "true"
+# Nombre de commandes au-delà duquel une requête est signalée
+DB_QUERY_WARN_THRESHOLD = int(os.getenv("DB_QUERY_WARN_THRESHOLD", "25"))
+# Répétitions d'une même forme de requête au-delà desquelles on signale un N+1
+DB_REPEAT_WARN_THRESHOLD = int(os.getenv("DB_REPEAT_WARN_THRESHOLD", "5"))
+
+# Champs d'une commande qui portent le filtre (selon la commande)
+_FILTER_FIELDS = ("filter", "query", "q", "pipeline", "updates", "deletes", "documents")
+_IGNORED_COMMANDS = {"endSessions", "ping", "hello", "isMaster", "ismaster", "buildInfo", "saslStart", "saslContinue"}
+
+
+def _shape(value: Any, depth: int = 0) -> Any:
+    """Structure d'un filtre sans ses valeurs : {"_id": {"$in": "?"}}."""
+    if depth > 4:
+        return "?"
+    if isinstance(value, dict):
+        return {k: _shape(v, depth + 1) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [_shape(value[0], depth + 1)] if value else []
+    return "?"
+
+
+def command_shape(command_name: str, command: Dict[str, Any]) -> str:
+    collection = command.get(command_name)
+    for field in _FILTER_FIELDS:
+        if field in command:
+            return f"{command_name} {collection} {_shape(command[field])}"
+    return f"{command_name} {collection}"
+
+
+class RequestDbStats:
+    """Compteurs DB d'une requête (alimentés depuis les threads de Motor)."""
+
+    __slots__ = ("count", "total_ms", "slowest_ms", "slowest_shape", "shapes", "_pending", "_lock")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_shape: Optional[str] = None
+        self.shapes: Counter = Counter()
+        self._pending: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def started(self, request_id: int, shape: str):
+        with self._lock:
+            self._pending[request_id] = shape
+            self.shapes[shape] += 1
+
+    def finished(self, request_id: int, duration_micros: int):
+        ms = duration_micros / 1000
+        with self._lock:
+            shape = self._pending.pop(request_id, None)
+            self.count += 1
+            self.total_ms += ms
+            if ms > self.slowest_ms:
+                self.slowest_ms, self.slowest_shape = ms, shape
+
+
+_current_stats: ContextVar[Optional[RequestDbStats]] = ContextVar("db_request_stats", default=None)
+
+
+class DbCommandListener(monitoring.CommandListener):
+    def started(self, event):
+        stats = _current_stats.get()
+        if stats is None or event.command_name in _IGNORED_COMMANDS:
+            return
+        stats.started(event.request_id, command_shape(event.command_name, event.command))
+
+    def succeeded(self, event):
+        stats = _current_stats.get()
+        if stats is not None and event.command_name not in _IGNORED_COMMANDS:
+            stats.finished(event.request_id, event.duration_micros)
+
+    def failed(self, event):
+        self.succeeded(event)
+
+
+db_command_listener = DbCommandListener()
+
+
+class RouteDbStats:
+    """Agrégats par route (template de chemin), pour ce worker."""
+
+    def __init__(self):
+        self.routes: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: {"requests": 0, "queries": 0, "db_ms": 0.0, "max_queries": 0, "max_db_ms": 0.0, "n_plus_one": 0}
+        )
+
+    def record(self, route: str, stats: RequestDbStats, repeated: bool):
+        entry = self.routes[route]
+        entry["requests"] += 1
+        entry["queries"] += stats.count
+        entry["db_ms"] += stats.total_ms
+        entry["max_queries"] = max(entry["max_queries"], stats.count)
+        entry["max_db_ms"] = max(entry["max_db_ms"], stats.total_ms)
+        if repeated:
+            entry["n_plus_one"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        routes = {}
+        for route, entry in sorted(self.routes.items(), key=lambda kv: -kv[1]["db_ms"]):
+            n = entry["requests"] or 1
+            routes[route] = {
+                **entry,
+                "db_ms": round(entry["db_ms"], 1),
+                "max_db_ms": round(entry["max_db_ms"], 1),
+                "avg_queries": round(entry["queries"] / n, 2),
+                "avg_db_ms": round(entry["db_ms"] / n, 2),
+            }
+        return {"pid": os.getpid(), "routes": routes}
+
+
+route_db_stats = RouteDbStats()
+
+
+def _route_name(scope: Scope) -> str:
+    route = scope.get("route")
+    path = getattr(route, "path", None) or scope["path"]
+    return f"{scope['method']} {path}"
+
+
+class DbInstrumentationMiddleware:
+    """Ouvre un RequestDbStats par requête HTTP et publie le résultat."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestDbStats()
+        token = _current_stats.set(stats)
+        started_at = time.perf_counter()
+
+        async def send_with_timing(message: Message):
+            if message["type"] == "http.response.start" and stats.count:
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={stats.total_ms:.1f};desc="{stats.count} queries", '
+                    f'app;dur={(time.perf_counter() - started_at) * 1000:.1f}',
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            self._report(scope, stats)
+
+    @staticmethod
+    def _report(scope: Scope, stats: RequestDbStats):
+        if not stats.count:
+            return
+        route = _route_name(scope)
+        shape, repeats = stats.shapes.most_common(1)[0]
+        repeated = repeats >= DB_REPEAT_WARN_THRESHOLD
+        route_db_stats.record(route, stats, repeated)
+
+        if stats.count > DB_QUERY_WARN_THRESHOLD:
+            logger.warning(
+                f"⚠️ {route}: {stats.count} commandes MongoDB ({stats.total_ms:.1f} ms, "
+                f"plus lente {stats.slowest_ms:.1f} ms : {stats.slowest_shape})"
+            )
+        if repeated:
+            logger.warning(f"⚠️ {route}: N+1 probable, {repeats}x « {shape} »")
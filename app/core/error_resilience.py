@@ -79,35 +79,43 @@ class ErrorResilience:
             }
         )
 
+def internal_error_response(request: Request, error: Exception) -> JSONResponse:
+    """
+    Réponse 500 renvoyée quand une erreur non gérée remonte jusqu'au
+    middleware (voir app/core/middlewares.py), avec les en-têtes CORS.
+    """
+    logger.error(f"❌ Erreur non gérée dans {request.url.path}")
+    logger.error(f"   Exception: {str(error)}")
+    logger.error(f"   Traceback: {traceback.format_exc()}")
+
+    origin = request.headers.get("origin", "*")
+    response = JSONResponse(
+        status_code=500,
+        content={
+            "success": False,
+            "error": "Erreur interne du serveur",
+            "path": str(request.url.path),
+            "message": "Cette section a rencontré une erreur, mais le reste du système fonctionne normalement"
+        }
+    )
+    response.headers["Access-Control-Allow-Origin"] = origin
+    response.headers["Access-Control-Allow-Credentials"] = "true"
+    response.headers["Access-Control-Allow-Methods"] = "*"
+    response.headers["Access-Control-Allow-Headers"] = "*"
+    return response
+
 # Middleware de résilience
 async def resilience_middleware(request: Request, call_next):
     """
     Middleware qui capture toutes les erreurs non gérées
-    et empêche le serveur de planter
+    et empêche le serveur de planter.
+    Remplacé dans main.py par CoreMiddleware (ASGI pur), qui intègre ce comportement.
     """
     try:
         response = await call_next(request)
         return response
     except Exception as e:
-        logger.error(f"❌ Erreur non gérée dans {request.url.path}")
-        logger.error(f"   Exception: {str(e)}")
-        logger.error(f"   Traceback: {traceback.format_exc()}")
-
-        origin = request.headers.get("origin", "*")
-        response = JSONResponse(
-            status_code=500,
-            content={
-                "success": False,
-                "error": "Erreur interne du serveur",
-                "path": str(request.url.path),
-                "message": "Cette section a rencontré une erreur, mais le reste du système fonctionne normalement"
-            }
-        )
-        response.headers["Access-Control-Allow-Origin"] = origin
-        response.headers["Access-Control-Allow-Credentials"] = "true"
-        response.headers["Access-Control-Allow-Methods"] = "*"
-        response.headers["Access-Control-Allow-Headers"] = "*"
-        return response
+        return internal_error_response(request, e)
 
 # Décorateur pour sécuriser les endpoints
 def safe_endpoint(fallback_value=None):
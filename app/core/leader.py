@@ -0,0 +1,93 @@
+"""
+Election d'un leader parmi les workers (gunicorn, plusieurs machines).
+
+Chaque process tente périodiquement de prendre un bail MongoDB commun.
+Le détenteur le renouvelle (heartbeat) toutes les ttl/3 secondes ; s'il meurt
+ou perd la base, le bail expire et un autre worker le reprend au tour suivant
+(failover en moins de ttl + ttl/3 secondes).
+
+Un leader qui ne parvient plus à renouveler se démet de lui-même avant la fin
+de son bail, pour ne jamais laisser deux leaders actifs en même temps.
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional
+
+from app.core.lease import MongoLease
+
+
+class LeaderElector:
+    def __init__(
+        self,
+        name: str,
+        ttl: int,
+        on_elected: Callable[[], Awaitable[None]],
+        on_demoted: Callable[[], Awaitable[None]],
+    ):
+        self.lease = MongoLease(f"leader:{name}", ttl=ttl)
+        self.ttl = ttl
+        self._on_elected = on_elected
+        self._on_demoted = on_demoted
+        self._is_leader = False
+        # Fin de validité du bail selon notre horloge monotone
+        self._valid_until = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._is_leader
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._is_leader:
+            await self._step_down()
+            # Libération explicite : un autre worker reprend sans attendre l'expiration
+            await self.lease.release()
+
+    async def _loop(self):
+        while True:
+            await self._tick()
+            await asyncio.sleep(self.ttl / 3)
+
+    async def _tick(self):
+        started = time.monotonic()
+        try:
+            ok = await (self.lease.renew() if self._is_leader else self.lease.acquire())
+        except Exception as e:
+            print(f"⚠️ [Leader] Heartbeat {self.lease.name} en échec: {e}")
+            # Marge d'un tiers de TTL avant l'expiration réelle du bail
+            if self._is_leader and time.monotonic() >= self._valid_until - self.ttl / 3:
+                await self._step_down()
+            return
+
+        if ok:
+            self._valid_until = started + self.ttl
+            if not self._is_leader:
+                self._is_leader = True
+                print(f"👑 [Leader] {self.lease.owner} élu pour {self.lease.name}")
+                try:
+                    await self._on_elected()
+                except Exception as e:
+                    print(f"❌ [Leader] Erreur à la prise de leadership: {e}")
+        elif self._is_leader:
+            # Bail repris par un autre process (pause GC, réseau coupé trop longtemps...)
+            await self._step_down()
+
+    async def _step_down(self):
+        self._is_leader = False
+        print(f"⚠️ [Leader] {self.lease.owner} n'est plus leader pour {self.lease.name}")
+        try:
+            await self._on_demoted()
+        except Exception as e:
+            print(f"❌ [Leader] Erreur à la perte de leadership: {e}")
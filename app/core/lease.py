@@ -0,0 +1,99 @@
+"""
+Verrou à bail (lease) stocké dans MongoDB, partagé entre workers et machines.
+
+Un bail appartient à un seul propriétaire jusqu'à `expires_at` ; il doit être
+renouvelé avant expiration (keep_alive) sinon un autre process peut le
+reprendre. Les dates viennent de l'horloge locale : les machines doivent être
+synchronisées (NTP) à quelques secondes près, très en dessous du TTL.
+"""
+
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.config import get_database
+
+LEASES_COLLECTION = "_leases"
+
+# Identifiant unique de ce process (hôte:pid:aléa)
+PROCESS_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class MongoLease:
+    def __init__(self, name: str, ttl: int = 60, owner: str = PROCESS_ID):
+        self.name = name
+        self.ttl = ttl
+        self.owner = owner
+        self._keeper: Optional[asyncio.Task] = None
+
+    @property
+    def _collection(self):
+        return get_database()[LEASES_COLLECTION]
+
+    async def acquire(self) -> bool:
+        """Prend le bail s'il est libre, expiré ou déjà à nous."""
+        now = datetime.utcnow()
+        try:
+            doc = await self._collection.find_one_and_update(
+                {"_id": self.name, "$or": [{"expires_at": {"$lt": now}}, {"owner": self.owner}]},
+                {
+                    "$set": {"owner": self.owner, "expires_at": now + timedelta(seconds=self.ttl), "renewed_at": now},
+                    "$setOnInsert": {"created_at": now},
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            # Le document existe et appartient à un autre process encore actif
+            return False
+        return doc is not None and doc.get("owner") == self.owner
+
+    async def renew(self) -> bool:
+        now = datetime.utcnow()
+        result = await self._collection.update_one(
+            {"_id": self.name, "owner": self.owner},
+            {"$set": {"expires_at": now + timedelta(seconds=self.ttl), "renewed_at": now}},
+        )
+        return result.matched_count == 1
+
+    async def release(self):
+        self.stop_keep_alive()
+        try:
+            await self._collection.update_one(
+                {"_id": self.name, "owner": self.owner},
+                {"$set": {"expires_at": datetime.utcnow()}},
+            )
+        except Exception as e:
+            print(f"⚠️ Libération du bail {self.name} impossible: {e}")
+
+    async def holder(self) -> Optional[dict]:
+        return await self._collection.find_one({"_id": self.name})
+
+    def start_keep_alive(self, on_lost=None):
+        """Renouvelle le bail toutes les ttl/3 secondes ; appelle on_lost() s'il est perdu."""
+        async def _keep():
+            while True:
+                await asyncio.sleep(self.ttl / 3)
+                try:
+                    if not await self.renew():
+                        print(f"⚠️ Bail {self.name} perdu")
+                        if on_lost:
+                            on_lost()
+                        return
+                except Exception as e:
+                    # Erreur réseau passagère : on réessaie au prochain tour, le bail court encore
+                    print(f"⚠️ Renouvellement du bail {self.name} en échec: {e}")
+
+        self.stop_keep_alive()
+        self._keeper = asyncio.create_task(_keep())
+
+    def stop_keep_alive(self):
+        if self._keeper:
+            self._keeper.cancel()
+            self._keeper = None
@@ -0,0 +1,447 @@
+"""
+Métriques Prometheus agrégées sur tous les workers gunicorn.
+
+Chaque worker tient ses compteurs en mémoire et écrit périodiquement un
+instantané JSON dans METRICS_DIR (`<pid>.json`, remplacement atomique).
+GET /metrics fusionne les fichiers de tous les workers :
+- compteurs et histogrammes : sommés, y compris ceux des workers arrêtés
+  (recyclés par max_requests), compactés dans `archive.json` ;
+- jauges (requêtes en cours, connexions WebSocket) : workers vivants uniquement.
+
+Séries exposées :
+  bf1_http_requests_total, bf1_http_request_duration_seconds,
+  bf1_http_requests_in_flight, bf1_mongo_pool_wait_seconds,
+  bf1_cache_lookups_total, bf1_cache_hit_ratio,
+  bf1_websocket_connections, bf1_scheduler_job_duration_seconds
+"""
+
+import asyncio
+import fcntl
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import monitoring
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+_default_dir = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+METRICS_DIR = os.getenv("METRICS_DIR", os.path.join(_default_dir, "bf1-metrics"))
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0, 5.0)
+JOB_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0)
+
+HELP = {
+    "bf1_http_requests_total": ("counter", "Requêtes HTTP par route, méthode et statut"),
+    "bf1_http_request_duration_seconds": ("histogram", "Durée des requêtes HTTP par route"),
+    "bf1_http_requests_in_flight": ("gauge", "Requêtes HTTP en cours par route"),
+    "bf1_mongo_pool_wait_seconds": ("histogram", "Attente d'une connexion du pool MongoDB"),
+    "bf1_cache_lookups_total": ("counter", "Lectures du cache par préfixe et résultat"),
+    "bf1_cache_hit_ratio": ("gauge", "Taux de hit du cache (local + Redis) par préfixe"),
+    "bf1_websocket_connections": ("gauge", "Connexions WebSocket ouvertes"),
+    "bf1_scheduler_job_duration_seconds": ("histogram", "Durée des tâches planifiées"),
+    "bf1_engagement_events_total": ("counter", "Incréments d'engagement reçus par le tampon write-behind"),
+    "bf1_engagement_flushes_total": ("counter", "Flushs du tampon d'engagement"),
+    "bf1_engagement_documents_written_total": ("counter", "Documents mis à jour par les flushs d'engagement"),
+    "bf1_engagement_flush_errors_total": ("counter", "Erreurs de flush du tampon d'engagement"),
+    "bf1_engagement_pending_counters": ("gauge", "Compteurs d'engagement en attente d'écriture"),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(**kwargs) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in kwargs.items()))
+
+
+class MetricsRegistry:
+    """Compteurs, jauges et histogrammes du worker courant."""
+
+    def __init__(self):
+        # Le listener du pool MongoDB écrit depuis les threads de Motor
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Dict[Labels, float]] = defaultdict(lambda: defaultdict(float))
+        self.gauges: Dict[str, Dict[Labels, float]] = defaultdict(lambda: defaultdict(float))
+        self.buckets: Dict[str, Tuple[float, ...]] = {}
+        # Par série : [compte par bucket..., dépassement, somme, total]
+        self.histograms: Dict[str, Dict[Labels, List[float]]] = defaultdict(dict)
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, Labels, float]]]] = []
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1.0):
+        with self._lock:
+            self.counters[name][labels] += value
+
+    def gauge_add(self, name: str, labels: Labels = (), delta: float = 1.0):
+        with self._lock:
+            self.gauges[name][labels] += delta
+
+    def observe(self, name: str, value: float, labels: Labels = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        with self._lock:
+            self.buckets.setdefault(name, buckets)
+            series = self.histograms[name].get(labels)
+            if series is None:
+                series = self.histograms[name][labels] = [0.0] * (len(buckets) + 3)
+            i = 0
+            while i < len(buckets) and value > buckets[i]:
+                i += 1
+            series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def register_collector(self, collector: Callable[[], Iterable[Tuple[str, str, Labels, float]]]):
+        """`collector()` renvoie des (type, nom, labels, valeur) lus au moment de l'instantané."""
+        self._collectors.append(collector)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = {n: [[list(l), v] for l, v in s.items()] for n, s in self.counters.items()}
+            gauges = {n: [[list(l), v] for l, v in s.items()] for n, s in self.gauges.items()}
+            histograms = {
+                n: {"buckets": list(self.buckets[n]), "series": [[list(l), list(v)] for l, v in s.items()]}
+                for n, s in self.histograms.items()
+            }
+        for collector in self._collectors:
+            try:
+                for kind, name, labels, value in collector():
+                    target = counters if kind == "counter" else gauges
+                    target.setdefault(name, []).append([list(labels), value])
+            except Exception as e:
+                print(f"⚠️ Collecteur de métriques en échec: {e}")
+        return {"pid": os.getpid(), "ts": time.time(), "counters": counters, "gauges": gauges, "histograms": histograms}
+
+
+registry = MetricsRegistry()
+
+
+# ======================
+# Stockage multi-process
+# ======================
+def _write_json(path: str, data: dict):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def write_snapshot(snapshot: dict):
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    _write_json(os.path.join(METRICS_DIR, f"{snapshot['pid']}.json"), snapshot)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+def _merge(into: dict, snap: dict, with_gauges: bool):
+    kinds = ("counters", "gauges") if with_gauges else ("counters",)
+    for kind in kinds:
+        for name, series in snap.get(kind, {}).items():
+            target = into[kind].setdefault(name, {})
+            for labels, value in series:
+                key = tuple(tuple(l) for l in labels)
+                target[key] = target.get(key, 0.0) + value
+    for name, hist in snap.get("histograms", {}).items():
+        target = into["histograms"].setdefault(name, {"buckets": hist["buckets"], "series": {}})
+        for labels, values in hist["series"]:
+            key = tuple(tuple(l) for l in labels)
+            current = target["series"].get(key)
+            target["series"][key] = values if current is None else [a + b for a, b in zip(current, values)]
+
+
+def _to_snapshot(merged: dict) -> dict:
+    """Forme fusionnée → forme fichier (pour archive.json)."""
+    return {
+        "counters": {n: [[list(l), v] for l, v in s.items()] for n, s in merged["counters"].items()},
+        "histograms": {
+            n: {"buckets": h["buckets"], "series": [[list(l), v] for l, v in h["series"].items()]}
+            for n, h in merged["histograms"].items()
+        },
+    }
+
+
+def collect_all() -> dict:
+    """Fusionne les instantanés de tous les workers (appelé hors boucle d'événements)."""
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    merged = {"counters": {}, "gauges": {}, "histograms": {}}
+    archive_path = os.path.join(METRICS_DIR, "archive.json")
+
+    with open(os.path.join(METRICS_DIR, ".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        archive = {"counters": {}, "gauges": {}, "histograms": {}}
+        if os.path.exists(archive_path):
+            with open(archive_path) as f:
+                _merge(archive, json.load(f), with_gauges=False)
+
+        compacted = []
+        for name in os.listdir(METRICS_DIR):
+            if not name.endswith(".json") or name == "archive.json":
+                continue
+            path = os.path.join(METRICS_DIR, name)
+            try:
+                with open(path) as f:
+                    snap = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if _pid_alive(snap["pid"]):
+                _merge(merged, snap, with_gauges=True)
+            else:
+                # Worker recyclé : ses compteurs rejoignent l'archive
+                _merge(archive, snap, with_gauges=False)
+                compacted.append(path)
+
+        if compacted:
+            _write_json(archive_path, _to_snapshot(archive))
+            for path in compacted:
+                os.remove(path)
+
+    _merge(merged, _to_snapshot(archive), with_gauges=False)
+    return merged
+
+
+# ======================
+# Rendu Prometheus
+# ======================
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(labels: Iterable[Tuple[str, str]], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + "}"
+
+
+def _fmt_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _header(lines: List[str], name: str):
+    kind, help_text = HELP.get(name, ("untyped", name))
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def render(merged: dict) -> str:
+    # Taux de hit du cache, dérivé des compteurs agrégés
+    lookups = merged["counters"].get("bf1_cache_lookups_total", {})
+    per_prefix: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    for labels, value in lookups.items():
+        d = dict(labels)
+        per_prefix[d["prefix"]][d["result"]] += value
+    ratios = {}
+    for prefix, results in per_prefix.items():
+        total = sum(results.values())
+        if total:
+            ratios[(("prefix", prefix),)] = (results["local_hit"] + results["redis_hit"]) / total
+    if ratios:
+        merged["gauges"]["bf1_cache_hit_ratio"] = ratios
+
+    lines: List[str] = []
+    for kind in ("counters", "gauges"):
+        for name in sorted(merged[kind]):
+            _header(lines, name)
+            for labels, value in sorted(merged[kind][name].items()):
+                lines.append(f"{name}{_fmt_labels(labels)} {_fmt_value(value)}")
+
+    for name in sorted(merged["histograms"]):
+        hist = merged["histograms"][name]
+        _header(lines, name)
+        for labels, values in sorted(hist["series"].items()):
+            cumulative = 0.0
+            for bound, count in zip(hist["buckets"], values):
+                cumulative += count
+                lines.append(f"{name}_bucket{_fmt_labels(labels, ('le', repr(float(bound))))} {_fmt_value(cumulative)}")
+            lines.append(f"{name}_bucket{_fmt_labels(labels, ('le', '+Inf'))} {_fmt_value(values[-1])}")
+            lines.append(f"{name}_sum{_fmt_labels(labels)} {repr(float(values[-2]))}")
+            lines.append(f"{name}_count{_fmt_labels(labels)} {_fmt_value(values[-1])}")
+    return "\n".join(lines) + "\n"
+
+
+async def render_all_workers() -> str:
+    write_snapshot(registry.snapshot())
+    merged = await asyncio.to_thread(collect_all)
+    return render(merged)
+
+
+# ======================
+# Sources
+# ======================
+_ID_SEGMENT = re.compile(r"/(?:[0-9a-fA-F]{24}|\d+|[0-9a-fA-F]{8}-[0-9a-fA-F-]{27})(?=/|$)")
+_UNMATCHED = "<unmatched>"
+
+
+class MetricsMiddleware:
+    """Durée, statut et requêtes en cours par template de route."""
+
+    def __init__(self, app: ASGIApp, cache_size: int = 4096):
+        self.app = app
+        self.cache_size = cache_size
+        self._templates: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+
+    def _route_template(self, scope: Scope) -> str:
+        # Les identifiants sont normalisés avant résolution : peu de clés distinctes
+        key = (scope["method"], _ID_SEGMENT.sub("/0", scope["path"]))
+        template = self._templates.get(key)
+        if template is not None:
+            self._templates.move_to_end(key)
+            return template
+
+        template = _UNMATCHED
+        probe = {**scope, "path": key[1]}
+        for route in scope["app"].router.routes:
+            match, _ = route.matches(probe)
+            if match == Match.FULL:
+                template = route.path
+                break
+            if match == Match.PARTIAL and template == _UNMATCHED:
+                template = route.path
+        self._templates[key] = template
+        if len(self._templates) > self.cache_size:
+            self._templates.popitem(last=False)
+        return template
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or "app" not in scope:
+            return await self.app(scope, receive, send)
+
+        route = self._route_template(scope)
+        method = scope["method"]
+        in_flight = _labels(route=route)
+        status = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        registry.gauge_add("bf1_http_requests_in_flight", in_flight, 1)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            registry.gauge_add("bf1_http_requests_in_flight", in_flight, -1)
+            registry.observe(
+                "bf1_http_request_duration_seconds",
+                time.perf_counter() - started,
+                _labels(route=route, method=method),
+            )
+            registry.inc("bf1_http_requests_total", _labels(route=route, method=method, status=status))
+
+
+class MongoPoolListener(monitoring.ConnectionPoolListener):
+    """Temps d'attente pour obtenir une connexion du pool (threads de Motor)."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def _observe(self, outcome: str):
+        started = getattr(self._local, "started", None)
+        if started is not None:
+            self._local.started = None
+            registry.observe(
+                "bf1_mongo_pool_wait_seconds", time.perf_counter() - started,
+                _labels(outcome=outcome), buckets=POOL_WAIT_BUCKETS,
+            )
+
+    def connection_checked_out(self, event):
+        self._observe("ok")
+
+    def connection_check_out_failed(self, event):
+        self._observe("failed")
+
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_created(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_closed(self, event): pass
+    def connection_checked_in(self, event): pass
+
+
+mongo_pool_listener = MongoPoolListener()
+
+
+def observe_job(job_id: str, seconds: float, outcome: str):
+    registry.observe(
+        "bf1_scheduler_job_duration_seconds", seconds,
+        _labels(job=job_id, outcome=outcome), buckets=JOB_BUCKETS,
+    )
+
+
+def _cache_collector():
+    from app.utils.cache import cache_manager
+    names = {"local_hits": "local_hit", "redis_hits": "redis_hit", "misses": "miss"}
+    for prefix, counters in list(cache_manager.stats.items()):
+        for field, result in names.items():
+            yield "counter", "bf1_cache_lookups_total", _labels(prefix=prefix, result=result), counters[field]
+
+
+def _websocket_collector():
+    from app.services.websocket_service import websocket_manager
+    yield "gauge", "bf1_websocket_connections", _labels(kind="all"), len(websocket_manager.active_connections)
+    yield "gauge", "bf1_websocket_connections", _labels(kind="livestream"), websocket_manager.get_livestream_viewer_count()
+
+
+def _engagement_collector():
+    from app.utils.engagement import engagement_buffer
+    stats = engagement_buffer.stats
+    yield "counter", "bf1_engagement_events_total", (), stats["events"]
+    yield "counter", "bf1_engagement_flushes_total", (), stats["flushes"]
+    yield "counter", "bf1_engagement_documents_written_total", (), stats["documents_written"]
+    yield "counter", "bf1_engagement_flush_errors_total", (), stats["errors"]
+    yield "gauge", "bf1_engagement_pending_counters", (), engagement_buffer.pending_count()
+
+
+registry.register_collector(_cache_collector)
+registry.register_collector(_websocket_collector)
+registry.register_collector(_engagement_collector)
+
+
+# ======================
+# Cycle de vie
+# ======================
+_flusher: Optional[asyncio.Task] = None
+
+
+async def _flush_loop():
+    while True:
+        await asyncio.sleep(METRICS_FLUSH_INTERVAL)
+        try:
+            snapshot = registry.snapshot()
+            await asyncio.to_thread(write_snapshot, snapshot)
+        except Exception as e:
+            print(f"⚠️ Écriture des métriques impossible: {e}")
+
+
+def start_metrics():
+    global _flusher
+    _flusher = asyncio.create_task(_flush_loop())
+
+
+def stop_metrics():
+    if _flusher:
+        _flusher.cancel()
+    try:
+        # Dernier instantané : les compteurs du worker survivent à son arrêt
+        write_snapshot(registry.snapshot())
+    except Exception:
+        pass
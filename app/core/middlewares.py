@@ -1,22 +1,59 @@
-
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
 from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import logging
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-	async def dispatch(self, request: Request, call_next):
-		logging.info(f"{request.method} {request.url}")
-		response = await call_next(request)
-		return response
+from app.core.error_resilience import internal_error_response
+
+SECURITY_HEADERS = {
+	'X-Content-Type-Options': 'nosniff',
+	'X-Frame-Options': 'DENY',
+	'X-XSS-Protection': '1; mode=block',
+}
+
+_root_logger = logging.getLogger()
+
+
+class CoreMiddleware:
+	"""
+	Middleware ASGI unique regroupant journalisation des requêtes, en-têtes
+	de sécurité et résilience aux erreurs non gérées (anciennement
+	LoggingMiddleware, SecurityHeadersMiddleware et resilience_middleware).
+	Contrairement à BaseHTTPMiddleware, il ne crée ni tâche ni flux
+	intermédiaire et laisse passer les réponses en streaming telles quelles.
+	"""
+
+	def __init__(self, app: ASGIApp):
+		self.app = app
+
+	async def __call__(self, scope: Scope, receive: Receive, send: Send):
+		if scope["type"] != "http":
+			return await self.app(scope, receive, send)
+
+		if _root_logger.isEnabledFor(logging.INFO):
+			logging.info(f"{scope['method']} {Request(scope).url}")
+
+		response_started = False
+
+		async def send_with_headers(message: Message):
+			nonlocal response_started
+			if message["type"] == "http.response.start":
+				response_started = True
+				headers = MutableHeaders(scope=message)
+				for name, value in SECURITY_HEADERS.items():
+					headers[name] = value
+			await send(message)
+
+		try:
+			await self.app(scope, receive, send_with_headers)
+		except Exception as e:
+			# Réponse déjà partiellement envoyée : impossible de la remplacer
+			if response_started:
+				raise
+			response = internal_error_response(Request(scope), e)
+			await response(scope, receive, send)
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-	async def dispatch(self, request: Request, call_next):
-		response = await call_next(request)
-		response.headers['X-Content-Type-Options'] = 'nosniff'
-		response.headers['X-Frame-Options'] = 'DENY'
-		response.headers['X-XSS-Protection'] = '1; mode=block'
-		return response
 
 def setup_middlewares(app):
-	app.add_middleware(LoggingMiddleware)
-	app.add_middleware(SecurityHeadersMiddleware)
+	# À appeler en dernier : CoreMiddleware doit envelopper toute la pile
+	app.add_middleware(CoreMiddleware)
@@ -0,0 +1,121 @@
+"""
+Migrations de données versionnées, exécutées une seule fois.
+
+Les versions appliquées sont enregistrées dans la collection `_migrations`.
+Au démarrage d'un worker, une seule requête compare ces versions à celles
+déclarées dans app/migrations ; s'il n'y a rien à appliquer, rien d'autre
+n'est fait. Chaque migration en attente est protégée par un bail MongoDB :
+un seul process l'exécute, les autres workers démarrent sans l'attendre.
+
+Déclarer une migration (app/migrations/mXXXX_nom.py) :
+
+    @migration("0002_mon_changement", "Description courte")
+    async def run(db):
+        ...
+"""
+
+import time
+import traceback
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, NamedTuple
+
+from app.config import get_database
+from app.core.lease import MongoLease, PROCESS_ID
+
+MIGRATIONS_COLLECTION = "_migrations"
+# Bail renouvelé en continu pendant l'exécution ; repris si le process meurt
+MIGRATION_LEASE_TTL = 120
+
+
+class Migration(NamedTuple):
+    version: str
+    description: str
+    run: Callable[..., Awaitable[None]]
+
+
+_registry: Dict[str, Migration] = {}
+
+
+def migration(version: str, description: str):
+    def decorator(func):
+        if version in _registry:
+            raise ValueError(f"Migration {version} déclarée deux fois")
+        _registry[version] = Migration(version, description, func)
+        return func
+    return decorator
+
+
+def registered_migrations() -> List[Migration]:
+    import app.migrations  # noqa: F401  (enregistre les migrations)
+    return [_registry[v] for v in sorted(_registry)]
+
+
+async def _apply(m: Migration, collection) -> bool:
+    lease = MongoLease(f"migration:{m.version}", ttl=MIGRATION_LEASE_TTL)
+    if not await lease.acquire():
+        print(f"⏭️  [Migration] {m.version} en cours dans un autre process")
+        return False
+
+    try:
+        # Relecture sous le bail : un autre process a pu la terminer entre-temps
+        done = await collection.find_one({"_id": m.version, "status": "applied"}, {"_id": 1})
+        if done:
+            return True
+
+        lease.start_keep_alive()
+        print(f"🔧 [Migration] {m.version} — {m.description}")
+        started_at = datetime.utcnow()
+        t0 = time.perf_counter()
+        try:
+            await m.run(get_database())
+        except Exception as e:
+            await collection.update_one(
+                {"_id": m.version},
+                {"$set": {"status": "failed", "error": str(e), "failed_at": datetime.utcnow(), "owner": PROCESS_ID}},
+                upsert=True,
+            )
+            print(f"❌ [Migration] {m.version} en échec: {e}")
+            traceback.print_exc()
+            return False
+
+        duration = round(time.perf_counter() - t0, 3)
+        await collection.update_one(
+            {"_id": m.version},
+            {
+                "$set": {
+                    "status": "applied",
+                    "description": m.description,
+                    "started_at": started_at,
+                    "applied_at": datetime.utcnow(),
+                    "duration_seconds": duration,
+                    "owner": PROCESS_ID,
+                },
+                "$unset": {"error": "", "failed_at": ""},
+            },
+            upsert=True,
+        )
+        print(f"✅ [Migration] {m.version} appliquée en {duration}s")
+        return True
+    finally:
+        await lease.release()
+
+
+async def run_migrations():
+    """Applique les migrations en attente ; ne coûte qu'une requête quand tout est à jour."""
+    migrations = registered_migrations()
+    collection = get_database()[MIGRATIONS_COLLECTION]
+    try:
+        applied = {
+            doc["_id"]
+            async for doc in collection.find({"status": "applied"}, {"_id": 1})
+        }
+    except Exception as e:
+        print(f"⚠️ [Migration] Lecture de {MIGRATIONS_COLLECTION} impossible: {e}")
+        return
+
+    for m in migrations:
+        if m.version in applied:
+            continue
+        # Ordre strict : une migration non appliquée bloque les suivantes
+        if not await _apply(m, collection):
+            break
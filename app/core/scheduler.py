@@ -1,293 +1,288 @@
 """
 Gestionnaire de tâches planifiées (CRON).
 Désactive automatiquement les abonnements expirés en fonction de leur durée.
+
+Le scheduler démarre en pause dans chaque worker ; seul le leader élu
+(bail MongoDB, voir app/core/leader.py) le reprend, les tâches tournent donc
+une seule fois par cluster. Chaque exécution prend en plus un verrou par tâche
+(pas de chevauchement, même pendant un failover) et laisse une trace dans
+la collection `_job_runs` : statut, durée, process, résultat.
 """
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from datetime import datetime
 import asyncio
+import os
+import time
+import traceback
+import uuid
+
+from app.config import get_database
+from app.core.lease import MongoLease, PROCESS_ID
+from app.core.leader import LeaderElector
+from app.core.metrics import observe_job
 
 
 scheduler = AsyncIOScheduler()
 
+# Election : désactivable pour un process unique (dev, scripts)
+SCHEDULER_LEADER_ELECTION = os.getenv("SCHEDULER_LEADER_ELECTION", "true").lower() == "true"
+SCHEDULER_LEASE_TTL = int(os.getenv("SCHEDULER_LEASE_TTL", "30"))
+# Verrou d'une exécution, renouvelé tant qu'elle tourne
+JOB_LOCK_TTL = int(os.getenv("SCHEDULER_JOB_LOCK_TTL", "120"))
+# Historique des exécutions conservé N jours (index TTL)
+JOB_HISTORY_DAYS = int(os.getenv("SCHEDULER_HISTORY_DAYS", "30"))
 
-async def deactivate_expired_subscriptions_job():
-    """
-    Tâche planifiée : désactive tous les abonnements expirés.
-    Vérifie chaque abonnement et compare end_date avec la date actuelle.
-    La end_date est calculée automatiquement lors de la création de l'abonnement
-    en fonction du plan choisi (1 mois, 3 mois, 1 an, etc.).
-    """
+JOB_RUNS_COLLECTION = "_job_runs"
+
+_elector = None
+
+
+async def _record_run(run: dict):
     try:
-        from app.services.subscription_service import deactivate_expired_subscriptions
-        
-        print(f"\n⏰ [CRON {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Vérification des abonnements expirés...")
-        
-        count = await deactivate_expired_subscriptions()
-        
-        if count > 0:
-            print(f"✅ {count} abonnement(s) expiré(s) désactivé(s)")
-        else:
-            print(f"✅ Aucun abonnement expiré trouvé")
-            
+        await get_database()[JOB_RUNS_COLLECTION].insert_one(run)
     except Exception as e:
-        print(f"❌ Erreur lors de la désactivation des abonnements expirés: {e}")
+        print(f"⚠️ [CRON] Historique de {run.get('job')} non enregistré: {e}")
 
 
-async def sync_user_categories_job():
+async def _run_job(job_key: str, func):
     """
-    Tâche planifiée : synchronise les catégories d'abonnement des utilisateurs.
-    Traite les users par batch de 100 pour éviter de charger toute la collection en mémoire.
+    Exécute une tâche sous verrou `job:<job_key>` et enregistre l'exécution.
+    Les variantes d'une même tâche (CRON, démarrage) partagent le même job_key.
     """
+    # Propriétaire unique par exécution : le verrou n'est pas réentrant, même dans ce process
+    run_owner = f"{PROCESS_ID}:{uuid.uuid4().hex[:6]}"
+    lock = MongoLease(f"job:{job_key}", ttl=JOB_LOCK_TTL, owner=run_owner)
+    started_at = datetime.utcnow()
     try:
-        from app.models.user import User
-        from app.models.subscription import Subscription
-        from app.utils.subscription_utils import get_highest_active_category
+        acquired = await lock.acquire()
+    except Exception as e:
+        print(f"❌ [CRON] Verrou {job_key} indisponible, exécution annulée: {e}")
+        observe_job(job_key, 0.0, "skipped")
+        return
+
+    if not acquired:
+        holder = (await lock.holder()) or {}
+        print(f"⏭️  [CRON] {job_key} déjà en cours ({holder.get('owner')}), exécution ignorée")
+        observe_job(job_key, 0.0, "skipped")
+        await _record_run({
+            "job": job_key, "status": "skipped", "reason": "overlap",
+            "owner": run_owner, "holder": holder.get("owner"),
+            "started_at": started_at, "finished_at": started_at, "duration_seconds": 0.0,
+        })
+        return
+
+    lock.start_keep_alive()
+    t0 = time.perf_counter()
+    run = {"job": job_key, "owner": run_owner, "started_at": started_at}
+    try:
+        result = await func()
+        run["status"] = "ok"
+        if isinstance(result, (int, float, dict)):
+            run["result"] = result
+    except Exception as e:
+        run["status"] = "error"
+        run["error"] = str(e)
+        print(f"❌ [CRON] Erreur dans {job_key}: {e}")
+        traceback.print_exc()
+    finally:
+        await lock.release()
 
-        print(f"\n🔄 [CRON {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Synchronisation des catégories d'abonnement...")
+    duration = time.perf_counter() - t0
+    run["finished_at"] = datetime.utcnow()
+    run["duration_seconds"] = round(duration, 3)
+    observe_job(job_key, duration, run["status"])
+    await _record_run(run)
 
-        BATCH_SIZE = 100
-        skip = 0
-        updated_count = 0
 
-        while True:
-            users = await User.find().skip(skip).limit(BATCH_SIZE).to_list()
-            if not users:
-                break
+async def _ensure_job_runs_indexes():
+    collection = get_database()[JOB_RUNS_COLLECTION]
+    await collection.create_index([("job", 1), ("started_at", -1)])
+    await collection.create_index("started_at", expireAfterSeconds=JOB_HISTORY_DAYS * 86400)
+
+
+async def deactivate_expired_subscriptions_job():
+    """
+    Tâche planifiée : désactive tous les abonnements expirés.
+    Vérifie chaque abonnement et compare end_date avec la date actuelle.
+    La end_date est calculée automatiquement lors de la création de l'abonnement
+    en fonction du plan choisi (1 mois, 3 mois, 1 an, etc.).
+    """
+    from app.services.subscription_service import deactivate_expired_subscriptions
+
+    print(f"\n⏰ [CRON {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Vérification des abonnements expirés...")
 
-            user_ids = [str(u.id) for u in users]
+    report = await deactivate_expired_subscriptions()
 
-            # Charger tous les abonnements actifs de ce batch en une seule requête
-            active_subs = await Subscription.find(
-                {"user_id": {"$in": user_ids}, "is_active": True}
-            ).to_list()
+    if report["deactivated"] > 0:
+        print(f"✅ {report['deactivated']} abonnement(s) expiré(s) désactivé(s)")
+    else:
+        print(f"✅ Aucun abonnement expiré trouvé")
+    return report
 
-            subs_by_user: dict = {}
-            for sub in active_subs:
-                subs_by_user.setdefault(sub.user_id, []).append(sub)
 
-            for user in users:
-                uid = str(user.id)
-                user_subs = subs_by_user.get(uid, [])
-                categories = [s.category for s in user_subs if s.category]
-                new_category = get_highest_active_category(categories) if categories else None
-                new_premium = new_category is not None
+async def sync_user_categories_job():
+    """
+    Tâche planifiée : synchronise les catégories d'abonnement des utilisateurs.
+    Parcours keyset des users fusionné avec une agrégation unique des abonnements,
+    écritures par bulk_write (voir subscription_service.sync_all_user_categories).
+    """
+    from app.services.subscription_service import sync_all_user_categories
 
-                if user.subscription_category != new_category or user.is_premium != new_premium:
-                    await User.find_one(User.id == user.id).update(
-                        {"$set": {"subscription_category": new_category, "is_premium": new_premium}}
-                    )
-                    updated_count += 1
+    print(f"\n🔄 [CRON {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Synchronisation des catégories d'abonnement...")
 
-            skip += BATCH_SIZE
-            await asyncio.sleep(0)  # Yield event loop entre batches
+    return await sync_all_user_categories()
 
-        print(f"✅ {updated_count} utilisateur(s) synchronisé(s)")
 
-    except Exception as e:
-        print(f"❌ Erreur lors de la synchronisation des catégories: {e}")
+async def roll_reel_trending_window_job():
+    """Fait glisser la fenêtre trending 48h des reels (buckets horaires expirés)."""
+    from app.services.reel_service import roll_trending_window
+    return await roll_trending_window()
 
 
-async def reset_reel_recent_metrics_job():
-    """Remet à zéro les métriques récentes des reels pour la fenêtre trending 48h."""
-    try:
-        from app.services.reel_service import reset_recent_metrics
-        await reset_recent_metrics()
-    except Exception as e:
-        print(f"❌ Erreur reset_reel_recent_metrics_job: {e}")
+async def reconcile_engagement_counters_job():
+    """
+    Tâche planifiée : recalcule likes / comments / shares depuis leurs collections
+    et corrige en bulk les compteurs dénormalisés qui ont dérivé.
+    """
+    from app.utils.engagement import reconcile_counters
+    return await reconcile_counters()
 
 
 async def send_program_reminders_job():
     """
     Tache planifiee : envoie les rappels de programmes dus dans la prochaine minute.
-    Utilise une mise a jour atomique pour eviter les doublons entre workers gunicorn.
+    Réservation par lot avec jeton, un multicast FCM par programme
+    (voir program_service.dispatch_due_reminders).
     """
-    # Eviter l'execution sur plusieurs workers : seul le worker principal (pid le plus bas) execute
-    import os
-    worker_pid = os.getpid()
-
+    from app.services.program_service import dispatch_due_reminders
+    return await dispatch_due_reminders()
+
+
+# Tâches récurrentes : (job_key, fonction, déclencheur, libellé)
+RECURRING_JOBS = [
+    # PRODUCTION : Toutes les heures à la minute 0
+    ("deactivate_expired_subscriptions", deactivate_expired_subscriptions_job,
+     CronTrigger(hour='*', minute=0), 'Désactiver les abonnements expirés'),
+    # Toutes les 6 heures à la minute 30
+    ("sync_user_categories", sync_user_categories_job,
+     CronTrigger(hour='*/6', minute=30), 'Synchroniser les catégories d\'abonnement'),
+    # Toutes les minutes
+    ("send_program_reminders", send_program_reminders_job,
+     IntervalTrigger(minutes=1), 'Envoyer les rappels de programmes'),
+    # Toutes les heures à la minute 1 (fenêtre glissante trending)
+    ("roll_reel_trending_window", roll_reel_trending_window_job,
+     CronTrigger(hour='*', minute=1), 'Glissement de la fenêtre trending des reels'),
+    # Tous les jours à 4h15 (heure creuse)
+    ("reconcile_engagement_counters", reconcile_engagement_counters_job,
+     CronTrigger(hour=4, minute=15), 'Réconcilier les compteurs d\'engagement'),
+]
+
+# Exécutées immédiatement à chaque prise de leadership (démarrage ou failover)
+STARTUP_JOBS = ["deactivate_expired_subscriptions", "sync_user_categories"]
+
+
+async def _on_elected():
     try:
-        from app.models.program import ProgramReminder
-        from app.models.user import User
-        from app.services.push_notification_service import push_notification_service
-        import firebase_admin
-        from firebase_admin import messaging as fcm_messaging
-        from datetime import timedelta
-        from beanie.operators import Set as BSet
-
-        now = datetime.utcnow()
-        window_end = now + timedelta(minutes=1)
-
-        # Recuperer les IDs eligibles
-        candidates = await ProgramReminder.find({
-            "status": "scheduled",
-            "scheduled_for": {"$gte": now, "$lte": window_end}
-        }).to_list()
-
-        if not candidates:
-            return
-
-        # Marquer atomiquement chaque rappel via findOneAndUpdate
-        # Seul le worker qui reussit le update (status: scheduled -> sending) traite le rappel
-        from motor.motor_asyncio import AsyncIOMotorClient
-        collection = ProgramReminder.get_motor_collection()
-
-        reminders = []
-        for candidate in candidates:
-            result = await collection.find_one_and_update(
-                {"_id": candidate.id, "status": "scheduled"},
-                {"$set": {"status": "sending"}},
-                return_document=True
-            )
-            if result:
-                reminders.append(await ProgramReminder.get(candidate.id))
-
-        if not reminders:
-            return  # Un autre worker a deja tout pris
-
-            print(f"[CRON][pid:{worker_pid}] Envoi rappel pour '{updated.program_title}'")
-
-            try:
-                user = await User.get(updated.user_id)
-                title = f"Rappel : {updated.program_title or 'Programme'}"
-                body  = f"Commence dans {updated.minutes_before} min sur {updated.channel_name or 'BF1 TV'}"
-
-                fcm_sent = False
-
-                # Envoi FCM si l'utilisateur a des tokens
-                if user and getattr(user, 'fcm_tokens', None) and firebase_admin._apps:
-                    tokens = [t for t in user.fcm_tokens if t]
-                    if tokens:
-                        msg = fcm_messaging.MulticastMessage(
-                            notification=fcm_messaging.Notification(title=title, body=body),
-                            data={
-                                "type":       "program_reminder",
-                                "program_id": str(updated.program_id),
-                                "title":      updated.program_title or '',
-                            },
-                            tokens=tokens,
-                            webpush=fcm_messaging.WebpushConfig(
-                                notification=fcm_messaging.WebpushNotification(icon='/logo.png')
-                            ),
-                        )
-                        response = fcm_messaging.send_each_for_multicast(msg)
-                        fcm_sent = response.success_count > 0
-                        print(f"[CRON] FCM: {response.success_count}/{len(tokens)} tokens OK")
-                else:
-                    print(f"[CRON] Pas de token FCM pour user {updated.user_id} — WebSocket seulement")
-
-                # Envoi WebSocket (onglet ouvert)
-                await push_notification_service._broadcast_notification({
-                    "title": title,
-                    "body":  body,
-                    "data":  {
-                        "type":       "program_reminder",
-                        "program_id": str(updated.program_id),
-                        "title":      updated.program_title or '',
-                    }
-                })
-
-                updated.status = "sent"
-                updated.sent_at = now
-                await updated.save()
-                print(f"[OK] Rappel envoye (FCM:{fcm_sent}) pour '{updated.program_title}'")
-
-            except Exception as e:
-                updated.status = "failed"
-                await updated.save()
-                print(f"[ERREUR] Rappel {updated.id}: {e}")
-
+        await _ensure_job_runs_indexes()
     except Exception as e:
-        print(f"[ERREUR] Job rappels programmes: {e}")
+        print(f"⚠️ [CRON] Index {JOB_RUNS_COLLECTION} non créés: {e}")
+
+    jobs = {key: (func, label) for key, func, _, label in RECURRING_JOBS}
+    for key in STARTUP_JOBS:
+        func, label = jobs[key]
+        scheduler.add_job(
+            _run_job,
+            'date',
+            run_date=datetime.now(),
+            args=[key, func],
+            id=f'{key}_startup',
+            name=f'{label} (démarrage)',
+            replace_existing=True,
+        )
+    scheduler.resume()
+    print("▶️  [CRON] Scheduler actif sur ce worker (leader)")
+
+
+async def _on_demoted():
+    # Les exécutions en cours se terminent sous leur verrou ; plus rien de nouveau ici
+    scheduler.pause()
+    print("⏸️  [CRON] Scheduler en pause sur ce worker (follower)")
 
 
 def start_scheduler():
     """
-    Démarre le scheduler avec toutes les tâches planifiées.
-    
+    Démarre le scheduler (en pause) et l'élection du leader.
+
     Tâches configurées:
     - Désactivation des abonnements expirés : toutes les heures
     - Synchronisation des catégories : toutes les 6 heures
-    
+
     Pour tester en dev : changer la fréquence à 'interval' avec minutes=1
     """
-    # PRODUCTION : Toutes les heures
-    scheduler.add_job(
-        deactivate_expired_subscriptions_job,
-        CronTrigger(hour='*', minute=0),  # Toutes les heures à la minute 0
-        id='deactivate_expired_subscriptions',
-        name='Désactiver les abonnements expirés',
-        replace_existing=True
-    )
-    
-    # Synchronisation des catégories : toutes les 6 heures
-    scheduler.add_job(
-        sync_user_categories_job,
-        CronTrigger(hour='*/6', minute=30),  # Toutes les 6 heures à la minute 30
-        id='sync_user_categories',
-        name='Synchroniser les catégories d\'abonnement',
-        replace_existing=True
-    )
-    
+    global _elector
+
+    for key, func, trigger, label in RECURRING_JOBS:
+        scheduler.add_job(
+            _run_job,
+            trigger,
+            args=[key, func],
+            id=key,
+            name=label,
+            replace_existing=True,
+            coalesce=True,
+            max_instances=1,
+        )
+
     # DÉVELOPPEMENT : Décommenter pour tester toutes les minutes
     # scheduler.add_job(
-    #     deactivate_expired_subscriptions_job,
+    #     _run_job,
     #     'interval',
     #     minutes=1,  # Exécute toutes les 1 minute pour tester
+    #     args=["deactivate_expired_subscriptions", deactivate_expired_subscriptions_job],
     #     id='deactivate_expired_subscriptions_dev',
     #     name='Désactiver les abonnements expirés (DEV)',
     #     replace_existing=True
     # )
-    
-    # Optionnel : Exécuter immédiatement au démarrage
-    scheduler.add_job(
-        deactivate_expired_subscriptions_job,
-        'date',
-        run_date=datetime.now(),
-        id='deactivate_expired_subscriptions_startup',
-        name='Désactivation des abonnements expirés (démarrage)'
-    )
-    
-    # Synchronisation immédiate au démarrage
-    scheduler.add_job(
-        sync_user_categories_job,
-        'date',
-        run_date=datetime.now(),
-        id='sync_user_categories_startup',
-        name='Synchronisation des catégories (démarrage)'
-    )
-    
-    # Rappels de programmes : toutes les minutes
-    scheduler.add_job(
-        send_program_reminders_job,
-        'interval',
-        minutes=1,
-        id='send_program_reminders',
-        name='Envoyer les rappels de programmes',
-        replace_existing=True
-    )
-
-    # Reset métriques récentes des reels : toutes les 48h (fenêtre glissante trending)
-    scheduler.add_job(
-        reset_reel_recent_metrics_job,
-        CronTrigger(hour=3, minute=0),   # Toutes les nuits à 3h
-        id='reset_reel_recent_metrics',
-        name='Reset métriques récentes des reels',
-        replace_existing=True
-    )
-
-    scheduler.start()
+
+    # Aucun déclenchement tant que ce worker n'est pas leader
+    scheduler.start(paused=True)
     print("✅ Scheduler démarré - Tâches planifiées:")
     print("   📅 Désactivation abonnements expirés: Toutes les heures")
     print("   🔄 Synchronisation catégories: Toutes les 6 heures")
     print("   🔔 Rappels de programmes: Toutes les minutes")
-    print("   📊 Reset métriques trending reels: Toutes les nuits à 3h")
-    print("   🚀 Première exécution: Immédiatement au démarrage")
-
-
-def stop_scheduler():
-    """Arrête le scheduler proprement."""
+    print("   📊 Fenêtre trending reels (48h glissantes): Toutes les heures")
+    print("   🧮 Réconciliation des compteurs d'engagement: Tous les jours à 4h15")
+    print("   🚀 Première exécution: Immédiatement à la prise de leadership")
+
+    if SCHEDULER_LEADER_ELECTION:
+        _elector = LeaderElector("scheduler", SCHEDULER_LEASE_TTL, _on_elected, _on_demoted)
+        _elector.start()
+    else:
+        asyncio.get_running_loop().create_task(_on_elected())
+
+
+def scheduler_status() -> dict:
+    """Etat du scheduler vu depuis ce worker."""
+    return {
+        "process": PROCESS_ID,
+        "leader_election": SCHEDULER_LEADER_ELECTION,
+        "is_leader": _elector.is_leader if _elector else not SCHEDULER_LEADER_ELECTION,
+        "jobs": [
+            {"id": job.id, "name": job.name, "next_run_time": job.next_run_time}
+            for job in scheduler.get_jobs()
+        ],
+    }
+
+
+async def stop_scheduler():
+    """Arrête le scheduler proprement et libère le leadership."""
+    global _elector
+    if _elector:
+        await _elector.stop()
+        _elector = None
     if scheduler.running:
-        scheduler.shutdown()
+        scheduler.shutdown(wait=False)
         print("✅ Scheduler arrêté")
@@ -5,7 +5,8 @@ from contextlib import asynccontextmanager
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, Depends
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.staticfiles import StaticFiles
@@ -15,74 +16,27 @@ from app.config.settings import settings
 from app.core.cors import setup_cors
 from app.core.error_handlers import setup_error_handlers
 from app.core.middlewares import setup_middlewares
-from app.core.error_resilience import resilience_middleware
+from app.core.db_instrumentation import DB_INSTRUMENTATION_ENABLED, DbInstrumentationMiddleware
+from app.core.metrics import MetricsMiddleware, render_all_workers, start_metrics, stop_metrics
 from app.utils.cache import cache_manager
-# RateLimitMiddleware retiré pour accepter toutes les requêtes
-# from app.utils.rate_limiter import RateLimitMiddleware
+from app.utils.engagement import engagement_buffer
+from app.services.search_engine import search_engine
+from app.services.reel_feed import reel_feed
+from app.utils.security import shutdown_hash_executor
+from app.utils.auth import get_admin_user
+from app.utils.rate_limiter import RateLimitMiddleware
 
 from app.api import (
     movies, users, favorites, breakingNews, notifications, subscriptions, payments, premium,
     contact, comments, likes, messages, jtandmag, reel, reportage, divertissement, shares,
     programs, stats, user_settings, support, about, archives, liveStream, upload, views, username_generator,
     websocket, subscription_plans, emission_categories, search, series, carousel,
-    tele_realite, section_categories, missed, live_highlight
+    tele_realite, section_categories, missed, live_highlight, engagement
 )
 from app.api import sport
 from app.api import magazine
 from app.core.scheduler import start_scheduler, stop_scheduler
-
-
-async def _migrate_likes_field():
-    """Initialise likes=0 pour les docs sans ce champ, puis resynchronise depuis la collection likes."""
-    from app.models.breakingNews import BreakingNews
-    from app.models.divertissement import Divertissement
-    from app.models.reportage import Reportage
-    from app.models.jtandmag import JTandMag
-    from app.models.archive import Archive
-    from app.models.movie import Movie
-    from app.models.tele_realite import TeleRealite
-    from app.models.like import Like
-
-    # Etape 1 : initialiser le champ manquant
-    model_type_map = {
-        "breaking_news": BreakingNews,
-        "divertissement": Divertissement,
-        "reportage": Reportage,
-        "jtandmag": JTandMag,
-        "archive": Archive,
-        "movie": Movie,
-        "tele_realite": TeleRealite,
-        "event": TeleRealite,
-    }
-    for Model in model_type_map.values():
-        try:
-            col = Model.get_motor_collection()
-            await col.update_many({"likes": {"$exists": False}}, {"$set": {"likes": 0}})
-        except Exception as e:
-            print(f"[Migration] Erreur init {Model.__name__}: {e}")
-
-    # Etape 2 : recalculer le vrai compteur depuis la collection likes
-    try:
-        pipeline = [
-            {"$group": {"_id": {"content_id": "$content_id", "content_type": "$content_type"}, "count": {"$sum": 1}}}
-        ]
-        like_col = Like.get_motor_collection()
-        async for row in like_col.aggregate(pipeline):
-            ctype = row["_id"]["content_type"]
-            cid   = row["_id"]["content_id"]
-            count = row["count"]
-            Model = model_type_map.get(ctype)
-            if not Model:
-                continue
-            try:
-                from bson import ObjectId
-                col = Model.get_motor_collection()
-                await col.update_one({"_id": ObjectId(cid)}, {"$set": {"likes": count}})
-            except Exception:
-                pass
-        print("[Migration] Likes resynchronises depuis la collection likes")
-    except Exception as e:
-        print(f"[Migration] Erreur resync likes: {e}")
+from app.core.migrations import run_migrations
 
 
 @asynccontextmanager
@@ -92,20 +46,38 @@ async def lifespan(app: FastAPI):
     await cache_manager.connect()
     
     # Initialiser Firebase Admin SDK
-    from app.services.push_notification_service import _init_firebase
+    from app.services.push_notification_service import _init_firebase, shutdown_fcm_executor
     _init_firebase()
 
-    # Migration: initialiser likes=0 pour les documents qui n'ont pas ce champ
-    await _migrate_likes_field()
+    # Migrations de données versionnées (une seule fois, sous bail MongoDB)
+    await run_migrations()
 
     # Démarrer le scheduler CRON pour les tâches automatiques
     start_scheduler()
+
+    # Instantanés périodiques des métriques du worker (agrégées par /metrics)
+    start_metrics()
+
+    # Compteurs d'engagement en write-behind (flush groupé par collection)
+    engagement_buffer.start()
+
+    # Index de recherche en mémoire (instantané disque ou construction en tâche de fond)
+    search_engine.start()
+
+    # Classement des reels matérialisé (GET /reels sans scoring par requête)
+    reel_feed.start()
     
     yield
     
     # Cleanups
-    stop_scheduler()
+    await reel_feed.stop()
+    await search_engine.stop()
+    await engagement_buffer.stop()
+    stop_metrics()
+    await stop_scheduler()
     await cache_manager.disconnect()
+    shutdown_hash_executor()
+    shutdown_fcm_executor()
 
 app = FastAPI(
     title="BF1 TV API",
@@ -119,15 +91,22 @@ app = FastAPI(
 )
 
 # Middlewares
-# RateLimitMiddleware désactivé pour accepter toutes les requêtes
-# app.add_middleware(RateLimitMiddleware, requests_per_minute=settings.RATE_LIMIT_PER_MINUTE)
+# Token bucket Redis (repli mémoire), placé sous CORS pour que les 429 restent lisibles
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
 app.add_middleware(GZipMiddleware, minimum_size=1000)
 setup_cors(app)
 setup_error_handlers(app)
-setup_middlewares(app)
 
-# Middleware de résilience - empêche le serveur de planter
-app.middleware("http")(resilience_middleware)
+# Commandes MongoDB par requête : en-tête Server-Timing et alertes N+1
+if DB_INSTRUMENTATION_ENABLED:
+    app.add_middleware(DbInstrumentationMiddleware)
+
+# Latence, statuts et requêtes en cours par route (exposés sur /metrics)
+app.add_middleware(MetricsMiddleware)
+
+# Journalisation, en-têtes de sécurité et résilience (empêche le serveur de planter)
+setup_middlewares(app)
 
 # Router principal API v1
 api_v1_router = APIRouter(prefix="/api/v1")
@@ -167,6 +146,7 @@ api_v1_router.include_router(likes.router, prefix="/likes", tags=["Likes"])
 api_v1_router.include_router(comments.router, prefix="/comments", tags=["Comments"])
 api_v1_router.include_router(shares.router, prefix="/shares", tags=["Shares"])
 api_v1_router.include_router(views.router, prefix="/views", tags=["Views"])
+api_v1_router.include_router(engagement.router, prefix="/engagement", tags=["Engagement"])
 api_v1_router.include_router(notifications.router, prefix="/notifications", tags=["Notifications"])
 api_v1_router.include_router(messages.router, prefix="/messages", tags=["Messages"])
 
@@ -226,6 +206,11 @@ async def health_check():
         "cache_enabled": settings.REDIS_ENABLED
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics(current_user=Depends(get_admin_user)):
+    """Métriques Prometheus agrégées sur tous les workers (admin seulement)"""
+    return PlainTextResponse(await render_all_workers(), media_type="text/plain; version=0.0.4")
+
 @app.get("/api", tags=["API Info"])
 async def api_info():
     return {
@@ -0,0 +1,9 @@
+"""
+Migrations de données (voir app/core/migrations.py).
+Chaque module importé ici enregistre sa migration ; l'ordre d'exécution suit la version.
+"""
+
+from . import m0001_likes_field  # noqa: F401
+from . import m0002_reel_trend_buckets  # noqa: F401
+from . import m0003_view_logs_ttl  # noqa: F401
+from . import m0004_engagement_counters  # noqa: F401
@@ -0,0 +1,62 @@
+"""
+Initialise likes=0 sur les contenus sans ce champ, puis resynchronise le
+compteur depuis la collection likes (anciennement _migrate_likes_field,
+exécuté à chaque démarrage de worker).
+"""
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import UpdateOne
+
+from app.core.migrations import migration
+
+# Types de contenus concernés (event et tele_realite partagent une collection)
+CONTENT_TYPES = (
+    "breaking_news", "divertissement", "reportage", "jtandmag",
+    "archive", "movie", "tele_realite", "event",
+)
+
+BATCH_SIZE = 1000
+
+
+async def _flush(db, collection: str, ops: list) -> int:
+    if not ops:
+        return 0
+    result = await db[collection].bulk_write(ops, ordered=False)
+    ops.clear()
+    return result.modified_count
+
+
+@migration("0001_likes_field", "Initialiser et resynchroniser le compteur likes des contenus")
+async def run(db):
+    from app.models.like import Like
+    from app.utils.engagement import CONTENT_MODELS
+
+    # content_type → nom de collection, depuis les modèles Beanie
+    collections = {ctype: CONTENT_MODELS[ctype].get_settings().name for ctype in CONTENT_TYPES}
+
+    # Etape 1 : initialiser le champ manquant (une fois par collection)
+    for name in sorted(set(collections.values())):
+        await db[name].update_many({"likes": {"$exists": False}}, {"$set": {"likes": 0}})
+
+    # Etape 2 : recalculer le vrai compteur depuis la collection likes, par lots
+    pending = {name: [] for name in set(collections.values())}
+    modified = 0
+    pipeline = [
+        {"$group": {"_id": {"content_id": "$content_id", "content_type": "$content_type"}, "count": {"$sum": 1}}}
+    ]
+    async for row in db[Like.get_settings().name].aggregate(pipeline, allowDiskUse=True):
+        name = collections.get(row["_id"].get("content_type"))
+        if not name:
+            continue
+        try:
+            oid = ObjectId(row["_id"]["content_id"])
+        except (InvalidId, TypeError):
+            continue
+        pending[name].append(UpdateOne({"_id": oid}, {"$set": {"likes": row["count"]}}))
+        if len(pending[name]) >= BATCH_SIZE:
+            modified += await _flush(db, name, pending[name])
+
+    for name, ops in pending.items():
+        modified += await _flush(db, name, ops)
+    print(f"[Migration] Likes resynchronisés depuis la collection likes ({modified} contenus mis à jour)")
@@ -0,0 +1,31 @@
+"""
+Amorce les compteurs horaires du trending des reels : les anciennes sommes
+recent_* (remises à zéro chaque nuit) deviennent le bucket de l'heure courante
+et sortiront de la fenêtre glissante dans 48h.
+"""
+
+from app.core.migrations import migration
+
+
+@migration("0002_reel_trend_buckets", "Amorcer les buckets horaires du trending des reels")
+async def run(db):
+    from app.models.reel import Reel
+    from app.services.reel_service import _current_hour
+
+    hour = _current_hour()
+    result = await db[Reel.get_settings().name].update_many(
+        {"trend_hours": {"$exists": False}},
+        [{
+            "$set": {
+                "trend_buckets": {
+                    str(hour): {
+                        "l": {"$ifNull": ["$recent_likes", 0]},
+                        "v": {"$ifNull": ["$recent_views", 0]},
+                        "s": {"$ifNull": ["$recent_shares", 0]},
+                    }
+                },
+                "trend_hours": [hour],
+            }
+        }],
+    )
+    print(f"[Migration] Buckets trending amorcés ({result.modified_count} reels)")
@@ -0,0 +1,20 @@
+"""
+view_logs passe à une entrée par (contenu, visiteur) avec _id déterministe et
+index TTL 24h : l'ancien index composé des recherches par date ne sert plus et
+ralentissait chaque insertion. Les anciennes entrées expirent via le TTL.
+"""
+
+from app.core.migrations import migration
+
+OLD_INDEX = "content_id_1_content_type_1_identifier_1_created_at_-1"
+
+
+@migration("0003_view_logs_ttl", "Supprimer l'ancien index composé de view_logs")
+async def run(db):
+    from app.models.view_log import ViewLog
+
+    collection = db[ViewLog.get_settings().name]
+    indexes = await collection.index_information()
+    if OLD_INDEX in indexes:
+        await collection.drop_index(OLD_INDEX)
+        print(f"[Migration] Index {OLD_INDEX} supprimé")
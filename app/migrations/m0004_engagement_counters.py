@@ -0,0 +1,14 @@
+"""
+Compteurs likes / comments / shares alignés sur leurs collections sources
+avant que les lectures ne passent par les champs dénormalisés
+(m0001 ne couvrait que likes, et pas tous les types de contenus).
+"""
+
+from app.core.migrations import migration
+
+
+@migration("0004_engagement_counters", "Réconcilier likes, comments et shares de tous les contenus")
+async def run(db):
+    from app.utils.engagement import reconcile_counters
+
+    await reconcile_counters()
@@ -2,9 +2,10 @@ from beanie import Document
 from pydantic import Field
 from datetime import datetime
 from typing import Optional
+from app.models.searchable import Searchable
 
 
-class Archive(Document):
+class Archive(Searchable, Document):
     title: str = Field(..., description="Titre de l'archive")
     guest_name: Optional[str] = Field(default="Invité", description="Nom de l'invité")
     guest_role: Optional[str] = Field(default="Invité", description="Rôle ou fonction de l'invité")
@@ -2,10 +2,11 @@ from beanie import Document
 from pydantic import Field
 from datetime import datetime
 from typing import Optional
+from app.models.searchable import Searchable
 
 
 # Modèle de données pour MongoDB
-class BreakingNews(Document):
+class BreakingNews(Searchable, Document):
     title: str = Field(..., description="Titre de l'actualité")
     category: str = Field(..., description="Catégorie de l'actualité (Économie, Politique, etc.)")
     description: Optional[str] = Field(None, description="Contenu de l'actualité")
@@ -2,9 +2,10 @@ from beanie import Document
 from pydantic import Field
 from datetime import datetime
 from typing import Optional
+from app.models.searchable import Searchable
 
 
-class Divertissement(Document):
+class Divertissement(Searchable, Document):
     title: str = Field(..., description="Titre du divertissement")
     category: str = Field(..., description="Catégorie du divertissement")
     image: Optional[str] = Field(None, description="Image du divertissement")
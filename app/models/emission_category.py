@@ -2,6 +2,7 @@ from beanie import Document
 from pydantic import Field
 from datetime import datetime
 from typing import Optional
+from app.models.searchable import Searchable
 
 
 SECTION_ENDPOINT_MAP = {
@@ -15,7 +16,7 @@ SECTION_ENDPOINT_MAP = {
 }
 
 
-class EmissionCategory(Document):
+class EmissionCategory(Searchable, Document):
     name: str = Field(..., description="Nom de la catégorie d'émission")
     section: Optional[str] = Field(None, description="Section associée : magazine | jtandmag | divertissement | reportage | tele_realite | sport | flash_infos")
     filter_path: Optional[str] = Field(None, description="Chemin de filtre relatif généré automatiquement")
@@ -2,9 +2,10 @@ from beanie import Document
 from pydantic import Field
 from datetime import datetime
 from typing import Optional
+from app.models.searchable import Searchable
 
 
-class JTandMag(Document):
+class JTandMag(Searchable, Document):
     title: str = Field(..., description="Titre de l'émission")
     category: str = Field(..., description="Catégorie")
     image: Optional[str] = Field(None, description="Image de l'émission")
@@ -2,9 +2,10 @@ from beanie import Document
 from pydantic import Field
 from datetime import datetime
 from typing import Optional
+from app.models.searchable import Searchable
 
 
-class Magazine(Document):
+class Magazine(Searchable, Document):
     title: str = Field(..., description="Titre du magazine")
     category: str = Field(..., description="Catégorie")
     image: Optional[str] = Field(None, description="Image du magazine")
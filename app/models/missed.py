@@ -2,8 +2,9 @@ from beanie import Document
 from pydantic import Field
 from typing import Optional, List
 from datetime import datetime
+from app.models.searchable import Searchable
 
-class Missed(Document):
+class Missed(Searchable, Document):
     title: str = Field(..., description="Titre du contenu manqué")
     description: Optional[str] = Field(None, description="Description du contenu")
     
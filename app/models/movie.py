@@ -2,8 +2,9 @@ from beanie import Document
 from pydantic import Field
 from typing import List, Optional
 from datetime import datetime
+from app.models.searchable import Searchable
 
-class Movie(Document):
+class Movie(Searchable, Document):
     title: str = Field(..., description="Titre du film")
     description: Optional[str] = Field(None, description="Description du film")
     genre: List[str] = Field(default_factory=list, description="Genres du film")
@@ -85,10 +85,14 @@ class ProgramReminder(Document):
     reminder_type: str = Field(default="push", description="Type: push, inapp, email, sms")
     
     # Statut
-    status: str = Field(default="scheduled", description="scheduled, sent, cancelled, failed")
+    status: str = Field(default="scheduled", description="scheduled, sending, sent, cancelled, failed")
     scheduled_for: datetime = Field(..., description="Date/heure d'envoi du rappel")
     sent_at: Optional[datetime] = Field(None, description="Date/heure d'envoi effectif")
     
+    # Réservation par le job d'envoi (jeton du lot en cours)
+    claim_token: Optional[str] = Field(None, description="Jeton du lot d'envoi")
+    claimed_at: Optional[datetime] = Field(None, description="Date de réservation pour envoi")
+    
     # Données denormalisées pour affichage
     program_title: Optional[str] = Field(None, description="Titre du programme")
     program_start_time: Optional[datetime] = Field(None, description="Début du programme")
@@ -106,4 +110,5 @@ class ProgramReminder(Document):
             [("user_id", 1), ("program_id", 1)],  # Unique: un rappel par user/program
             [("user_id", 1), ("scheduled_for", 1)],
             [("status", 1), ("scheduled_for", 1)],  # Pour le job d'envoi
+            "claim_token",
         ]
@@ -1,10 +1,11 @@
 from beanie import Document
 from pydantic import Field
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict
+from app.models.searchable import Searchable
 
 
-class Reel(Document):
+class Reel(Searchable, Document):
     video_url: Optional[str] = Field(None, description="URL de la vidéo")
     title: str = Field(..., description="Titre de la vidéo")
     description: Optional[str] = Field(None, description="Description de la vidéo")
@@ -28,6 +29,9 @@ class Reel(Document):
     recent_likes: int = Field(default=0, description="Likes des dernières 48h")
     recent_views: int = Field(default=0, description="Vues des dernières 48h")
     recent_shares: int = Field(default=0, description="Partages des dernières 48h")
+    # Compteurs horaires de la fenêtre : {"<heure epoch>": {"l": likes, "v": vues, "s": partages}}
+    trend_buckets: Dict[str, Dict[str, int]] = Field(default_factory=dict, description="Compteurs par heure (48h)")
+    trend_hours: List[int] = Field(default_factory=list, description="Heures présentes dans trend_buckets")
     trending_score: float = Field(default=0.0, description="Score trending calculé")
     trending_updated_at: Optional[datetime] = Field(None, description="Dernière mise à jour trending")
 
@@ -40,4 +44,5 @@ class Reel(Document):
             "created_at",
             "trending_score",
             [("trending_score", -1), ("created_at", -1)],
+            "trend_hours",  # Expiration horaire des compteurs trending
         ]
@@ -2,9 +2,10 @@ from beanie import Document
 from pydantic import Field
 from datetime import datetime
 from typing import Optional
+from app.models.searchable import Searchable
 
 
-class Reportage(Document):
+class Reportage(Searchable, Document):
     title: str = Field(..., description="Titre du reportage")
     category: str = Field(..., description="Catégorie du reportage")
 
@@ -0,0 +1,21 @@
+from beanie import Delete, Insert, Replace, Save, SaveChanges, Update, after_event
+
+
+class Searchable:
+    """
+    Mixin des contenus indexés par le moteur de recherche en mémoire
+    (app/services/search_engine.py) : chaque écriture via l'ODM met l'index à jour.
+    À placer avant Document : class Sport(Searchable, Document).
+    """
+
+    @after_event(Insert, Replace, Save, SaveChanges, Update)
+    async def _search_index_upsert(self):
+        from app.services.search_engine import search_engine
+
+        await search_engine.on_document_changed(self)
+
+    @after_event(Delete)
+    async def _search_index_delete(self):
+        from app.services.search_engine import search_engine
+
+        await search_engine.on_document_changed(self, deleted=True)
@@ -3,8 +3,9 @@ from pydantic import Field, ConfigDict
 from typing import List, Optional
 from datetime import datetime
 from bson import ObjectId
+from app.models.searchable import Searchable
 
-class Series(Document):
+class Series(Searchable, Document):
     title: str = Field(..., description="Titre de la série")
     description: Optional[str] = Field(None, description="Description de la série")
     genre: List[str] = Field(default_factory=list, description="Genres de la série")
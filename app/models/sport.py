@@ -2,9 +2,10 @@ from beanie import Document
 from pydantic import Field
 from typing import Optional, List
 from datetime import datetime
+from app.models.searchable import Searchable
 
 
-class Sport(Document):
+class Sport(Searchable, Document):
     """
     Modèle de document pour les sports
     """
@@ -53,5 +54,6 @@ class Sport(Document):
             "is_active",
             "date",
             "views",
-            "created_at"
+            "created_at",
+            [("title", "text"), ("description", "text"), ("sport_type", "text")],
         ]
@@ -2,9 +2,10 @@ from beanie import Document
 from pydantic import Field
 from datetime import datetime
 from typing import Optional, List
+from app.models.searchable import Searchable
 
 
-class TeleRealite(Document):
+class TeleRealite(Searchable, Document):
     title: str = Field(..., description="Titre de l'émission ou de l'événement")
     category: str = Field(..., description="Catégorie : Télé-réalité, Événement, Concours, etc.")
     sub_type: str = Field(default="tele_realite", description="tele_realite | event")
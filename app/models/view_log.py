@@ -1,11 +1,16 @@
 from beanie import Document
 from pydantic import Field
+from pymongo import IndexModel
 from datetime import datetime
-from typing import Optional
 
 
 class ViewLog(Document):
-    """Log de vues pour l'anti-doublon 24h (tous types de contenus)"""
+    """
+    Log de vues pour l'anti-doublon 24h (tous types de contenus).
+    _id = "<content_type>:<content_id>:<identifier>" : une seule entrée par visiteur
+    et par contenu, purgée par l'index TTL (voir app/utils/view_dedupe.py).
+    """
+    id: str = Field(..., description="<content_type>:<content_id>:<identifier>")
     content_id: str = Field(..., description="ID du contenu")
     content_type: str = Field(..., description="Type : reel, breaking_news, etc.")
     identifier: str = Field(..., description="user_id ou IP")
@@ -14,5 +19,5 @@ class ViewLog(Document):
     class Settings:
         name = "view_logs"
         indexes = [
-            [("content_id", 1), ("content_type", 1), ("identifier", 1), ("created_at", -1)],
+            IndexModel([("created_at", 1)], expireAfterSeconds=86400, name="view_logs_ttl"),
         ]
@@ -0,0 +1,26 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+
+class EngagementItem(BaseModel):
+    content_type: str = Field(..., description="Type de contenu : 'reel', 'missed', 'breaking_news', 'livestream', etc.")
+    content_id: str = Field(..., description="ID du contenu")
+
+
+class EngagementStateRequest(BaseModel):
+    items: List[EngagementItem] = Field(..., min_length=1, max_length=100, description="Contenus affichés (100 max)")
+
+
+class EngagementState(EngagementItem):
+    exists: bool
+    liked: bool
+    favorited: bool
+    viewed: bool
+    likes: int
+    comments: int
+    shares: int
+    views: int
+
+
+class EngagementStateResponse(BaseModel):
+    items: List[EngagementState]
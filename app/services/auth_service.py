@@ -1,6 +1,6 @@
 
 from app.models.user import User
-from app.utils.security import verify_password, hash_password
+from app.utils.security import verify_password_async, login_slot
 from app.utils.jwt import create_access_token
 from typing import Optional
 
@@ -12,8 +12,14 @@ async def authenticate_user(identifier: str, password: str) -> Optional[User]:
 		(User.username == identifier) |
 		(User.phone == identifier)
 	)
-	if not user or not verify_password(password, user.hashed_password):
+	if not user:
+		return None
+	async with login_slot():
+		valid, new_hash = await verify_password_async(password, user.hashed_password)
+	if not valid:
 		return None
+	if new_hash:
+		await user.set({User.hashed_password: new_hash})
 	return user
 
 async def login_user(identifier: str, password: str) -> Optional[str]:
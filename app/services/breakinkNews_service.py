@@ -2,11 +2,15 @@ from app.models.breakingNews import BreakingNews
 from app.schemas.breakingNews import BreakingNewsCreate, BreakingNewsUpdate
 from typing import List, Optional
 from datetime import datetime
+from app.utils.cache import cache_manager
+
+CACHE_TAG = "news"
 
 
 async def create_news(data: BreakingNewsCreate) -> BreakingNews:
 	news = BreakingNews(**data.dict())
 	await news.insert()
+	await cache_manager.invalidate_tags(CACHE_TAG)
 	return news
 
 
@@ -31,6 +35,7 @@ async def update_news(news_id: str, data: BreakingNewsUpdate) -> Optional[Breaki
 
 	news.updated_at = datetime.utcnow()
 	await news.save()
+	await cache_manager.invalidate_tags(CACHE_TAG)
 	return news
 
 
@@ -40,4 +45,5 @@ async def delete_news(news_id: str) -> bool:
 	if not news:
 		return False
 	await news.delete()
+	await cache_manager.invalidate_tags(CACHE_TAG)
 	return True
\ No newline at end of file
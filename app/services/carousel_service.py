@@ -2,8 +2,11 @@ from typing import List, Optional
 from datetime import datetime
 
 from app.models.carousel import CarouselItem
+from app.utils.cache import cache_manager
 from app.schemas.carousel import CarouselItemCreate, CarouselItemUpdate
 
+CACHE_TAG = "carousel"
+
 
 async def create_carousel_item(
     data: CarouselItemCreate,
@@ -16,6 +19,7 @@ async def create_carousel_item(
         is_active=data.is_active,
     )
     await item.insert()
+    await cache_manager.invalidate_tags(CACHE_TAG)
     return item
 
 
@@ -40,6 +44,7 @@ async def update_carousel_item(
         setattr(item, field, value)
     item.updated_at = datetime.utcnow()
     await item.save()
+    await cache_manager.invalidate_tags(CACHE_TAG)
     return item
 
 
@@ -54,6 +59,7 @@ async def update_carousel_image(
     item.image_url = image_url
     item.updated_at = datetime.utcnow()
     await item.save()
+    await cache_manager.invalidate_tags(CACHE_TAG)
     return item
 
 
@@ -70,4 +76,5 @@ async def delete_carousel_item(item_id: str) -> bool:
             print(f"⚠️ Erreur suppression fichier local: {e}")
 
     await item.delete()
+    await cache_manager.invalidate_tags(CACHE_TAG)
     return True
@@ -12,7 +12,7 @@ from app.models.sport import Sport
 from app.models.tele_realite import TeleRealite
 from app.models.series import Series
 from app.models.missed import Missed
-from app.utils.engagement import increment_comment
+from app.utils.engagement import increment_comment, read_counter
 from app.schemas.comment import CommentCreate, CommentUpdate
 from typing import List, Optional
 from datetime import datetime
@@ -32,8 +32,7 @@ async def add_comment(user_id: str, data: CommentCreate) -> Optional[Comment]:
     )
     await comment.insert()
 
-    if data.content_type != "livestream":
-        await increment_comment(data.content_type, data.content_id, 1)
+    await increment_comment(data.content_type, data.content_id, 1)
 
     # Broadcast temps réel aux abonnés WS
     try:
@@ -165,8 +164,7 @@ async def delete_comment(comment_id: str, user_id: str, is_admin: bool = False)
     content_type = comment.content_type
     await comment.delete()
 
-    if content_type != "livestream":
-        await increment_comment(content_type, content_id, -1)
+    await increment_comment(content_type, content_id, -1)
 
     # Broadcast temps réel aux abonnés WS
     try:
@@ -181,7 +179,10 @@ async def delete_comment(comment_id: str, user_id: str, is_admin: bool = False)
     return True
 
 async def count_comments(content_id: str, content_type: str) -> int:
-    """Compter les commentaires d'un contenu"""
+    """Compter les commentaires d'un contenu (compteur dénormalisé)"""
+    count = await read_counter(content_type, content_id, "comments")
+    if count is not None:
+        return count
     return await Comment.find(
         Comment.content_id == content_id,
         Comment.content_type == content_type
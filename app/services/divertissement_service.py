@@ -2,11 +2,15 @@ from app.models.divertissement import Divertissement
 from app.schemas.divertissement import DivertissementCreate, DivertissementUpdate
 from typing import List, Optional
 from datetime import datetime
+from app.utils.cache import cache_manager
+
+CACHE_TAG = "divertissement"
 
 
 async def create_divertissement(data: DivertissementCreate) -> Divertissement:
 	divertissement = Divertissement(**data.dict())
 	await divertissement.insert()
+	await cache_manager.invalidate_tags(CACHE_TAG)
 	return divertissement
 
 
@@ -32,6 +36,7 @@ async def update_divertissement(divertissement_id: str, data: DivertissementUpda
 
 		divertissement.updated_at = datetime.utcnow()
 		await divertissement.save()
+		await cache_manager.invalidate_tags(CACHE_TAG)
 	return divertissement
 
 
@@ -39,5 +44,6 @@ async def delete_divertissement(divertissement_id: str) -> bool:
 	divertissement = await Divertissement.get(divertissement_id)
 	if divertissement:
 		await divertissement.delete()
+		await cache_manager.invalidate_tags(CACHE_TAG)
 		return True
 	return False
@@ -13,6 +13,7 @@ from app.models.archive import Archive
 from app.models.tele_realite import TeleRealite
 from app.models.missed import Missed
 from app.schemas.favorite import FavoriteCreate
+from app.services.engagement_service import invalidate_engagement_state
 from typing import List, Optional, Dict
 
 
@@ -57,6 +58,7 @@ async def add_favorite(user_id: str, data: FavoriteCreate) -> Optional[Dict]:
 		# Retirer le favori existant (toggle off)
 		print(f"💔 Retrait du favori existant: {existing.id}")
 		await existing.delete()
+		await invalidate_engagement_state(user_id)
 		return {
 			"success": True,
 			"action": "removed",
@@ -71,6 +73,7 @@ async def add_favorite(user_id: str, data: FavoriteCreate) -> Optional[Dict]:
 		content_type=data.content_type
 	)
 	await fav.insert()
+	await invalidate_engagement_state(user_id)
 	
 	# Envoyer une notification
 	try:
@@ -137,6 +140,7 @@ async def remove_favorite(fav_id: str, user_id: str) -> bool:
 	if not fav or fav.user_id != user_id:
 		return False
 	await fav.delete()
+	await invalidate_engagement_state(user_id)
 	return True
 
 async def remove_favorite_by_content(user_id: str, content_id: str, content_type: str) -> bool:
@@ -151,6 +155,7 @@ async def remove_favorite_by_content(user_id: str, content_id: str, content_type
 		return False
 	
 	await fav.delete()
+	await invalidate_engagement_state(user_id)
 	return True
 
 async def get_all_favorites(skip: int = 0, limit: int = 1000) -> List[Dict]:
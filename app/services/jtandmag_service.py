@@ -2,11 +2,15 @@ from app.models.jtandmag import JTandMag
 from app.schemas.jtandmag import JTandMagCreate, JTandMagUpdate, JTandMagOut
 from typing import List, Optional
 from datetime import datetime
+from app.utils.cache import cache_manager
+
+CACHE_TAG = "jtandmag"
 
 
 async def create_jtandmag(data: JTandMagCreate) -> JTandMagOut:
 	jtandmag = JTandMag(**data.dict())
 	await jtandmag.insert()
+	await cache_manager.invalidate_tags(CACHE_TAG)
 	return JTandMagOut.from_orm(jtandmag)
 
 
@@ -33,6 +37,7 @@ async def update_jtandmag(jtandmag_id: str, data: JTandMagUpdate) -> Optional[JT
 
 	jtandmag.updated_at = datetime.utcnow()
 	await jtandmag.save()
+	await cache_manager.invalidate_tags(CACHE_TAG)
 	return JTandMagOut.from_orm(jtandmag)
 
 
@@ -41,4 +46,5 @@ async def delete_jtandmag(jtandmag_id: str) -> bool:
 	if not jtandmag:
 		return False
 	await jtandmag.delete()
+	await cache_manager.invalidate_tags(CACHE_TAG)
 	return True
@@ -13,7 +13,8 @@ from app.models.series import Series
 from app.models.archive import Archive
 from app.models.tele_realite import TeleRealite
 from app.models.missed import Missed
-from app.utils.engagement import increment_like
+from app.utils.engagement import increment_like, read_counter
+from app.services.engagement_service import invalidate_engagement_state
 from app.schemas.like import LikeCreate
 from typing import List, Optional, Dict, Any
 
@@ -42,8 +43,8 @@ async def toggle_like(user_id: str, data: LikeCreate) -> Dict[str, any]:
         
         if existing_like:
             await existing_like.delete()
-            if data.content_type != "livestream":
-                await increment_like(data.content_type, data.content_id, -1)
+            await increment_like(data.content_type, data.content_id, -1)
+            await invalidate_engagement_state(user_id)
             new_count = await count_likes(data.content_id, data.content_type)
             return {"success": True, "action": "unliked", "likes": new_count}
         else:
@@ -53,8 +54,8 @@ async def toggle_like(user_id: str, data: LikeCreate) -> Dict[str, any]:
                 content_type=data.content_type
             )
             await like.insert()
-            if data.content_type != "livestream":
-                await increment_like(data.content_type, data.content_id, 1)
+            await increment_like(data.content_type, data.content_id, 1)
+            await invalidate_engagement_state(user_id)
             new_count = await count_likes(data.content_id, data.content_type)
             return {"success": True, "action": "liked", "likes": new_count, "like_id": str(like.id)}
     except Exception as e:
@@ -129,13 +130,16 @@ async def check_user_liked(user_id: str, content_id: str, content_type: str) ->
     return like is not None
 
 async def count_likes(content_id: str, content_type: str) -> int:
-    """Compter les likes d'un contenu"""
+    """Compter les likes d'un contenu (compteur dénormalisé, réconcilié périodiquement)"""
     try:
-        likes = await Like.find(
+        count = await read_counter(content_type, content_id, "likes")
+        if count is not None:
+            return count
+        # Type sans compteur : comptage sur l'index (content_id, content_type)
+        return await Like.find(
             Like.content_id == content_id,
             Like.content_type == content_type
-        ).to_list()
-        return len(likes)
+        ).count()
     except Exception as e:
         print(f"❌ Erreur count_likes: {str(e)}")
         return 0
@@ -152,6 +156,7 @@ async def remove_like(like_id: str, user_id: str, is_admin: bool = False) -> boo
     content_type = like.content_type
     await like.delete()
     await increment_like(content_type, content_id, -1)
+    await invalidate_engagement_state(like.user_id)
     return True
 
 async def get_all_likes(skip: int = 0, limit: int = 1000) -> List[dict]:
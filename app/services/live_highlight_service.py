@@ -2,10 +2,13 @@ from typing import List, Optional
 from datetime import datetime
 
 from app.models.live_highlight import LiveHighlight
+from app.utils.cache import cache_manager
 from app.schemas.live_highlight import LiveHighlightCreate, LiveHighlightUpdate
 
 VALID_SECTIONS = ("a_ne_pas_manquer", "moments_forts")
 
+CACHE_TAG = "live_highlights"
+
 
 async def create_highlight(data: LiveHighlightCreate) -> LiveHighlight:
     item = LiveHighlight(
@@ -19,6 +22,7 @@ async def create_highlight(data: LiveHighlightCreate) -> LiveHighlight:
         is_active=data.is_active,
     )
     await item.insert()
+    await cache_manager.invalidate_tags(CACHE_TAG)
     return item
 
 
@@ -47,6 +51,7 @@ async def update_highlight(item_id: str, data: LiveHighlightUpdate) -> Optional[
         setattr(item, field, value)
     item.updated_at = datetime.utcnow()
     await item.save()
+    await cache_manager.invalidate_tags(CACHE_TAG)
     return item
 
 
@@ -57,6 +62,7 @@ async def update_highlight_image(item_id: str, image_url: str) -> Optional[LiveH
     item.image_url = image_url
     item.updated_at = datetime.utcnow()
     await item.save()
+    await cache_manager.invalidate_tags(CACHE_TAG)
     return item
 
 
@@ -67,6 +73,7 @@ async def update_highlight_video(item_id: str, video_url: Optional[str]) -> Opti
     item.video_url = video_url
     item.updated_at = datetime.utcnow()
     await item.save()
+    await cache_manager.invalidate_tags(CACHE_TAG)
     return item
 
 
@@ -90,4 +97,5 @@ async def delete_highlight(item_id: str) -> bool:
             print(f"⚠️ Erreur suppression vidéo locale: {e}")
 
     await item.delete()
+    await cache_manager.invalidate_tags(CACHE_TAG)
     return True
@@ -2,11 +2,15 @@ from app.models.magazine import Magazine
 from app.schemas.magazine import MagazineCreate, MagazineUpdate, MagazineOut
 from typing import List, Optional
 from datetime import datetime
+from app.utils.cache import cache_manager
+
+CACHE_TAG = "magazine"
 
 
 async def create_magazine(data: MagazineCreate) -> MagazineOut:
 	magazine = Magazine(**data.dict())
 	await magazine.insert()
+	await cache_manager.invalidate_tags(CACHE_TAG)
 	return MagazineOut.from_orm(magazine)
 
 
@@ -33,6 +37,7 @@ async def update_magazine(magazine_id: str, data: MagazineUpdate) -> Optional[Ma
 
 	magazine.updated_at = datetime.utcnow()
 	await magazine.save()
+	await cache_manager.invalidate_tags(CACHE_TAG)
 	return MagazineOut.from_orm(magazine)
 
 
@@ -41,4 +46,5 @@ async def delete_magazine(magazine_id: str) -> bool:
 	if not magazine:
 		return False
 	await magazine.delete()
+	await cache_manager.invalidate_tags(CACHE_TAG)
 	return True
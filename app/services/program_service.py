@@ -1,6 +1,10 @@
 """Service layer for Programs, Live Channels and Reminders"""
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
+import asyncio
+import os
+import time
+import uuid
 from beanie.operators import GTE, LTE, And, Eq, In
 from app.models.program import Program, LiveChannel, ProgramReminder
 from app.schemas.program import (
@@ -8,6 +12,10 @@ from app.schemas.program import (
     ProgramWeekOut, ProgramGridOut, LiveChannelCreate, LiveChannelUpdate,
     ProgramReminderCreate, ProgramReminderUpdate
 )
+from app.utils.cache import cache_manager
+
+# Tag de cache commun aux programmes et aux chaînes (grilles, listes)
+CACHE_TAG = "programs"
 
 
 # ==================== LIVE CHANNEL SERVICES ====================
@@ -15,6 +23,7 @@ from app.schemas.program import (
 async def create_channel(data: LiveChannelCreate) -> LiveChannel:
     channel = LiveChannel(**data.model_dump())
     await channel.insert()
+    await cache_manager.invalidate_tags(CACHE_TAG)
     return channel
 
 
@@ -45,6 +54,7 @@ async def update_channel(
     if update_data:
         update_data["updated_at"] = datetime.utcnow()
         await channel.update({"$set": update_data})
+        await cache_manager.invalidate_tags(CACHE_TAG)
     return channel
 
 
@@ -53,6 +63,7 @@ async def delete_channel(channel_id: str) -> bool:
     if not channel:
         return False
     await channel.delete()
+    await cache_manager.invalidate_tags(CACHE_TAG)
     return True
 
 
@@ -70,6 +81,7 @@ async def create_program(data: ProgramCreate) -> Program:
         duration_minutes=duration
     )
     await program.insert()
+    await cache_manager.invalidate_tags(CACHE_TAG)
     return program
 
 
@@ -147,6 +159,7 @@ async def update_program(
     if update_data:
         update_data["updated_at"] = datetime.utcnow()
         await program.update({"$set": update_data})
+        await cache_manager.invalidate_tags(CACHE_TAG)
     return program
 
 
@@ -155,6 +168,7 @@ async def delete_program(program_id: str) -> bool:
     if not program:
         return False
     await program.delete()
+    await cache_manager.invalidate_tags(CACHE_TAG)
     return True
 
 
@@ -164,6 +178,7 @@ async def mark_program_live(program_id: str, is_live: bool = True) -> Optional[P
     if not program:
         return None
     await program.update({"$set": {"is_live": is_live, "updated_at": datetime.utcnow()}})
+    await cache_manager.invalidate_tags(CACHE_TAG)
     program.is_live = is_live
     return program
 
@@ -512,3 +527,164 @@ async def mark_reminder_sent(reminder_id: str) -> bool:
         }
     })
     return True
+
+
+# ==================== ENVOI DES RAPPELS ====================
+
+# Rappels réservés par lot (update_many puis lecture par jeton)
+REMINDER_BATCH_SIZE = int(os.getenv("REMINDER_BATCH_SIZE", "500"))
+# Rappels en retard encore envoyés (redémarrage, job sauté)
+REMINDER_GRACE_MINUTES = int(os.getenv("REMINDER_GRACE_MINUTES", "10"))
+# Un lot resté "sending" au-delà (process mort en plein envoi) est repris
+REMINDER_CLAIM_TIMEOUT = timedelta(minutes=5)
+
+
+async def _claim_reminder_batch(collection, now: datetime, window_end: datetime) -> tuple:
+    """Réserve atomiquement un lot de rappels dus ; retourne (jeton, rappels réservés)."""
+    due = {
+        "scheduled_for": {"$gte": now - timedelta(minutes=REMINDER_GRACE_MINUTES), "$lte": window_end},
+        "$or": [
+            {"status": "scheduled"},
+            {"status": "sending", "claimed_at": {"$lt": now - REMINDER_CLAIM_TIMEOUT}},
+        ],
+    }
+    ids = [
+        doc["_id"]
+        async for doc in collection.find(due, {"_id": 1}).sort("scheduled_for", 1).limit(REMINDER_BATCH_SIZE)
+    ]
+    if not ids:
+        return None, []
+
+    # Le filtre est rejoué dans l'update : un rappel pris entre-temps par un autre process est ignoré
+    token = uuid.uuid4().hex
+    await collection.update_many(
+        {"_id": {"$in": ids}, **due},
+        {"$set": {"status": "sending", "claim_token": token, "claimed_at": now}},
+    )
+    return token, await collection.find({"claim_token": token}).to_list(None)
+
+
+async def _load_fcm_tokens(user_ids: set) -> Dict[str, List[str]]:
+    """Tokens FCM de tous les destinataires, en une requête."""
+    from bson import ObjectId
+    from bson.errors import InvalidId
+    from app.models.user import User
+
+    oids = []
+    for uid in user_ids:
+        try:
+            oids.append(ObjectId(uid))
+        except (InvalidId, TypeError):
+            continue
+    cursor = User.get_motor_collection().find({"_id": {"$in": oids}}, {"fcm_tokens": 1})
+    return {str(doc["_id"]): [t for t in (doc.get("fcm_tokens") or []) if t] async for doc in cursor}
+
+
+async def _send_reminder_group(reminders: List[dict], tokens_by_user: Dict[str, List[str]]) -> tuple:
+    """
+    Un message par groupe (même programme, même délai) : un seul multicast FCM pour
+    tous les destinataires, puis une diffusion WebSocket. Retourne (ids envoyés, ids en échec).
+    """
+    from app.services.push_notification_service import send_multicast
+    from app.services.websocket_service import websocket_manager
+
+    first = reminders[0]
+    title = f"Rappel : {first.get('program_title') or 'Programme'}"
+    body = f"Commence dans {first.get('minutes_before')} min sur {first.get('channel_name') or 'BF1 TV'}"
+    data = {
+        "type": "program_reminder",
+        "program_id": str(first.get("program_id")),
+        "title": first.get("program_title") or '',
+    }
+
+    # Un token peut être partagé (appareil commun) : envoyé une seule fois
+    owners_by_token: Dict[str, List] = {}
+    for reminder in reminders:
+        for token in tokens_by_user.get(reminder["user_id"], []):
+            owners_by_token.setdefault(token, []).append(reminder["_id"])
+    tokens = list(owners_by_token)
+
+    try:
+        results = await send_multicast(title, body, data, tokens)
+    except Exception as e:
+        print(f"[ERREUR] Rappels '{first.get('program_title')}': {e}")
+        return [], [r["_id"] for r in reminders]
+
+    # Sans token, le rappel part seulement par WebSocket (onglet ouvert) : considéré envoyé
+    delivered = {owner for token, ok in zip(tokens, results) if ok for owner in owners_by_token[token]}
+    with_tokens = {owner for owners in owners_by_token.values() for owner in owners}
+    sent = [r["_id"] for r in reminders if r["_id"] in delivered or r["_id"] not in with_tokens]
+    failed = [r["_id"] for r in reminders if r["_id"] in with_tokens and r["_id"] not in delivered]
+
+    try:
+        await websocket_manager.send_notification(
+            notification_type="program_reminder",
+            data={"title": title, "body": body, "data": data},
+        )
+    except Exception as e:
+        print(f"[WARN] WebSocket rappel '{first.get('program_title')}': {e}")
+
+    print(f"[CRON] Rappel '{first.get('program_title')}': {len(sent)} envoyé(s), {len(failed)} échec(s), FCM {len(delivered)}/{len(with_tokens)}")
+    return sent, failed
+
+
+async def dispatch_due_reminders() -> dict:
+    """
+    Envoie les rappels de programmes dus dans la prochaine minute.
+
+    Par lot : réservation atomique (jeton de lot), tokens FCM de tous les
+    destinataires en une requête, un multicast par programme envoyés en
+    parallèle, puis statuts sent/failed écrits en un bulk_write.
+    """
+    from pymongo import UpdateMany
+
+    started = time.perf_counter()
+    collection = ProgramReminder.get_motor_collection()
+    report = {"claimed": 0, "sent": 0, "failed": 0, "groups": 0}
+
+    while True:
+        now = datetime.utcnow()
+        token, reminders = await _claim_reminder_batch(collection, now, now + timedelta(minutes=1))
+        if not reminders:
+            break
+
+        tokens_by_user = await _load_fcm_tokens({r["user_id"] for r in reminders})
+
+        groups: Dict[tuple, List[dict]] = {}
+        for reminder in reminders:
+            key = (reminder.get("program_id"), reminder.get("minutes_before"), reminder.get("channel_name"))
+            groups.setdefault(key, []).append(reminder)
+
+        outcomes = await asyncio.gather(*(
+            _send_reminder_group(group, tokens_by_user) for group in groups.values()
+        ))
+        sent = [rid for ok, _ in outcomes for rid in ok]
+        failed = [rid for _, ko in outcomes for rid in ko]
+
+        done_at = datetime.utcnow()
+        ops = []
+        if sent:
+            ops.append(UpdateMany(
+                {"_id": {"$in": sent}, "claim_token": token},
+                {"$set": {"status": "sent", "sent_at": done_at, "updated_at": done_at}, "$unset": {"claim_token": ""}},
+            ))
+        if failed:
+            ops.append(UpdateMany(
+                {"_id": {"$in": failed}, "claim_token": token},
+                {"$set": {"status": "failed", "updated_at": done_at}, "$unset": {"claim_token": ""}},
+            ))
+        if ops:
+            await collection.bulk_write(ops, ordered=False)
+
+        report["claimed"] += len(reminders)
+        report["sent"] += len(sent)
+        report["failed"] += len(failed)
+        report["groups"] += len(groups)
+
+        if len(reminders) < REMINDER_BATCH_SIZE:
+            break
+
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    if report["claimed"]:
+        print(f"[CRON] Rappels: {report}")
+    return report
@@ -1,8 +1,10 @@
 from typing import List, Optional
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import asyncio
 import aiohttp
 import json
+import os
 
 # ─── Firebase Admin SDK ───────────────────────────────────────────────────────
 try:
@@ -43,6 +45,55 @@ def _init_firebase():
 # Tenter l'initialisation au démarrage
 _firebase_ready = _init_firebase()
 
+# send_each_for_multicast est bloquant (HTTP synchrone) : envois sur un pool dédié
+FCM_SEND_WORKERS = int(os.getenv("FCM_SEND_WORKERS", "4"))
+# Limite FCM de tokens par multicast
+FCM_MULTICAST_LIMIT = 500
+
+_fcm_executor = ThreadPoolExecutor(max_workers=FCM_SEND_WORKERS, thread_name_prefix="fcm-send")
+
+
+def fcm_ready() -> bool:
+    return _firebase_available and bool(firebase_admin._apps)
+
+
+def _build_multicast(title: str, body: str, data: dict, tokens: List[str]):
+    return fcm_messaging.MulticastMessage(
+        notification=fcm_messaging.Notification(title=title, body=body),
+        data={k: str(v) for k, v in data.items()},
+        tokens=tokens,
+        webpush=fcm_messaging.WebpushConfig(
+            notification=fcm_messaging.WebpushNotification(icon='/assets/images/logo.png')
+        ),
+    )
+
+
+async def send_multicast(title: str, body: str, data: dict, tokens: List[str]) -> List[bool]:
+    """
+    Envoie une notification FCM à une liste de tokens (lots de 500 envoyés en
+    parallèle sur le pool FCM). Retourne le succès de chaque token, dans l'ordre.
+    Les tokens désenregistrés sont retirés de la base.
+    """
+    if not tokens or not fcm_ready():
+        return [False] * len(tokens)
+
+    loop = asyncio.get_running_loop()
+    batches = [tokens[i:i + FCM_MULTICAST_LIMIT] for i in range(0, len(tokens), FCM_MULTICAST_LIMIT)]
+    responses = await asyncio.gather(*(
+        loop.run_in_executor(_fcm_executor, fcm_messaging.send_each_for_multicast, _build_multicast(title, body, data, batch))
+        for batch in batches
+    ))
+
+    results = []
+    for batch, response in zip(batches, responses):
+        results.extend(res.success for res in response.responses)
+        await push_notification_service._cleanup_invalid_tokens(batch, response)
+    return results
+
+
+def shutdown_fcm_executor():
+    _fcm_executor.shutdown(wait=False, cancel_futures=True)
+
 
 class PushNotificationService:
     def __init__(self):
@@ -144,37 +195,18 @@ class PushNotificationService:
         try:
             from app.models.user import User
             # Récupérer tous les tokens FCM non-vides
-            users = await User.find({"fcm_tokens": {"$exists": True, "$not": {"$size": 0}}}).to_list()
-            tokens = [t for u in users if u.fcm_tokens for t in u.fcm_tokens if t]
+            cursor = User.get_motor_collection().find(
+                {"fcm_tokens": {"$exists": True, "$not": {"$size": 0}}}, {"fcm_tokens": 1, "_id": 0}
+            )
+            tokens = [t async for u in cursor for t in (u.get("fcm_tokens") or []) if t]
 
             if not tokens:
                 print("📱 FCM: aucun token enregistré.")
                 return
 
-            data_payload = {k: str(v) for k, v in notification.get('data', {}).items()}
-
-            # Envoi par lots de 500 (limite FCM)
-            batch_size = 500
-            for i in range(0, len(tokens), batch_size):
-                batch = tokens[i:i + batch_size]
-                message = fcm_messaging.MulticastMessage(
-                    notification=fcm_messaging.Notification(
-                        title=notification['title'],
-                        body=notification['body'],
-                    ),
-                    data=data_payload,
-                    tokens=batch,
-                    webpush=fcm_messaging.WebpushConfig(
-                        notification=fcm_messaging.WebpushNotification(
-                            icon='/assets/images/logo.png',
-                        )
-                    ),
-                )
-                response = fcm_messaging.send_each_for_multicast(message)
-                print(f"✅ FCM: {response.success_count}/{len(batch)} envoyés, {response.failure_count} échoués")
-
-                # Nettoyer les tokens invalides
-                await self._cleanup_invalid_tokens(batch, response)
+            results = await send_multicast(notification['title'], notification['body'], notification.get('data', {}), tokens)
+            sent = sum(results)
+            print(f"✅ FCM: {sent}/{len(tokens)} envoyés, {len(tokens) - sent} échoués")
 
         except Exception as e:
             print(f"❌ Erreur envoi FCM: {e}")
@@ -190,10 +222,10 @@ class PushNotificationService:
             ]
             if not invalid_tokens:
                 return
-            users = await User.find({"fcm_tokens": {"$in": invalid_tokens}}).to_list()
-            for user in users:
-                user.fcm_tokens = [t for t in user.fcm_tokens if t not in invalid_tokens]
-                await user.save()
+            await User.get_motor_collection().update_many(
+                {"fcm_tokens": {"$in": invalid_tokens}},
+                {"$pull": {"fcm_tokens": {"$in": invalid_tokens}}}
+            )
             print(f"🧹 FCM: {len(invalid_tokens)} token(s) invalide(s) supprimé(s)")
         except Exception as e:
             print(f"❌ Erreur nettoyage tokens FCM: {e}")
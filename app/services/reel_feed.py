@@ -0,0 +1,176 @@
+"""
+Feed des reels matérialisé (GET /reels).
+
+Toutes les REEL_FEED_REFRESH_INTERVAL secondes, chaque worker relit les
+REEL_FEED_MAX_CANDIDATES reels les plus récents (champs de score seulement),
+calcule leurs scores en un lot (score_reels, calculate_reel_score vectorisé)
+et garde le classement en mémoire : deux listes parallèles (ids, scores)
+triées par score décroissant.
+
+Une requête ne fait plus que :
+1. fusionner le classement avec les reels déjà vus, dont le score est
+   multiplié par SEEN_PENALTY (même ordre que le scoring complet) ;
+2. découper la page demandée ;
+3. hydrater ces ids par une seule requête $in projetée, validée par le
+   modèle Reel (reel_item : même forme que le scoring en direct).
+
+Un create / update / delete sur ce worker réveille la boucle ; les autres
+workers le voient au plus tard au rafraîchissement suivant. Tant que le
+premier classement n'est pas prêt, list_reels score en direct.
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from bson import ObjectId
+
+from app.models.reel import Reel
+
+REEL_FEED_ENABLED = os.getenv("REEL_FEED_ENABLED", "true").lower() == "true"
+REEL_FEED_REFRESH_INTERVAL = float(os.getenv("REEL_FEED_REFRESH_INTERVAL", "30"))
+REEL_FEED_MAX_CANDIDATES = int(os.getenv("REEL_FEED_MAX_CANDIDATES", "5000"))
+
+# Champs lus par calculate_reel_score / score_reels
+SCORE_PROJECTION = {
+    field: 1 for field in (
+        "likes", "comments", "shares", "saves", "views", "watch_completions", "watch_time_total",
+        "duration", "recent_likes", "recent_views", "recent_shares", "trend_buckets", "created_at",
+    )
+}
+# Compteurs horaires internes : inutiles au client
+PAGE_PROJECTION = {"trend_buckets": 0, "trend_hours": 0}
+
+
+class ReelFeed:
+    def __init__(self):
+        self._ids: List[str] = []
+        self._scores: List[float] = []
+        self._position: Dict[str, int] = {}
+        self.total = 0
+        self.refreshed_at: Optional[datetime] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"refreshes": 0, "refresh_seconds": 0.0, "candidates": 0}
+
+    @property
+    def ready(self) -> bool:
+        return self.refreshed_at is not None
+
+    # ─── Matérialisation ──────────────────────────────────────────────────────
+
+    async def refresh(self):
+        """Recalcule le classement de tous les reels candidats."""
+        from app.services.reel_service import score_reels
+
+        started = time.perf_counter()
+        col = Reel.get_motor_collection()
+        now = datetime.utcnow()
+        total = await col.count_documents({})
+        docs = await (
+            col.find({}, SCORE_PROJECTION)
+            .sort("created_at", -1)
+            .limit(REEL_FEED_MAX_CANDIDATES)
+            .to_list(None)
+        )
+        # Tri stable : à score égal, le plus récent d'abord (comme le scoring en direct)
+        ranked = sorted(
+            zip(score_reels(docs, now=now), (str(doc["_id"]) for doc in docs)),
+            key=lambda item: item[0],
+            reverse=True,
+        )
+        self._scores = [score for score, _ in ranked]
+        self._ids = [reel_id for _, reel_id in ranked]
+        self._position = {reel_id: i for i, reel_id in enumerate(self._ids)}
+        self.total = total
+        self.refreshed_at = now
+
+        elapsed = time.perf_counter() - started
+        self.stats["refreshes"] += 1
+        self.stats["refresh_seconds"] = round(elapsed, 3)
+        self.stats["candidates"] = len(ranked)
+
+    def rank(self, skip: int, limit: int, seen_ids: Set[str]) -> List[str]:
+        """
+        Ids de la page [skip, skip + limit) du classement où les reels vus ont
+        leur score multiplié par SEEN_PENALTY. Les non-vus gardent leur ordre,
+        les vus aussi : fusion de deux suites triées, en O(skip + limit + vus).
+        """
+        from app.services.reel_service import SEEN_PENALTY
+
+        ids, scores = self._ids, self._scores
+        seen = sorted(self._position[reel_id] for reel_id in seen_ids if reel_id in self._position)
+        seen_set = set(seen)
+        end = skip + limit
+        page: List[str] = []
+        u = s = 0
+        while len(page) < end:
+            while u < len(ids) and u in seen_set:
+                u += 1
+            if u < len(ids) and (s >= len(seen) or scores[u] >= scores[seen[s]] * SEEN_PENALTY):
+                page.append(ids[u])
+                u += 1
+            elif s < len(seen):
+                page.append(ids[seen[s]])
+                s += 1
+            else:
+                break
+        return page[skip:]
+
+    async def page(self, skip: int, limit: int, seen_ids: Set[str]) -> dict:
+        from app.services.reel_service import reel_item, reel_to_dict
+
+        page_ids = self.rank(skip, limit, seen_ids)
+        items = []
+        if page_ids:
+            docs = await Reel.get_motor_collection().find(
+                {"_id": {"$in": [ObjectId(reel_id) for reel_id in page_ids]}}, PAGE_PROJECTION
+            ).to_list(None)
+            by_id = {str(doc["_id"]): doc for doc in docs}
+            for reel_id in page_ids:
+                doc = by_id.get(reel_id)
+                if doc is None:
+                    # Supprimé depuis le dernier rafraîchissement
+                    continue
+                items.append(reel_item(reel_to_dict(Reel.model_validate(doc))))
+        return {"items": items, "total": self.total, "skip": skip, "limit": limit}
+
+    # ─── Boucle ───────────────────────────────────────────────────────────────
+
+    def request_refresh(self):
+        """Rafraîchit au plus tôt (reel créé, modifié ou supprimé sur ce worker)."""
+        if self._wakeup:
+            self._wakeup.set()
+
+    async def _loop(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"❌ [Reels] Erreur matérialisation du feed: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=REEL_FEED_REFRESH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if not REEL_FEED_ENABLED or self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if not self._task:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+reel_feed = ReelFeed()
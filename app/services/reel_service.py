@@ -1,19 +1,82 @@
 from app.models.reel import Reel
 from app.schemas.reel import ReelCreate, ReelUpdate
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime
+from app.utils.cache import cache_manager
+from app.services.reel_feed import reel_feed
+from app.utils.engagement import engagement_buffer
+import calendar
 import math
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+CACHE_TAG = "reels"
+
+# Fenêtre glissante du trending, en buckets d'une heure
+TRENDING_WINDOW_HOURS = 48
+# Multiplicateur du score d'un reel déjà vu (diversification du feed)
+SEEN_PENALTY = 0.1
+
 
 async def create_reel(data: ReelCreate) -> Reel:
     reel = Reel(**data.dict())
     await reel.insert()
+    await cache_manager.invalidate_tags(CACHE_TAG)
+    reel_feed.request_refresh()
     return reel
 
 
+# ─── COMPTEURS TRENDING (FENÊTRE GLISSANTE) ───────────────────────────────────
+
+def _current_hour(now: Optional[datetime] = None) -> int:
+    """
+    Index de l'heure courante depuis l'epoch (UTC). timegm et non timestamp() :
+    un datetime naïf y serait lu en heure locale du serveur (décalage, DST).
+    """
+    return calendar.timegm((now or datetime.utcnow()).utctimetuple()) // 3600
+
+
+def _trend_update(likes: int = 0, views: int = 0, shares: int = 0, now: Optional[datetime] = None) -> dict:
+    """
+    Update MongoDB incrémentant le bucket de l'heure courante et les sommes de la
+    fenêtre (recent_*), en O(1). Les buckets sortis de la fenêtre sont retranchés
+    des sommes par roll_trending_window, chaque heure.
+    """
+    hour = _current_hour(now)
+    inc = {}
+    for short, field, value in (("l", "recent_likes", likes), ("v", "recent_views", views), ("s", "recent_shares", shares)):
+        if value:
+            inc[f"trend_buckets.{hour}.{short}"] = value
+            inc[field] = value
+    return {"$inc": inc, "$addToSet": {"trend_hours": hour}}
+
+
+def trending_window_counts(reel: dict, now: Optional[datetime] = None) -> tuple:
+    """
+    (likes, vues, partages) exacts sur les TRENDING_WINDOW_HOURS dernières heures.
+    Calculé depuis les buckets quand ils sont présents (indépendant du passage du
+    job horaire), sinon depuis les sommes recent_*.
+    """
+    buckets = reel.get('trend_buckets')
+    if not buckets:
+        return reel.get('recent_likes', 0), reel.get('recent_views', 0), reel.get('recent_shares', 0)
+    oldest = _current_hour(now) - TRENDING_WINDOW_HOURS + 1
+    likes = views = shares = 0
+    for hour, counts in buckets.items():
+        if int(hour) >= oldest:
+            likes += counts.get('l', 0)
+            views += counts.get('v', 0)
+            shares += counts.get('s', 0)
+    return likes, views, shares
+
+
 # ─── ALGORITHME DE RECOMMANDATION ─────────────────────────────────────────────
 
-def calculate_reel_score(reel: dict, viewer_seen_ids: set = None) -> float:
+def calculate_reel_score(reel: dict, viewer_seen_ids: set = None, now: Optional[datetime] = None) -> float:
     """
     Algorithme de recommandation inspiré TikTok/Instagram Reels.
 
@@ -32,9 +95,9 @@ def calculate_reel_score(reel: dict, viewer_seen_ids: set = None) -> float:
     completions  = reel.get('watch_completions', 0)
     watch_time   = reel.get('watch_time_total', 0.0)
     duration     = reel.get('duration') or 30.0  # durée par défaut 30s
-    recent_likes = reel.get('recent_likes', 0)
-    recent_views = max(reel.get('recent_views', 1), 1)
-    recent_shares= reel.get('recent_shares', 0)
+    now = now or datetime.utcnow()
+    recent_likes, recent_views, recent_shares = trending_window_counts(reel, now)
+    recent_views = max(recent_views, 1)
     created_at   = reel.get('created_at')
 
     # ── 1. RETENTION SCORE (0-500 pts) ───────────────────���─────────────────
@@ -75,7 +138,6 @@ def calculate_reel_score(reel: dict, viewer_seen_ids: set = None) -> float:
 
     # ── 4. TIME DECAY (0.05–1.0) ───────────────────────────────────────────
     # Contenus récents favorisés, mais pas à 100% — les bons anciens restent visibles
-    now = datetime.utcnow()
     if created_at:
         age_hours = max((now - created_at).total_seconds() / 3600, 0.1)
     else:
@@ -92,7 +154,7 @@ def calculate_reel_score(reel: dict, viewer_seen_ids: set = None) -> float:
     # ── 5. DIVERSITY PENALTY ───────────────────────────────────────────────
     # Pénalise les reels déjà vus pour diversifier le feed
     reel_id = str(reel.get('id', ''))
-    diversity_mult = 0.1 if (viewer_seen_ids and reel_id in viewer_seen_ids) else 1.0
+    diversity_mult = SEEN_PENALTY if (viewer_seen_ids and reel_id in viewer_seen_ids) else 1.0
 
     # ── SCORE FINAL ────────────────────────────────────────────────────────
     base_score = retention_score + engagement_score
@@ -101,6 +163,137 @@ def calculate_reel_score(reel: dict, viewer_seen_ids: set = None) -> float:
     return final_score
 
 
+# ─── SCORING VECTORISÉ ────────────────────────────────────────────────────────
+
+# Colonnes attendues par calculate_reel_scores (mêmes noms que les champs du reel)
+SCORE_COLUMNS = (
+    "likes", "comments", "shares", "saves", "views", "watch_completions", "watch_time_total",
+    "duration", "recent_likes", "recent_views", "recent_shares", "created_at",
+)
+# Champs lus tels quels par reel_score_columns, avec leur valeur par défaut
+_RAW_FIELDS = (
+    ("likes", 0), ("comments", 0), ("shares", 0), ("saves", 0), ("views", 1),
+    ("watch_completions", 0), ("watch_time_total", 0.0),
+)
+
+
+def reel_score_columns(reels: List[dict], now: Optional[datetime] = None) -> dict:
+    """
+    Colonnes NumPy de calculate_reel_scores depuis des reels bruts, en une
+    passe par groupe de champs (la conversion dict → colonnes coûte plus que
+    le calcul lui-même). recent_* sont les compteurs de la fenêtre trending
+    (trending_window_counts) ; duration absente → NaN. created_at est remplacé
+    par age_seconds ((now - created_at) en secondes, NaN si absent), qui évite
+    la conversion lente des datetime en datetime64.
+    """
+    now = now or datetime.utcnow()
+    nan = float("nan")
+    count = len(reels)
+    raw = np.array(
+        [reel.get(field, default) for reel in reels for field, default in _RAW_FIELDS], dtype=np.float64
+    ).reshape(count, len(_RAW_FIELDS))
+    window = np.array([trending_window_counts(reel, now) for reel in reels], dtype=np.float64).reshape(count, 3)
+    columns = {field: raw[:, i] for i, (field, _) in enumerate(_RAW_FIELDS)}
+    columns.update({
+        "duration": np.array([reel.get('duration') or nan for reel in reels], dtype=np.float64),
+        "recent_likes": window[:, 0],
+        "recent_views": window[:, 1],
+        "recent_shares": window[:, 2],
+        "age_seconds": np.array(
+            [(now - created_at).total_seconds() if created_at else nan
+             for created_at in (reel.get('created_at') for reel in reels)],
+            dtype=np.float64,
+        ),
+    })
+    return columns
+
+
+def calculate_reel_scores(columns: dict, now: Optional[datetime] = None, seen=None) -> "np.ndarray":
+    """
+    calculate_reel_score pour N reels à la fois, sur des colonnes NumPy
+    (SCORE_COLUMNS, created_at pouvant être remplacé par age_seconds ; voir
+    reel_score_columns). Mêmes formules, dans le même ordre d'opérations ;
+    `seen` : masque booléen des reels déjà vus.
+    """
+    now = now or datetime.utcnow()
+
+    def column(name):
+        return np.asarray(columns[name], dtype=np.float64)
+
+    views = np.maximum(column("views"), 1)
+    duration = column("duration")
+    duration = np.where(np.isnan(duration) | (duration == 0), 30.0, duration)
+    recent_views = np.maximum(column("recent_views"), 1)
+
+    # 1. Retention
+    completion_rate = column("watch_completions") / views
+    watch_ratio = np.minimum(column("watch_time_total") / views / duration, 1.0)
+    retention_score = (completion_rate * 0.7 + watch_ratio * 0.3) * 500
+
+    # 2. Engagement
+    engagement_raw = column("saves") * 15 + column("shares") * 10 + column("comments") * 5 + column("likes") * 1
+    engagement_score = np.log1p(engagement_raw / views * 100) * 80
+
+    # 3. Trending boost
+    trending_velocity = (column("recent_likes") * 1 + column("recent_shares") * 10) / recent_views
+    trending_mult = np.select(
+        [trending_velocity > 0.5, trending_velocity > 0.2, trending_velocity > 0.05, trending_velocity > 0.01],
+        [4.0, 3.0, 2.0, 1.5],
+        default=1.0,
+    )
+
+    # 4. Time decay
+    if "age_seconds" in columns:
+        age_seconds = column("age_seconds")
+    else:
+        created_at = np.asarray(columns["created_at"], dtype="datetime64[us]")
+        age_seconds = np.where(
+            np.isnat(created_at), np.nan, (np.datetime64(now, "us") - created_at) / np.timedelta64(1, "s")
+        )
+    age_hours = np.where(np.isnan(age_seconds), 24.0, np.maximum(age_seconds / 3600, 0.1))
+    time_decay = np.maximum(np.exp(-age_hours / (36 * 1.44)), 0.05)
+    time_decay = np.where(age_hours < 2, np.minimum(time_decay * 1.5, 1.0), time_decay)
+
+    # 5. Diversity
+    diversity_mult = 1.0 if seen is None else np.where(seen, SEEN_PENALTY, 1.0)
+
+    base_score = retention_score + engagement_score
+    return base_score * trending_mult * time_decay * diversity_mult
+
+
+def score_reels(reels: List[dict], viewer_seen_ids: set = None, now: Optional[datetime] = None) -> List[float]:
+    """Scores de calculate_reel_score pour une liste de reels (vectorisé si NumPy est installé)."""
+    now = now or datetime.utcnow()
+    if not reels:
+        return []
+    if not NUMPY_AVAILABLE:
+        return [calculate_reel_score(reel, viewer_seen_ids, now=now) for reel in reels]
+    seen = None
+    if viewer_seen_ids:
+        seen = np.array([str(reel.get('id', '')) in viewer_seen_ids for reel in reels], dtype=bool)
+    return calculate_reel_scores(reel_score_columns(reels, now), now, seen).tolist()
+
+
+def reel_to_dict(reel: Reel) -> dict:
+    reel_dict = reel.dict()
+    reel_dict['id'] = str(reel.id)
+    if reel.video_url:
+        reel_dict['video_url'] = str(reel.video_url)
+        reel_dict['videoUrl'] = str(reel.video_url)
+    return reel_dict
+
+
+def reel_item(reel_dict: dict) -> dict:
+    """
+    Reel (reel_to_dict) tel que renvoyé par GET /reels, par le scoring en
+    direct comme par le feed matérialisé : compteurs en attente de ce worker
+    inclus, sans les compteurs horaires internes.
+    """
+    reel_dict.pop('trend_buckets', None)
+    reel_dict.pop('trend_hours', None)
+    return engagement_buffer.apply_pending("reel", reel_dict['id'], reel_dict)
+
+
 async def list_reels(
     skip: int = 0,
     limit: int = 20,
@@ -109,25 +302,28 @@ async def list_reels(
     """
     Retourne les reels triés par score de recommandation.
     seen_ids : IDs des reels déjà vus par l'utilisateur (pour la diversification).
+    Servi par le classement matérialisé (app/services/reel_feed.py) dès qu'il
+    est prêt ; sinon scoring en direct des reels les plus récents.
     """
+    seen_set = set(seen_ids) if seen_ids else set()
+    if reel_feed.ready:
+        try:
+            return await reel_feed.page(skip, limit, seen_set)
+        except Exception as e:
+            print(f"❌ Erreur feed matérialisé, scoring en direct: {str(e)}")
     try:
         total = await Reel.find_all().count()
-        seen_set = set(seen_ids) if seen_ids else set()
 
         # On récupère plus de reels que demandé pour avoir du choix après scoring
         fetch_limit = max(limit * 5, 200)
         reels = await Reel.find_all().sort(-Reel.created_at).limit(fetch_limit).to_list()
 
-        scored_reels = []
-        for reel in reels:
-            reel_dict = reel.dict()
-            reel_dict['id'] = str(reel.id)
-            if reel.video_url:
-                reel_dict['video_url'] = str(reel.video_url)
-                reel_dict['videoUrl'] = str(reel.video_url)
+        reel_dicts = [reel_to_dict(reel) for reel in reels]
 
-            score = calculate_reel_score(reel_dict, seen_set)
-            scored_reels.append((score, reel_dict))
+        # Scores sur les valeurs stockées (comme le feed matérialisé), puis forme de sortie
+        scored_reels = list(zip(score_reels(reel_dicts, seen_set), reel_dicts))
+        for _, reel_dict in scored_reels:
+            reel_item(reel_dict)
 
         # Trier par score décroissant
         scored_reels.sort(key=lambda x: x[0], reverse=True)
@@ -147,10 +343,11 @@ async def update_reel(reel_id: str, data: ReelUpdate) -> Optional[Reel]:
     if not reel:
         return None
     update_data = data.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(reel, field, value)
-    reel.updated_at = datetime.utcnow()
-    await reel.save()
+    update_data["updated_at"] = datetime.utcnow()
+    # $set des seuls champs modifiés : les compteurs incrémentés en parallèle ne sont pas écrasés
+    await reel.set(update_data)
+    await cache_manager.invalidate_tags(CACHE_TAG)
+    reel_feed.request_refresh()
     return reel
 
 
@@ -159,6 +356,8 @@ async def delete_reel(reel_id: str) -> bool:
     if not reel:
         return False
     await reel.delete()
+    await cache_manager.invalidate_tags(CACHE_TAG)
+    reel_feed.request_refresh()
     return True
 
 
@@ -182,50 +381,37 @@ async def track_reel_watch(
     - Anti-doublon 24h sur les vues (par user_id ou IP)
     """
     try:
-        reel = await Reel.get(reel_id)
-        if not reel:
+        from bson import ObjectId
+        from pymongo import ReturnDocument
+        from app.utils.view_dedupe import view_dedupe, view_identifier
+
+        if not ObjectId.is_valid(reel_id):
             return False
 
         col = Reel.get_motor_collection()
         now = datetime.utcnow()
 
-        # Anti-doublon 24h sur les vues
-        from app.models.view_log import ViewLog
-        identifier = user_id or client_ip or "anonymous"
-        cutoff = now - timedelta(hours=24)
-        already_viewed = await ViewLog.find_one(
-            ViewLog.content_id == reel_id,
-            ViewLog.content_type == "reel",
-            ViewLog.identifier == identifier,
-            ViewLog.created_at >= cutoff
-        )
+        # Anti-doublon 24h sur les vues (Redis, sinon Bloom + view_logs)
+        counted = await view_dedupe.first_view("reel", reel_id, view_identifier(user_id, client_ip))
 
-        updates = {
-            "$inc": {
-                "watch_time_total": watch_seconds,
-                "recent_views": 1,
-            }
-        }
+        updates = _trend_update(views=1, now=now)
+        updates["$inc"]["watch_time_total"] = watch_seconds
 
-        if not already_viewed:
+        if counted:
             updates["$inc"]["views"] = 1
-            # Enregistrer la vue pour l'anti-doublon
-            log = ViewLog(
-                content_id=reel_id,
-                content_type="reel",
-                identifier=identifier,
-                created_at=now
-            )
-            await log.insert()
 
         if completed:
             updates["$inc"]["watch_completions"] = 1
 
-        from bson import ObjectId
-        await col.update_one({"_id": ObjectId(reel_id)}, updates)
+        # Mise à jour et relecture en un aller-retour (None : reel inexistant)
+        doc = await col.find_one_and_update(
+            {"_id": ObjectId(reel_id)}, updates, return_document=ReturnDocument.AFTER
+        )
+        if doc is None:
+            return False
 
-        # Recalculer le trending_score
-        await _refresh_trending_score(reel_id)
+        # Recalculer le trending_score depuis le document relu
+        await _store_trending_score(col, doc, now)
 
         return True
     except Exception as e:
@@ -258,10 +444,7 @@ async def increment_reel_recent_like(reel_id: str) -> bool:
     try:
         from bson import ObjectId
         col = Reel.get_motor_collection()
-        await col.update_one(
-            {"_id": ObjectId(reel_id)},
-            {"$inc": {"recent_likes": 1}}
-        )
+        await col.update_one({"_id": ObjectId(reel_id)}, _trend_update(likes=1))
         await _refresh_trending_score(reel_id)
         return True
     except Exception as e:
@@ -274,10 +457,7 @@ async def increment_reel_recent_share(reel_id: str) -> bool:
     try:
         from bson import ObjectId
         col = Reel.get_motor_collection()
-        await col.update_one(
-            {"_id": ObjectId(reel_id)},
-            {"$inc": {"recent_shares": 1}}
-        )
+        await col.update_one({"_id": ObjectId(reel_id)}, _trend_update(shares=1))
         await _refresh_trending_score(reel_id)
         return True
     except Exception as e:
@@ -285,36 +465,82 @@ async def increment_reel_recent_share(reel_id: str) -> bool:
         return False
 
 
+async def _store_trending_score(col, doc: dict, now: Optional[datetime] = None):
+    """Persiste le trending_score calculé depuis un document reel brut."""
+    now = now or datetime.utcnow()
+    doc["id"] = str(doc["_id"])
+    await col.update_one(
+        {"_id": doc["_id"]},
+        {"$set": {"trending_score": calculate_reel_score(doc, now=now), "trending_updated_at": now}}
+    )
+
+
 async def _refresh_trending_score(reel_id: str):
     """Recalcule et persiste le trending_score en base"""
     try:
-        reel = await Reel.get(reel_id)
-        if not reel:
-            return
-        reel_dict = reel.dict()
-        reel_dict['id'] = str(reel.id)
-        score = calculate_reel_score(reel_dict)
         from bson import ObjectId
         col = Reel.get_motor_collection()
-        await col.update_one(
-            {"_id": ObjectId(reel_id)},
-            {"$set": {"trending_score": score, "trending_updated_at": datetime.utcnow()}}
-        )
+        doc = await col.find_one({"_id": ObjectId(reel_id)})
+        if doc:
+            await _store_trending_score(col, doc)
     except Exception as e:
         print(f"❌ Erreur _refresh_trending_score: {e}")
 
 
-async def reset_recent_metrics():
+async def roll_trending_window(batch_size: int = 500) -> dict:
     """
-    Remet à zéro les métriques récentes (recent_likes, recent_views, recent_shares).
-    À appeler toutes les 48h depuis le scheduler.
+    Fait glisser la fenêtre trending d'une heure : pour les seuls reels ayant un
+    bucket sorti de la fenêtre, retranche ses compteurs des sommes recent_*,
+    supprime le bucket et recalcule le trending_score. À appeler chaque heure.
     """
-    try:
-        col = Reel.get_motor_collection()
-        result = await col.update_many(
-            {},
-            {"$set": {"recent_likes": 0, "recent_views": 0, "recent_shares": 0}}
-        )
-        print(f"✅ [Reels] Métriques récentes remises à zéro ({result.modified_count} reels)")
-    except Exception as e:
-        print(f"❌ [Reels] Erreur reset_recent_metrics: {e}")
+    from pymongo import UpdateOne
+
+    col = Reel.get_motor_collection()
+    now = datetime.utcnow()
+    oldest = _current_hour(now) - TRENDING_WINDOW_HOURS + 1
+    batch = []
+    rolled = 0
+
+    async def write(batch):
+        # Scores du lot calculés en une fois (score_reels)
+        scores = score_reels([doc for doc, _, _, _ in batch], now=now)
+        ops = [
+            UpdateOne(
+                # $all : sans effet si un autre passage a déjà retiré ces buckets
+                {"_id": doc["_id"], "trend_hours": {"$all": expired}},
+                {
+                    "$inc": dec,
+                    "$unset": unset,
+                    "$pull": {"trend_hours": {"$in": expired}},
+                    "$set": {"trending_score": score, "trending_updated_at": now},
+                },
+            )
+            for (doc, expired, dec, unset), score in zip(batch, scores)
+        ]
+        return (await col.bulk_write(ops, ordered=False)).modified_count
+
+    async for doc in col.find({"trend_hours": {"$lt": oldest}}):
+        expired = [h for h in doc.get("trend_hours", []) if h < oldest]
+        buckets = doc.get("trend_buckets") or {}
+        dec = {"recent_likes": 0, "recent_views": 0, "recent_shares": 0}
+        unset = {}
+        for hour in expired:
+            counts = buckets.pop(str(hour), None) or {}
+            dec["recent_likes"] -= counts.get("l", 0)
+            dec["recent_views"] -= counts.get("v", 0)
+            dec["recent_shares"] -= counts.get("s", 0)
+            unset[f"trend_buckets.{hour}"] = ""
+
+        for field, delta in dec.items():
+            doc[field] = doc.get(field, 0) + delta
+        doc["id"] = str(doc["_id"])
+        batch.append((doc, expired, dec, unset))
+        if len(batch) >= batch_size:
+            rolled += await write(batch)
+            batch = []
+
+    if batch:
+        rolled += await write(batch)
+    if rolled:
+        print(f"✅ [Reels] Fenêtre trending glissée ({rolled} reels)")
+    return {"rolled": rolled}
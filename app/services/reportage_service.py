@@ -2,11 +2,15 @@ from app.models.reportage import Reportage
 from app.schemas.reportage import ReportageCreate, ReportageUpdate
 from typing import List, Optional
 from datetime import datetime
+from app.utils.cache import cache_manager
+
+CACHE_TAG = "reportage"
 
 
 async def create_reportage(data: ReportageCreate) -> Reportage:
 	reportage = Reportage(**data.dict())
 	await reportage.insert()
+	await cache_manager.invalidate_tags(CACHE_TAG)
 	return reportage
 
 
@@ -32,6 +36,7 @@ async def update_reportage(reportage_id: str, data: ReportageUpdate) -> Optional
 
 		reportage.updated_at = datetime.utcnow()
 		await reportage.save()
+		await cache_manager.invalidate_tags(CACHE_TAG)
 	return reportage
 
 
@@ -39,5 +44,6 @@ async def delete_reportage(reportage_id: str) -> bool:
 	reportage = await Reportage.get(reportage_id)
 	if reportage:
 		await reportage.delete()
+		await cache_manager.invalidate_tags(CACHE_TAG)
 		return True
 	return False
@@ -0,0 +1,509 @@
+"""
+Moteur de recherche en mémoire (index inversé, app/utils/search_index.py)
+sur tous les contenus de app.utils.engagement.CONTENT_MODELS.
+
+Cycle de vie, par worker :
+1. Démarrage : chargement de l'instantané disque (SEARCH_SNAPSHOT_PATH) s'il
+   est récent, sinon construction depuis MongoDB puis écriture de l'instantané.
+   L'instantané est un pickle : il est gardé dans un répertoire de l'application
+   (pas /tmp) et refusé s'il n'appartient pas à l'utilisateur du processus ou
+   si d'autres peuvent l'écrire.
+   Tant que l'index n'est pas prêt, /search retombe sur les requêtes $text.
+2. CRUD : les modèles indexés (mixin app/models/searchable.py) appliquent le
+   changement à l'index local et l'inscrivent dans `_search_events`, sauf si
+   rien de ce que l'index retient n'a changé (save() d'un compteur de vues).
+3. Toutes les SEARCH_SYNC_INTERVAL secondes, chaque worker rejoue les
+   événements des autres (relecture des documents par $in) puis compacte
+   l'index si le delta a grossi (dans un thread) et rafraîchit l'instantané.
+4. L'autocomplétion (app/utils/suggest_index.py) suit les mêmes événements ;
+   la popularité (vues, likes) de ses expressions est relue toutes les
+   SUGGEST_REFRESH_INTERVAL secondes, jamais pendant une frappe.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import pickle
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from app.utils.engagement import CONTENT_MODELS
+from app.utils.search_index import NUMPY_AVAILABLE, SearchIndex
+from app.utils.suggest_index import SuggestIndex
+
+SEARCH_ENGINE_ENABLED = os.getenv("SEARCH_ENGINE_ENABLED", "true").lower() == "true" and NUMPY_AVAILABLE
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SEARCH_SNAPSHOT_PATH = os.getenv(
+    "SEARCH_SNAPSHOT_PATH", os.path.join(_PROJECT_ROOT, ".cache", "search", "bf1-search-index.pkl")
+)
+SEARCH_SYNC_INTERVAL = float(os.getenv("SEARCH_SYNC_INTERVAL", "5"))
+# Documents ajoutés / supprimés avant compactage du segment principal
+SEARCH_COMPACT_THRESHOLD = int(os.getenv("SEARCH_COMPACT_THRESHOLD", "2000"))
+SEARCH_EVENTS_TTL_DAYS = int(os.getenv("SEARCH_EVENTS_TTL_DAYS", "7"))
+SUGGEST_REFRESH_INTERVAL = float(os.getenv("SUGGEST_REFRESH_INTERVAL", "600"))
+
+SEARCH_EVENTS_COLLECTION = "_search_events"
+SNAPSHOT_VERSION = 3
+BUILD_BATCH_SIZE = 2000
+# Recouvrement des lectures d'événements : les ObjectId de process différents
+# ne sont ordonnés qu'à la seconde près
+EVENTS_OVERLAP = timedelta(seconds=30)
+
+# Champs indexés (s'ils existent pour le type) et poids
+INDEXED_FIELDS = {
+    "title": 3.0,
+    "name": 3.0,
+    "category": 2.0,
+    "subcategory": 2.0,
+    "sport_type": 2.0,
+    "genre": 2.0,
+    "tags": 2.0,
+    "teams": 2.0,
+    "host": 2.0,
+    "presenter": 2.0,
+    "guest_name": 2.0,
+    "participants": 2.0,
+    "cast": 2.0,
+    "program_title": 2.0,
+    "author": 1.5,
+    "description": 1.0,
+}
+IMAGE_FIELDS = ("image_url", "image", "thumbnail", "image_main")
+# Champs proposés en autocomplétion → genre de suggestion
+SUGGEST_FIELDS = {
+    "title": "title",
+    "name": "title",
+    "category": "category",
+    "subcategory": "category",
+    "sport_type": "category",
+    "genre": "category",
+    "host": "host",
+    "presenter": "host",
+    "teams": "team",
+}
+# Compteurs de popularité (series : views_count / likes_count)
+POPULARITY_FIELDS = ("views", "likes", "views_count", "likes_count")
+SUGGEST_LIKE_WEIGHT = 5
+PROJECTION = {field: 1 for field in (*INDEXED_FIELDS, *IMAGE_FIELDS, *POPULARITY_FIELDS, "sub_type")}
+
+# Type de contenu → clé de categoryResults (les 7 premières reprennent la recherche $text)
+CATEGORY_KEYS = {
+    "sport": "sports",
+    "tele_realite": "tele_realite",
+    "reportage": "reportages",
+    "divertissement": "divertissements",
+    "jtandmag": "jtandmag",
+    "breaking_news": "news",
+    "archive": "archives",
+    "reel": "reels",
+    "movie": "movies",
+    "magazine": "magazines",
+    "series": "series",
+    "missed": "missed",
+    "emission_category": "emission_categories",
+}
+
+
+def indexed_types() -> Dict[str, type]:
+    """Un type par collection (event partage la collection de tele_realite)."""
+    types = {}
+    for content_type, model in CONTENT_MODELS.items():
+        if model not in types.values():
+            types[content_type] = model
+    return types
+
+
+def _texts(doc: dict) -> List[Tuple[str, float]]:
+    texts = []
+    for field, weight in INDEXED_FIELDS.items():
+        value = doc.get(field)
+        if isinstance(value, str):
+            texts.append((value, weight))
+        elif isinstance(value, list):
+            texts.extend((item, weight) for item in value if isinstance(item, str))
+    return texts
+
+
+def _payload(content_type: str, content_id: str, doc: dict) -> dict:
+    description = doc.get("description") or ""
+    payload = {
+        "id": content_id,
+        "title": doc.get("title") or doc.get("name") or "",
+        "description": description[:200],
+        "image_url": next((doc[field] for field in IMAGE_FIELDS if doc.get(field)), ""),
+        "type": content_type,
+    }
+    if content_type == "sport":
+        payload["sport_type"] = doc.get("sport_type") or ""
+    elif content_type == "tele_realite":
+        payload["type"] = doc.get("sub_type") or "tele_realite"
+    elif content_type == "breaking_news":
+        payload["type"] = "news"
+    return payload
+
+
+def _phrases(doc: dict) -> List[Tuple[str, str]]:
+    phrases = []
+    for field, kind in SUGGEST_FIELDS.items():
+        value = doc.get(field)
+        if isinstance(value, str):
+            phrases.append((kind, value))
+        elif isinstance(value, list):
+            phrases.extend((kind, item) for item in value if isinstance(item, str))
+    return phrases
+
+
+def _fingerprint(texts: list, payload: dict, phrases: list) -> bytes:
+    """Empreinte de ce que l'index retient d'un document (hors popularité, relue à part)."""
+    data = json.dumps([texts, payload, phrases], default=str, sort_keys=True)
+    return hashlib.blake2b(data.encode(), digest_size=8).digest()
+
+
+def _popularity(doc: dict) -> float:
+    views = doc.get("views") or doc.get("views_count") or 0
+    likes = doc.get("likes") or doc.get("likes_count") or 0
+    # 1 par contenu : une catégorie partagée par beaucoup de contenus remonte
+    return 1.0 + views + SUGGEST_LIKE_WEIGHT * likes
+
+
+def _category(payload_type: str) -> str:
+    if payload_type == "news":
+        return CATEGORY_KEYS["breaking_news"]
+    # Les autres types inconnus sont des sub_type de télé-réalité (event, ...)
+    return CATEGORY_KEYS.get(payload_type, CATEGORY_KEYS["tele_realite"])
+
+
+def _events_collection():
+    # Import différé : app.config importe les routeurs, dont /search
+    from app.config import get_database
+
+    return get_database()[SEARCH_EVENTS_COLLECTION]
+
+
+class SearchEngine:
+    def __init__(self):
+        self.index: Optional[SearchIndex] = None
+        self.suggest: Optional[SuggestIndex] = None
+        self._task: Optional[asyncio.Task] = None
+        self._compacting = False
+        # Evénements déjà appliqués dans la fenêtre de recouvrement
+        self._seen_events: Dict[ObjectId, datetime] = {}
+        self._events_since: Optional[datetime] = None
+        self._types = indexed_types()
+        self._type_of_model = {model: content_type for content_type, model in self._types.items()}
+        self._popularity_at = 0.0
+        # (type, id) → empreinte du document tel qu'indexé
+        self._fingerprints: Dict[Tuple[str, str], bytes] = {}
+        self.stats = {"source": None, "build_seconds": 0.0, "events_applied": 0, "compactions": 0}
+
+    @property
+    def ready(self) -> bool:
+        return self.index is not None
+
+    def _index_document(self, content_type: str, content_id: str, doc: dict) -> bool:
+        """(Ré)indexe le document ; False s'il est inchangé (seuls des compteurs ont bougé)."""
+        texts, payload, phrases = _texts(doc), _payload(content_type, content_id, doc), _phrases(doc)
+        fingerprint = _fingerprint(texts, payload, phrases)
+        if self._fingerprints.get((content_type, content_id)) == fingerprint:
+            return False
+        self._fingerprints[(content_type, content_id)] = fingerprint
+        self.index.add(content_type, content_id, texts, payload)
+        self.suggest.add(
+            (content_type, content_id), phrases, _popularity(doc), {"id": content_id, "type": payload["type"]}
+        )
+        return True
+
+    def _remove_document(self, content_type: str, content_id: str):
+        self._fingerprints.pop((content_type, content_id), None)
+        self.index.remove(content_type, content_id)
+        self.suggest.remove((content_type, content_id))
+
+    # ─── Construction / instantané ────────────────────────────────────────────
+
+    async def _build(self) -> Tuple[SearchIndex, SuggestIndex, Dict[Tuple[str, str], bytes]]:
+        # Index encore privés : la tokenisation peut tourner dans un thread sans
+        # bloquer la boucle d'événements pendant la construction
+        index = SearchIndex()
+        suggestions = []
+        fingerprints = {}
+
+        def add_batch(content_type: str, docs: List[dict]):
+            for doc in docs:
+                content_id = str(doc["_id"])
+                texts, payload, phrases = _texts(doc), _payload(content_type, content_id, doc), _phrases(doc)
+                index.add(content_type, content_id, texts, payload)
+                suggestions.append((
+                    (content_type, content_id), phrases, _popularity(doc),
+                    {"id": content_id, "type": payload["type"]},
+                ))
+                fingerprints[(content_type, content_id)] = _fingerprint(texts, payload, phrases)
+
+        for content_type, model in self._types.items():
+            batch = []
+            async for doc in model.get_motor_collection().find({}, PROJECTION).batch_size(BUILD_BATCH_SIZE):
+                batch.append(doc)
+                if len(batch) >= BUILD_BATCH_SIZE:
+                    await asyncio.to_thread(add_batch, content_type, batch)
+                    batch = []
+            if batch:
+                await asyncio.to_thread(add_batch, content_type, batch)
+        await asyncio.to_thread(index.compact)
+        return index, await asyncio.to_thread(SuggestIndex.build, suggestions), fingerprints
+
+    def _load_snapshot(self) -> Optional[Tuple[SearchIndex, SuggestIndex, Dict[Tuple[str, str], bytes], datetime]]:
+        try:
+            with open(SEARCH_SNAPSHOT_PATH, "rb") as f:
+                # Vérifié sur le fichier ouvert : pickle.load exécute du code arbitraire
+                st = os.fstat(f.fileno())
+                if st.st_uid != os.getuid() or st.st_mode & 0o022:
+                    print(f"⚠️ [Search] Instantané {SEARCH_SNAPSHOT_PATH} ignoré : propriétaire ou droits suspects")
+                    return None
+                state = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        if state.get("version") != SNAPSHOT_VERSION:
+            return None
+        # Au-delà de la rétention des événements, les changements manquants sont perdus
+        if datetime.utcnow() - state["events_since"] > timedelta(days=SEARCH_EVENTS_TTL_DAYS) - EVENTS_OVERLAP:
+            return None
+        return (
+            SearchIndex.from_state(state["index"]), SuggestIndex.from_state(state["suggest"]),
+            state["fingerprints"], state["events_since"],
+        )
+
+    def _write_snapshot(self, state: dict):
+        os.makedirs(os.path.dirname(SEARCH_SNAPSHOT_PATH), mode=0o700, exist_ok=True)
+        tmp = f"{SEARCH_SNAPSHOT_PATH}.{os.getpid()}.tmp"
+        # 0600 quel que soit l'umask : seul ce processus peut le relire / le modifier
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_NOFOLLOW, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, SEARCH_SNAPSHOT_PATH)
+
+    async def save_snapshot(self):
+        if not self.index or self._events_since is None:
+            return
+        state = {
+            "version": SNAPSHOT_VERSION,
+            "events_since": self._events_since,
+            "index": self.index.export_state(),
+            "suggest": self.suggest.export_state(),
+            "fingerprints": dict(self._fingerprints),
+        }
+        try:
+            await asyncio.to_thread(self._write_snapshot, state)
+        except Exception as e:
+            print(f"⚠️ [Search] Instantané non écrit: {e}")
+
+    async def _initialize(self):
+        started = time.perf_counter()
+        try:
+            loaded = await asyncio.to_thread(self._load_snapshot)
+        except Exception as e:
+            print(f"⚠️ [Search] Instantané illisible, reconstruction: {e}")
+            loaded = None
+
+        if loaded:
+            self.index, self.suggest, self._fingerprints, self._events_since = loaded
+            self.stats["source"] = "snapshot"
+            await self._sync_events()
+        else:
+            # Les changements pendant la construction seront rejoués
+            self._events_since = datetime.utcnow() - EVENTS_OVERLAP
+            self.index, self.suggest, self._fingerprints = await self._build()
+            self._popularity_at = time.monotonic()
+            self.stats["source"] = "mongodb"
+            await self.save_snapshot()
+
+        self.stats["build_seconds"] = round(time.perf_counter() - started, 3)
+        print(f"🔎 [Search] Index prêt ({self.stats['source']}) : {len(self.index)} contenus en {self.stats['build_seconds']}s")
+
+    # ─── Synchronisation entre workers ────────────────────────────────────────
+
+    async def _ensure_indexes(self):
+        await _events_collection().create_index(
+            "at", expireAfterSeconds=SEARCH_EVENTS_TTL_DAYS * 86400
+        )
+
+    async def _apply(self, changes: Dict[Tuple[str, str], str]):
+        """Applique {(type, id): "upsert" | "delete"} ; les upserts relisent le document."""
+        by_type: Dict[str, List[ObjectId]] = {}
+        for (content_type, content_id), op in changes.items():
+            if op == "delete":
+                self._remove_document(content_type, content_id)
+                continue
+            try:
+                by_type.setdefault(content_type, []).append(ObjectId(content_id))
+            except (InvalidId, TypeError):
+                continue
+
+        for content_type, ids in by_type.items():
+            model = self._types.get(content_type)
+            if not model:
+                continue
+            found = set()
+            async for doc in model.get_motor_collection().find({"_id": {"$in": ids}}, PROJECTION):
+                content_id = str(doc["_id"])
+                found.add(content_id)
+                self._index_document(content_type, content_id, doc)
+            for oid in ids:
+                if str(oid) not in found:
+                    self._remove_document(content_type, str(oid))
+        self.stats["events_applied"] += len(changes)
+
+    async def _sync_events(self):
+        since = self._events_since - EVENTS_OVERLAP
+        cursor = _events_collection().find(
+            {"_id": {"$gte": ObjectId.from_datetime(since)}}
+        ).sort("_id", 1)
+        changes: Dict[Tuple[str, str], str] = {}
+        latest = self._events_since
+        async for event in cursor:
+            at = event["_id"].generation_time.replace(tzinfo=None)
+            latest = max(latest, at)
+            if event["_id"] in self._seen_events:
+                continue
+            self._seen_events[event["_id"]] = at
+            changes[(event["content_type"], event["content_id"])] = event["op"]
+        if changes:
+            await self._apply(changes)
+        self._events_since = latest
+        self._seen_events = {oid: at for oid, at in self._seen_events.items() if at >= latest - EVENTS_OVERLAP}
+
+    async def _maybe_compact(self):
+        index = self.index
+        if self._compacting or index.delta_docs + index.dead_docs < SEARCH_COMPACT_THRESHOLD:
+            return
+        frozen = index.begin_compaction()
+        if frozen is None:
+            return
+        self._compacting = True
+        try:
+            index.finish_compaction(await asyncio.to_thread(SearchIndex.build_segment, *frozen))
+            self.stats["compactions"] += 1
+        finally:
+            self._compacting = False
+        await self.save_snapshot()
+
+    async def _refresh_popularity(self):
+        """Relit vues et likes de tous les contenus pour pondérer l'autocomplétion."""
+        if time.monotonic() - self._popularity_at < SUGGEST_REFRESH_INTERVAL:
+            return
+        self._popularity_at = time.monotonic()
+        projection = {field: 1 for field in POPULARITY_FIELDS}
+        weights = {}
+        for content_type, model in self._types.items():
+            async for doc in model.get_motor_collection().find({}, projection).batch_size(BUILD_BATCH_SIZE):
+                weights[(content_type, str(doc["_id"]))] = _popularity(doc)
+        self.suggest.set_weights(weights)
+
+    async def _run(self):
+        try:
+            await self._ensure_indexes()
+        except Exception as e:
+            print(f"⚠️ [Search] Index {SEARCH_EVENTS_COLLECTION} non créé: {e}")
+        while self.index is None:
+            try:
+                await self._initialize()
+            except Exception as e:
+                print(f"❌ [Search] Construction de l'index impossible, nouvel essai: {e}")
+                await asyncio.sleep(SEARCH_SYNC_INTERVAL * 6)
+        while True:
+            await asyncio.sleep(SEARCH_SYNC_INTERVAL)
+            try:
+                await self._sync_events()
+                await self._maybe_compact()
+                await self._refresh_popularity()
+            except Exception as e:
+                print(f"⚠️ [Search] Synchronisation en échec: {e}")
+
+    def start(self):
+        if SEARCH_ENGINE_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # ─── CRUD ─────────────────────────────────────────────────────────────────
+
+    async def on_document_changed(self, document, deleted: bool = False):
+        """Appelé après insert / update / delete d'un contenu indexé (mixin Searchable)."""
+        if not SEARCH_ENGINE_ENABLED or document.id is None:
+            return
+        content_type = self._type_of_model.get(type(document))
+        if not content_type:
+            return
+        content_id = str(document.id)
+        try:
+            if self.index is not None:
+                if deleted:
+                    self._remove_document(content_type, content_id)
+                elif not self._index_document(content_type, content_id, document.model_dump()):
+                    # Compteurs seuls (vues, likes) : ni réindexation ni événement
+                    return
+            event_id = ObjectId()
+            await _events_collection().insert_one({
+                "_id": event_id,
+                "content_type": content_type,
+                "content_id": content_id,
+                "op": "delete" if deleted else "upsert",
+                "at": datetime.utcnow(),
+            })
+            # Déjà appliqué ici : ne pas le relire au prochain tour
+            self._seen_events[event_id] = event_id.generation_time.replace(tzinfo=None)
+        except Exception as e:
+            # Oubli de l'empreinte : le prochain save() réémettra l'événement
+            self._fingerprints.pop((content_type, content_id), None)
+            print(f"⚠️ [Search] Mise à jour de l'index {content_type}/{content_id} en échec: {e}")
+
+    # ─── Recherche ────────────────────────────────────────────────────────────
+
+    def search(self, query: str, limit: int) -> dict:
+        """Résultats au format de /search : `limit` par catégorie, `items` triés par score."""
+        hits = self.index.search(query, limit=limit, per_type=True)
+        category_results = {key: [] for key in CATEGORY_KEYS.values()}
+        items = []
+        for payload, score in hits:
+            item = {**payload, "score": round(score, 4)}
+            category_results[_category(payload["type"])].append(item)
+            items.append(item)
+        suggestions = [suggestion["text"] for suggestion in self.suggest.complete(query, 3)]
+        if not suggestions:
+            suggestions = list(dict.fromkeys(item["title"][:30] for item in items[:5]))[:3]
+        return {
+            "query": query,
+            "items": items,
+            "categoryResults": category_results,
+            "suggestions": suggestions,
+            "totalFound": len(items),
+            "hasMore": any(len(results) >= limit for results in category_results.values()),
+        }
+
+    def suggest_completions(self, prefix: str, limit: int) -> List[dict]:
+        """Complétions de `prefix` pour /search/suggest (mémoire seule, aucune requête)."""
+        return self.suggest.complete(prefix, limit)
+
+    def status(self) -> dict:
+        index = self.index
+        return {
+            "enabled": SEARCH_ENGINE_ENABLED,
+            "ready": index is not None,
+            "documents": len(index) if index else 0,
+            "delta_documents": index.delta_docs if index else 0,
+            "suggestions": len(self.suggest) if self.suggest else 0,
+            **self.stats,
+        }
+
+
+search_engine = SearchEngine()
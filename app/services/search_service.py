@@ -0,0 +1,170 @@
+"""
+Recherche globale dans les contenus (sports, télé-réalité, reportages,
+divertissements, JT & Mag, actualités, archives).
+
+Une requête $text par collection, lancées en parallèle et servies par les
+index texte des modèles (title + description, sport_type pour les sports).
+Les résultats sont classés par score textuel ; les index texte v3 ignorent
+casse et accents, et la racinisation rapproche singulier et pluriel.
+"""
+
+import asyncio
+import re
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.models.sport import Sport
+from app.models.reportage import Reportage
+from app.models.divertissement import Divertissement
+from app.models.jtandmag import JTandMag
+from app.models.breakingNews import BreakingNews
+from app.models.archive import Archive
+from app.models.tele_realite import TeleRealite
+
+MAX_QUERY_LENGTH = 100
+# Limite de temps serveur par collection : une recherche lente ne bloque pas les autres
+SEARCH_MAX_TIME_MS = 2000
+
+# Opérateurs de $search (phrase entre guillemets, négation par "-") et ponctuation ignorés
+_UNSAFE_CHARS = re.compile(r"[^\w\s'’-]", re.UNICODE)
+_NEGATION = re.compile(r"(^|\s)-+")
+
+
+def normalize_query(q: str) -> str:
+    """Texte de recherche nettoyé : minuscules, sans opérateurs $text ni ponctuation, espaces réduits."""
+    q = (q or "")[:MAX_QUERY_LENGTH].lower()
+    q = _UNSAFE_CHARS.sub(" ", q)
+    q = _NEGATION.sub(" ", q)
+    return " ".join(q.split())
+
+
+def _image(doc: dict, *fields: str) -> str:
+    for field in fields:
+        if doc.get(field):
+            return doc[field]
+    return ""
+
+
+def _format_sport(doc: dict) -> dict:
+    return {
+        "id": str(doc["_id"]),
+        "title": doc.get("title") or "",
+        "description": doc.get("description") or "",
+        "image_url": _image(doc, "image", "thumbnail"),
+        "type": "sport",
+        "sport_type": doc.get("sport_type") or "",
+    }
+
+
+def _format_tele_realite(doc: dict) -> dict:
+    return {
+        "id": str(doc["_id"]),
+        "title": doc.get("title") or "",
+        "description": doc.get("description") or "",
+        "image_url": _image(doc, "thumbnail", "image"),
+        "type": doc.get("sub_type") or "tele_realite",
+    }
+
+
+def _formatter(content_type: str, *image_fields: str, description_max: Optional[int] = None) -> Callable[[dict], dict]:
+    def format_doc(doc: dict) -> dict:
+        description = doc.get("description") or ""
+        return {
+            "id": str(doc["_id"]),
+            "title": doc.get("title") or "",
+            "description": description[:description_max] if description_max else description,
+            "image_url": _image(doc, *image_fields),
+            "type": content_type,
+        }
+    return format_doc
+
+
+# (clé de categoryResults, modèle, champs projetés, mise en forme)
+SEARCH_SOURCES: List[Tuple[str, type, Tuple[str, ...], Callable[[dict], dict]]] = [
+    ("sports", Sport, ("title", "description", "image", "thumbnail", "sport_type"), _format_sport),
+    ("tele_realite", TeleRealite, ("title", "description", "thumbnail", "image", "sub_type"), _format_tele_realite),
+    ("reportages", Reportage, ("title", "description", "image_url", "thumbnail", "image"),
+     _formatter("reportage", "image_url", "thumbnail", "image")),
+    ("divertissements", Divertissement, ("title", "description", "image_url", "image"),
+     _formatter("divertissement", "image_url", "image")),
+    ("jtandmag", JTandMag, ("title", "description", "image_url", "image"),
+     _formatter("jtandmag", "image_url", "image")),
+    ("news", BreakingNews, ("title", "description", "image"),
+     _formatter("news", "image", description_max=200)),
+    ("archives", Archive, ("title", "description", "image_url", "image"),
+     _formatter("archive", "image_url", "image")),
+]
+
+
+async def _search_collection(model, fields: Tuple[str, ...], format_doc, query: str, limit: int) -> List[dict]:
+    projection = {field: 1 for field in fields}
+    projection["score"] = {"$meta": "textScore"}
+    cursor = (
+        model.get_motor_collection()
+        .find({"$text": {"$search": query}}, projection)
+        .sort([("score", {"$meta": "textScore"})])
+        .limit(limit)
+        .max_time_ms(SEARCH_MAX_TIME_MS)
+    )
+    items = []
+    async for doc in cursor:
+        item = format_doc(doc)
+        item["score"] = round(doc.get("score", 0.0), 4)
+        items.append(item)
+    return items
+
+
+def empty_results(q: str) -> Dict:
+    return {
+        "query": q,
+        "items": [],
+        "categoryResults": {},
+        "suggestions": [],
+        "totalFound": 0,
+        "hasMore": False
+    }
+
+
+async def search_all(query: str, limit: int) -> Dict:
+    """
+    Recherche `query` (déjà normalisée) dans toutes les collections en parallèle.
+    `limit` résultats max par catégorie ; `items` fusionne tout, trié par score.
+    """
+    results = empty_results(query)
+    if not query:
+        return results
+
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(
+        *(_search_collection(model, fields, format_doc, query, limit) for _, model, fields, format_doc in SEARCH_SOURCES),
+        return_exceptions=True,
+    )
+
+    category_results = {}
+    for (key, model, _, _), outcome in zip(SEARCH_SOURCES, outcomes):
+        if isinstance(outcome, Exception):
+            # Une collection en erreur (index absent, timeout) n'empêche pas les autres
+            print(f"❌ Erreur recherche {model.get_settings().name}: {outcome}")
+            outcome = []
+        category_results[key] = outcome
+
+    all_items = sorted(
+        (item for items in category_results.values() for item in items),
+        key=lambda item: item["score"],
+        reverse=True,
+    )
+
+    results["categoryResults"] = category_results
+    results["items"] = all_items
+    results["totalFound"] = len(all_items)
+    results["hasMore"] = any(len(items) >= limit for items in category_results.values())
+
+    # Générer des suggestions basées sur les meilleurs résultats
+    if all_items:
+        suggestions = list(dict.fromkeys(item["title"][:30] for item in all_items[:5]))
+        results["suggestions"] = suggestions[:3]
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if elapsed_ms > 500:
+        print(f"⚠️ Recherche lente ({elapsed_ms:.0f} ms) : {query!r}")
+    return results
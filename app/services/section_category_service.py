@@ -2,6 +2,9 @@ from app.models.section_category import SectionCategory
 from app.schemas.section_category import SectionCategoryCreate, SectionCategoryUpdate, _slugify
 from typing import List, Optional
 from datetime import datetime
+from app.utils.cache import cache_manager
+
+CACHE_TAG = "section_categories"
 
 
 async def create_section_category(data: SectionCategoryCreate) -> SectionCategory:
@@ -16,6 +19,7 @@ async def create_section_category(data: SectionCategoryCreate) -> SectionCategor
 
     item = SectionCategory(**data.dict(), slug=slug)
     await item.insert()
+    await cache_manager.invalidate_tags(CACHE_TAG)
     return item
 
 
@@ -48,6 +52,7 @@ async def update_section_category(
         item.slug = _slugify(f"{item.section}-{item.name}")
     item.updated_at = datetime.utcnow()
     await item.save()
+    await cache_manager.invalidate_tags(CACHE_TAG)
     return item
 
 
@@ -56,6 +61,7 @@ async def delete_section_category(item_id: str) -> bool:
     if not item:
         return False
     await item.delete()
+    await cache_manager.invalidate_tags(CACHE_TAG)
     return True
 
 
@@ -12,7 +12,7 @@ from app.models.series import Series
 from app.models.missed import Missed
 from app.schemas.share import ShareCreate
 from typing import List, Optional
-from app.utils.engagement import increment_share
+from app.utils.engagement import increment_share, read_counter
 
 
 CONTENT_MODELS = {
@@ -62,6 +62,9 @@ async def list_shares(content_id: str, content_type: str, skip: int = 0, limit:
 
 
 async def count_shares(content_id: str, content_type: str) -> int:
+    count = await read_counter(content_type, content_id, "shares")
+    if count is not None:
+        return count
     return await Share.find(
         Share.content_id == content_id,
         Share.content_type == content_type
@@ -2,7 +2,12 @@ from app.models.subscription import Subscription
 from app.schemas.subscription import SubscriptionCreate
 from typing import List, Optional
 from datetime import datetime
-from app.utils.subscription_utils import can_access_content, get_highest_active_category
+import time
+from pymongo import UpdateOne
+from app.utils.subscription_utils import (
+	can_access_content, get_highest_active_category, category_rank_expression, category_from_rank,
+)
+from app.utils.auth import invalidate_principal
 
 async def get_all_subscriptions(skip: int = 0, limit: int = 1000) -> List:
     """Récupérer tous les abonnements (pour admin)"""
@@ -67,6 +72,7 @@ async def create_subscription(data: SubscriptionCreate) -> Subscription:
 	
 	# Mettre à jour le statut premium et la catégorie de l'utilisateur
 	await sync_user_premium_status(data.user_id)
+	await invalidate_principal(data.user_id)
 		
 	# Envoyer une notification premium
 	try:
@@ -90,14 +96,10 @@ async def cancel_subscription(sub_id: str) -> bool:
 	sub.is_active = False
 	await sub.save()
 	
-	# Mettre à jour le statut premium de l'utilisateur
-	from app.models.user import User
-	user = await User.get(sub.user_id)
-	if user:
-		# Vérifier s'il a encore un autre abonnement actif
-		has_active_sub = await check_user_has_active_subscription(sub.user_id)
-		user.is_premium = has_active_sub
-		await user.save()
+	# Mettre à jour le statut premium et la catégorie de l'utilisateur
+	# (il peut lui rester un autre abonnement actif)
+	await sync_user_premium_status(sub.user_id)
+	await invalidate_principal(sub.user_id)
 	
 	return True
 
@@ -150,6 +152,53 @@ async def get_user_subscription_category(user_id: str) -> Optional[str]:
 	categories = [sub.category for sub in active_subs if sub.category]
 	return get_highest_active_category(categories)
 
+async def get_user_entitlement(user_id: str) -> dict:
+	"""
+	Droits d'abonnement de l'utilisateur, en une seule requête.
+	
+	Returns:
+		{"is_premium": bool, "category": str | None, "expires_at": datetime | None}
+		expires_at est la fin la plus proche parmi les abonnements actifs.
+	"""
+	now = datetime.utcnow()
+	
+	active_subs = await Subscription.find({
+		"user_id": user_id,
+		"is_active": True,
+		"$or": [
+			{"end_date": None},
+			{"end_date": {"$gt": now}}
+		]
+	}).to_list()
+	
+	end_dates = [sub.end_date for sub in active_subs if sub.end_date]
+	return {
+		"is_premium": bool(active_subs),
+		"category": get_highest_active_category([sub.category for sub in active_subs if sub.category]) if active_subs else None,
+		"expires_at": min(end_dates) if end_dates else None,
+	}
+
+async def apply_user_entitlement(user, entitlement: dict) -> bool:
+	"""
+	Reporte les droits sur le document utilisateur et le sauvegarde si besoin.
+	Retourne True si l'utilisateur a été modifié.
+	"""
+	changed = False
+	
+	if user.is_premium != entitlement["is_premium"]:
+		user.is_premium = entitlement["is_premium"]
+		changed = True
+		
+	if user.subscription_category != entitlement["category"]:
+		user.subscription_category = entitlement["category"]
+		changed = True
+	
+	if changed:
+		await user.save()
+		print(f"✅ Statut synchronisé pour user {user.id}: premium={user.is_premium}, category={user.subscription_category}")
+	
+	return changed
+
 async def sync_user_premium_status(user_id: str) -> bool:
 	"""
 	Synchronise le statut is_premium et subscription_category d'un utilisateur 
@@ -158,54 +207,208 @@ async def sync_user_premium_status(user_id: str) -> bool:
 	"""
 	from app.models.user import User
 	
-	has_active_sub = await check_user_has_active_subscription(user_id)
-	category = await get_user_subscription_category(user_id)
+	entitlement = await get_user_entitlement(user_id)
 	
 	user = await User.get(user_id)
-	if user:
-		changed = False
+	if user and await apply_user_entitlement(user, entitlement):
+		await invalidate_principal(user_id)
+	
+	return entitlement["is_premium"]
+
+def _entitlements_pipeline(now: datetime, user_ids: Optional[list] = None) -> list:
+	"""
+	Agrégation des droits par utilisateur sur les abonnements actifs et non expirés :
+	{_id: user_id, rank: niveau de la meilleure catégorie, expires_at: fin la plus proche},
+	triée par user_id.
+	"""
+	match = {
+		"is_active": True,
+		"user_id": {"$in": list(user_ids)} if user_ids is not None else {"$type": "string"},
+		"$or": [
+			{"end_date": None},
+			{"end_date": {"$gt": now}}
+		]
+	}
+	return [
+		{"$match": match},
+		{"$group": {
+			"_id": "$user_id",
+			"rank": {"$max": category_rank_expression()},
+			"expires_at": {"$min": "$end_date"},
+		}},
+		{"$sort": {"_id": 1}},
+	]
+
+SYNC_BATCH_SIZE = 1000
+
+async def sync_all_user_categories(batch_size: int = SYNC_BATCH_SIZE) -> dict:
+	"""
+	Resynchronise is_premium / subscription_category de tous les utilisateurs.
+	
+	Deux flux triés par id sont fusionnés, sans jamais charger toute une collection :
+	- les utilisateurs, paginés par _id (keyset) avec projection des deux champs ;
+	- une seule agrégation sur subscriptions donnant la meilleure catégorie par user_id
+	  (les user_id sont les ObjectId en hexadécimal, même ordre que _id).
+	Seuls les utilisateurs modifiés sont écrits, par bulk_write non ordonnés.
+	
+	Returns:
+		{"scanned", "updated", "seconds", "users_per_second"}
+	"""
+	from app.models.user import User
+	
+	started = time.perf_counter()
+	users = User.get_motor_collection()
+	entitlements = Subscription.get_motor_collection().aggregate(
+		_entitlements_pipeline(datetime.utcnow()), allowDiskUse=True, batchSize=batch_size
+	).__aiter__()
+	
+	async def next_entitlement():
+		try:
+			return await entitlements.__anext__()
+		except StopAsyncIteration:
+			return None
+	
+	pending = await next_entitlement()
+	scanned = updated = 0
+	last_id = None
+	
+	while True:
+		query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+		batch = await users.find(
+			query, {"subscription_category": 1, "is_premium": 1}
+		).sort("_id", 1).limit(batch_size).to_list(batch_size)
+		if not batch:
+			break
 		
-		if user.is_premium != has_active_sub:
-			user.is_premium = has_active_sub
-			changed = True
+		ops, changed_ids = [], []
+		for doc in batch:
+			uid = str(doc["_id"])
+			# Avancer l'agrégation jusqu'à cet utilisateur (abonnements orphelins ignorés)
+			while pending is not None and pending["_id"] < uid:
+				pending = await next_entitlement()
 			
-		if user.subscription_category != category:
-			user.subscription_category = category
-			changed = True
+			if pending is not None and pending["_id"] == uid:
+				category, is_premium = category_from_rank(pending["rank"]), True
+			else:
+				category, is_premium = None, False
+			
+			if doc.get("subscription_category") != category or doc.get("is_premium", False) != is_premium:
+				ops.append(UpdateOne(
+					{"_id": doc["_id"]},
+					{"$set": {"subscription_category": category, "is_premium": is_premium}}
+				))
+				changed_ids.append(uid)
+		
+		if ops:
+			result = await users.bulk_write(ops, ordered=False)
+			updated += result.modified_count
+			await invalidate_principal(*changed_ids)
 		
-		if changed:
-			await user.save()
-			print(f"✅ Statut synchronisé pour user {user_id}: premium={has_active_sub}, category={category}")
+		scanned += len(batch)
+		last_id = batch[-1]["_id"]
 	
-	return has_active_sub
+	seconds = time.perf_counter() - started
+	report = {
+		"scanned": scanned,
+		"updated": updated,
+		"seconds": round(seconds, 3),
+		"users_per_second": round(scanned / seconds) if seconds > 0 else scanned,
+	}
+	print(f"✅ {scanned} utilisateur(s) parcouru(s), {updated} synchronisé(s) en {report['seconds']}s ({report['users_per_second']} users/s)")
+	return report
 
-async def deactivate_expired_subscriptions() -> int:
+async def _bulk_apply_entitlements(user_ids: List[str], now: datetime, batch_size: int = SYNC_BATCH_SIZE) -> int:
+	"""
+	Recalcule et écrit les droits d'un ensemble d'utilisateurs : une agrégation
+	et un bulk_write par lot. Seuls les utilisateurs dont les champs changent
+	sont modifiés. Retourne le nombre d'utilisateurs modifiés.
+	"""
+	from app.models.user import User
+	from bson import ObjectId
+	from bson.errors import InvalidId
+	
+	users = User.get_motor_collection()
+	subscriptions = Subscription.get_motor_collection()
+	updated = 0
+	
+	for i in range(0, len(user_ids), batch_size):
+		chunk = user_ids[i:i + batch_size]
+		ranks = {
+			row["_id"]: row["rank"]
+			async for row in subscriptions.aggregate(_entitlements_pipeline(now, chunk))
+		}
+		
+		ops = []
+		for uid in chunk:
+			try:
+				oid = ObjectId(uid)
+			except (InvalidId, TypeError):
+				continue
+			category = category_from_rank(ranks[uid]) if uid in ranks else None
+			is_premium = uid in ranks
+			ops.append(UpdateOne(
+				{"_id": oid, "$or": [
+					{"subscription_category": {"$ne": category}},
+					{"is_premium": {"$ne": is_premium}},
+				]},
+				{"$set": {"subscription_category": category, "is_premium": is_premium}}
+			))
+		
+		if ops:
+			result = await users.bulk_write(ops, ordered=False)
+			updated += result.modified_count
+	
+	return updated
+
+async def deactivate_expired_subscriptions() -> dict:
 	"""
 	Désactive tous les abonnements expirés et met à jour le statut premium des utilisateurs.
-	Retourne le nombre d'abonnements désactivés.
+	
+	Traitement ensembliste : les user_id concernés sont lus par agrégation sur le
+	même filtre, les abonnements sont désactivés en un seul update_many, puis les
+	droits de ces utilisateurs sont recalculés et écrits par lots.
+	
+	Returns:
+		{"deactivated", "users_affected", "users_updated", "timings": {étape: secondes}}
 	"""
 	now = datetime.utcnow()
+	collection = Subscription.get_motor_collection()
+	timings = {}
 	
-	# Trouver tous les abonnements actifs avec une date de fin passée
-	expired_subs = await Subscription.find({
+	# Abonnements actifs avec une date de fin passée (index is_active + end_date)
+	expired_filter = {
 		"is_active": True,
 		"end_date": {"$lt": now, "$ne": None}
-	}).to_list()
+	}
 	
-	count = 0
-	affected_users = set()
+	t0 = time.perf_counter()
+	affected_users = [
+		row["_id"]
+		async for row in collection.aggregate([
+			{"$match": expired_filter},
+			{"$group": {"_id": "$user_id"}},
+		])
+		if row["_id"]
+	]
+	timings["collect_users"] = round(time.perf_counter() - t0, 4)
 	
-	for sub in expired_subs:
-		sub.is_active = False
-		await sub.save()
-		affected_users.add(sub.user_id)
-		count += 1
+	t0 = time.perf_counter()
+	result = await collection.update_many(expired_filter, {"$set": {"is_active": False}})
+	count = result.modified_count
+	timings["deactivate"] = round(time.perf_counter() - t0, 4)
 	
 	# Mettre à jour le statut premium de tous les utilisateurs affectés
-	for user_id in affected_users:
-		await sync_user_premium_status(user_id)
+	t0 = time.perf_counter()
+	users_updated = await _bulk_apply_entitlements(affected_users, now) if affected_users else 0
+	await invalidate_principal(*affected_users)
+	timings["sync_users"] = round(time.perf_counter() - t0, 4)
 	
 	if count > 0:
-		print(f"✅ {count} abonnements expirés désactivés, {len(affected_users)} utilisateurs mis à jour")
+		print(f"✅ {count} abonnements expirés désactivés, {len(affected_users)} utilisateurs concernés, {users_updated} mis à jour ({timings})")
 	
-	return count
+	return {
+		"deactivated": count,
+		"users_affected": len(affected_users),
+		"users_updated": users_updated,
+		"timings": timings,
+	}
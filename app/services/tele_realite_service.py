@@ -2,11 +2,15 @@ from app.models.tele_realite import TeleRealite
 from app.schemas.tele_realite import TeleRealiteCreate, TeleRealiteUpdate
 from typing import List, Optional
 from datetime import datetime
+from app.utils.cache import cache_manager
+
+CACHE_TAG = "tele_realite"
 
 
 async def create_tele_realite(data: TeleRealiteCreate) -> TeleRealite:
     item = TeleRealite(**data.dict())
     await item.insert()
+    await cache_manager.invalidate_tags(CACHE_TAG)
     return item
 
 
@@ -46,6 +50,7 @@ async def update_tele_realite(item_id: str, data: TeleRealiteUpdate) -> Optional
         setattr(item, field, value)
     item.updated_at = datetime.utcnow()
     await item.save()
+    await cache_manager.invalidate_tags(CACHE_TAG)
     return item
 
 
@@ -54,4 +59,5 @@ async def delete_tele_realite(item_id: str) -> bool:
     if not item:
         return False
     await item.delete()
+    await cache_manager.invalidate_tags(CACHE_TAG)
     return True
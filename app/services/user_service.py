@@ -3,10 +3,9 @@
 from app.models.user import User
 from app.schemas.user import UserCreate, UserOut
 from typing import List, Optional
-from passlib.context import CryptContext
 from datetime import datetime
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.utils.auth import invalidate_principal
+from app.utils.security import hash_password_async, verify_password_async, login_slot
 
 async def create_user(data: UserCreate) -> User:
 	# Vérifier si l'email existe déjà
@@ -39,7 +38,7 @@ async def create_user(data: UserCreate) -> User:
 			)
 	
 	password = data.password[:72] if data.password else ""
-	hashed_password = pwd_context.hash(password)
+	hashed_password = await hash_password_async(password)
 	user = User(
 		email=data.email,
 		username=data.username,
@@ -75,6 +74,7 @@ async def set_user_active(user_id: str, is_active: bool) -> Optional[User]:
 	user.is_active = is_active
 	user.updated_at = datetime.utcnow()
 	await user.save()
+	await invalidate_principal(user_id)
 	return user
 
 
@@ -83,6 +83,7 @@ async def delete_user(user_id: str) -> bool:
 	if not user:
 		return False
 	await user.delete()
+	await invalidate_principal(user_id)
 	return True
 
 from jose import jwt
@@ -109,12 +110,22 @@ async def login_user_service(identifier: str, password: str):
 	print(f"✅ Utilisateur trouvé: {user.username} (email: {user.email})")
 	print(f"🔑 Vérification du mot de passe...")
 	
-	# Vérification du mot de passe hashé
-	if not pwd_context.verify(password, user.hashed_password):
+	# Vérification du mot de passe hashé (pool bcrypt, connexions simultanées limitées)
+	async with login_slot():
+		valid, new_hash = await verify_password_async(password, user.hashed_password)
+	if not valid:
 		print(f"❌ Mot de passe incorrect pour {user.username}")
 		return None
 	
 	print(f"✅ Mot de passe correct pour {user.username}")
+	# Coût bcrypt relevé depuis la création du hash : re-hachage transparent
+	if new_hash:
+		await user.set({User.hashed_password: new_hash})
+		print(f"🔁 Mot de passe re-haché pour {user.username}")
+	return build_login_response(user)
+
+def build_login_response(user: User) -> dict:
+	"""Token JWT + profil, pour un utilisateur déjà authentifié (connexion ou inscription)."""
 	# Génération d'un JWT réel
 	payload = {"sub": str(user.id)}
 	token = jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
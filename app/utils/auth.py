@@ -3,7 +3,9 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from app.schemas.token import Token
 from app.models.user import User
+from app.utils.cache import cache_manager
 from typing import Optional
+from datetime import datetime
 import os
 
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "changeme")
@@ -11,6 +13,11 @@ ALGORITHM = "HS256"
 bearer_scheme = HTTPBearer()
 optional_bearer_scheme = HTTPBearer(auto_error=False)
 
+# Principal authentifié (snapshot utilisateur + droits d'abonnement) mis en cache
+PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+# Champs jamais mis en cache : secrets et données propres aux routes qui les modifient
+PRINCIPAL_EXCLUDED_FIELDS = {"hashed_password", "reset_token", "reset_token_expires", "fcm_tokens"}
+
 
 def decode_token(token: str) -> Optional[dict]:
     """Décoder un JWT sans dépendance FastAPI — utilisé pour les vérifications WebSocket."""
@@ -21,6 +28,68 @@ def decode_token(token: str) -> Optional[dict]:
         return None
 
 
+def _principal_tag(user_id) -> str:
+    return f"user:{user_id}"
+
+
+async def invalidate_principal(*user_ids):
+    """Invalide le principal en cache après une modification de l'utilisateur ou de ses abonnements."""
+    if user_ids:
+        await cache_manager.invalidate_tags(*(_principal_tag(u) for u in user_ids))
+
+
+async def _load_principal(user_id: str) -> Optional[dict]:
+    user = await User.get(user_id)
+    if user is None:
+        return None
+
+    # Synchroniser le statut premium en fonction des abonnements actifs
+    synced, expires_at = False, None
+    try:
+        from app.services.subscription_service import get_user_entitlement, apply_user_entitlement
+        entitlement = await get_user_entitlement(str(user.id))
+        await apply_user_entitlement(user, entitlement)
+        synced, expires_at = True, entitlement["expires_at"]
+    except Exception as e:
+        # Ne pas bloquer l'authentification si la synchro échoue
+        print(f"⚠️ Erreur sync premium status: {e}")
+
+    return {
+        "user": user.model_dump(exclude=PRINCIPAL_EXCLUDED_FIELDS),
+        "synced": synced,
+        "expires_at": expires_at,
+    }
+
+
+def _principal_ttl(principal: dict) -> int:
+    # Pas de cache si la synchro a échoué ; jamais au-delà de la fin d'un abonnement
+    if not principal["synced"]:
+        return 0
+    if principal["expires_at"] is None:
+        return PRINCIPAL_CACHE_TTL
+    remaining = int((principal["expires_at"] - datetime.utcnow()).total_seconds())
+    return max(1, min(PRINCIPAL_CACHE_TTL, remaining))
+
+
+async def get_principal(user_id: str) -> Optional[User]:
+    """
+    Utilisateur authentifié avec statut d'abonnement synchronisé, servi depuis
+    le cache (aucun accès MongoDB sur un hit).
+    L'objet renvoyé est un snapshot en lecture seule : il ne contient ni le mot
+    de passe ni les tokens FCM et ne doit pas être sauvegardé
+    (voir get_current_user_document).
+    """
+    principal = await cache_manager.get_or_set(
+        f"principal:{user_id}",
+        lambda: _load_principal(user_id),
+        ttl=_principal_ttl,
+        tags=[_principal_tag(user_id)],
+    )
+    if principal is None:
+        return None
+    return User.model_construct(**principal["user"])
+
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)):
     credentials_exception = HTTPException(
         status_code=401,
@@ -35,20 +104,20 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(b
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = await User.get(user_id)
+    user = await get_principal(user_id)
     if user is None:
         raise credentials_exception
-    
-    # Synchroniser le statut premium en fonction des abonnements actifs
-    try:
-        from app.services.subscription_service import sync_user_premium_status
-        await sync_user_premium_status(str(user.id))
-        # Recharger l'utilisateur après la synchronisation
-        user = await User.get(user_id)
-    except Exception as e:
-        # Ne pas bloquer l'authentification si la synchro échoue
-        print(f"⚠️ Erreur sync premium status: {e}")
-    
+    return user
+
+async def get_current_user_document(current_user: User = Depends(get_current_user)) -> User:
+    """Document User complet, rechargé depuis la base, pour les routes qui le modifient."""
+    user = await User.get(current_user.id)
+    if user is None:
+        raise HTTPException(
+            status_code=401,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
 
 async def get_admin_user(current_user: User = Depends(get_current_user)):
@@ -70,7 +139,6 @@ async def get_optional_user(credentials: Optional[HTTPAuthorizationCredentials]
         user_id: str = payload.get("sub")
         if user_id is None:
             return None
-        user = await User.get(user_id)
-        return user
+        return await get_principal(user_id)
     except (JWTError, Exception):
         return None
@@ -1,5 +1,7 @@
-import json
-from typing import Optional, Any
+import time
+import asyncio
+from collections import OrderedDict, defaultdict
+from typing import Optional, Any, Awaitable, Callable, Dict, Iterable, List, Union
 from functools import wraps
 import hashlib
 
@@ -11,10 +13,84 @@ except ImportError:
 
 import os
 
+from app.utils.cache_codec import codec_from_env
+
+# Cache local (par worker gunicorn) placé devant Redis
+LOCAL_CACHE_MAXSIZE = int(os.getenv("CACHE_LOCAL_MAXSIZE", "2048"))
+LOCAL_CACHE_MAX_TTL = int(os.getenv("CACHE_LOCAL_MAX_TTL", "60"))
+
+
+class LocalCache:
+    """
+    Cache LRU borné avec TTL, en mémoire du process.
+    Les valeurs sont stockées par référence : les appelants ne doivent pas
+    muter un objet renvoyé par le cache.
+    """
+
+    def __init__(self, maxsize: int = LOCAL_CACHE_MAXSIZE, max_ttl: int = LOCAL_CACHE_MAX_TTL):
+        self.maxsize = maxsize
+        self.max_ttl = max_ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        if self.maxsize <= 0:
+            return
+        ttl = min(ttl, self.max_ttl) if self.max_ttl > 0 else ttl
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def _key_prefix(key: str) -> str:
+    return key.split(":", 1)[0] if ":" in key else key
+
+
 class CacheManager:
+    """
+    Cache à deux niveaux :
+    1. LocalCache en mémoire du worker (toujours actif, même sans Redis)
+    2. Redis partagé entre workers (si REDIS_ENABLED et joignable)
+
+    Invalidation par tags : chaque tag a un compteur de génération intégré
+    dans les clés (`clé|news@3`). Incrémenter le compteur rend toutes les
+    clés du tag orphelines en O(1) ; elles expirent ensuite via leur TTL.
+    """
+
     def __init__(self):
         self.redis_client = None
         self.enabled = os.getenv("REDIS_ENABLED", "true").lower() == "true"
+        self.local = LocalCache()
+        # Sérialisation binaire des valeurs côté Redis (msgpack + compression)
+        self.codec = codec_from_env()
+        # Calculs en cours par clé (single-flight, par process)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Générations des tags quand Redis est absent (portée : ce worker)
+        self._tag_versions: Dict[str, int] = defaultdict(int)
+        # Compteurs par préfixe de clé
+        self.stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"local_hits": 0, "redis_hits": 0, "misses": 0, "coalesced": 0}
+        )
 
     async def connect(self):
         if not self.enabled or not REDIS_AVAILABLE:
@@ -23,7 +99,7 @@ class CacheManager:
             redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
             self.redis_client = redis.from_url(
                 redis_url,
-                decode_responses=True,
+                decode_responses=False,
                 max_connections=20,
                 socket_connect_timeout=2,
                 socket_timeout=2,
@@ -32,7 +108,7 @@ class CacheManager:
             await self.redis_client.ping()
             print("✅ Redis connecté")
         except Exception as e:
-            print(f"⚠️ Redis non disponible: {e}. Cache désactivé.")
+            print(f"⚠️ Redis non disponible: {e}. Cache local uniquement.")
             self.redis_client = None
 
     async def disconnect(self):
@@ -40,25 +116,87 @@ class CacheManager:
             await self.redis_client.aclose()
 
     async def get(self, key: str) -> Optional[Any]:
-        if not self.redis_client:
-            return None
-        try:
-            value = await self.redis_client.get(key)
-            if value:
-                return json.loads(value)
-        except Exception:
-            pass
+        stats = self.stats[_key_prefix(key)]
+        value = self.local.get(key)
+        if value is not None:
+            stats["local_hits"] += 1
+            return value
+        if self.redis_client:
+            try:
+                # GET + TTL en un seul aller-retour
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    raw, ttl = await pipe.get(key).ttl(key).execute()
+                if raw:
+                    value = self.codec.decode(raw)
+                    # Réchauffer le niveau local avec le TTL restant côté Redis
+                    if ttl and ttl > 0:
+                        self.local.set(key, value, ttl)
+                    stats["redis_hits"] += 1
+                    return value
+            except Exception:
+                pass
+        stats["misses"] += 1
         return None
 
     async def set(self, key: str, value: Any, ttl: int = 300):
+        self.local.set(key, value, ttl)
         if not self.redis_client:
             return
         try:
-            await self.redis_client.setex(key, ttl, json.dumps(value, default=str))
+            await self.redis_client.setex(key, ttl, self.codec.encode(value))
         except Exception:
             pass
 
+    async def get_or_set(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[Any]],
+        ttl: Union[int, Callable[[Any], int]] = 300,
+        tags: Optional[Iterable[str]] = None,
+    ) -> Any:
+        """
+        Retourne la valeur en cache ou la calcule via `factory`.
+        Les misses concurrents sur la même clé sont regroupés : un seul appel
+        à `factory` par worker, les autres attendent son résultat.
+        `tags` rattache la clé à des tags invalidables via invalidate_tags().
+        `ttl` peut être une fonction de la valeur calculée (TTL dynamique).
+        """
+        if tags:
+            key = await self.tagged_key(key, tags)
+        value = await self.get(key)
+        if value is not None:
+            return value
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.stats[_key_prefix(key)]["coalesced"] += 1
+            # shield : l'annulation d'un appelant n'annule pas le calcul partagé
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await factory()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # évite le warning "exception never retrieved"
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        future.set_result(value)
+        if value is not None:
+            if callable(ttl):
+                ttl = ttl(value)
+            if ttl > 0:
+                await self.set(key, value, ttl)
+        return value
+
     async def delete(self, key: str):
+        self.local.delete(key)
         if not self.redis_client:
             return
         try:
@@ -66,18 +204,36 @@ class CacheManager:
         except Exception:
             pass
 
-    async def delete_pattern(self, pattern: str):
-        """Supprime les clés correspondant au pattern via SCAN (non-bloquant)."""
-        if not self.redis_client:
+    async def _get_tag_versions(self, tags: List[str]) -> List[int]:
+        if self.redis_client:
+            try:
+                raw = await self.redis_client.mget([f"tagver:{t}" for t in tags])
+                return [int(v) if v else 0 for v in raw]
+            except Exception:
+                pass
+        return [self._tag_versions[t] for t in tags]
+
+    async def tagged_key(self, key: str, tags: Iterable[str]) -> str:
+        """Suffixe la clé avec la génération courante de chaque tag (un seul MGET)."""
+        tags = sorted(set(tags))
+        versions = await self._get_tag_versions(tags)
+        return key + "|" + ",".join(f"{t}@{v}" for t, v in zip(tags, versions))
+
+    async def invalidate_tags(self, *tags: str):
+        """
+        Invalide toutes les entrées rattachées à ces tags en incrémentant leur
+        génération. Sans Redis, seul le cache local de ce worker est concerné ;
+        les autres workers se resynchronisent au plus tard après CACHE_LOCAL_MAX_TTL.
+        """
+        for tag in tags:
+            self._tag_versions[tag] += 1
+        if not self.redis_client or not tags:
             return
         try:
-            cursor = 0
-            while True:
-                cursor, keys = await self.redis_client.scan(cursor, match=pattern, count=100)
-                if keys:
-                    await self.redis_client.delete(*keys)
-                if cursor == 0:
-                    break
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for tag in tags:
+                    pipe.incr(f"tagver:{tag}")
+                await pipe.execute()
         except Exception:
             pass
 
@@ -93,6 +249,23 @@ class CacheManager:
         except Exception:
             return 0
 
+    def get_stats(self) -> Dict[str, Any]:
+        """Compteurs hit/miss par préfixe, pour le monitoring."""
+        prefixes = {}
+        for prefix, counters in self.stats.items():
+            hits = counters["local_hits"] + counters["redis_hits"]
+            lookups = hits + counters["misses"]
+            prefixes[prefix] = {
+                **counters,
+                "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+            }
+        return {
+            "redis_connected": self.is_connected,
+            "local_size": len(self.local),
+            "local_maxsize": self.local.maxsize,
+            "prefixes": prefixes,
+        }
+
     @property
     def is_connected(self) -> bool:
         return self.redis_client is not None
@@ -103,16 +276,11 @@ def cache_key(*args, **kwargs) -> str:
     key_data = f"{args}{kwargs}"
     return hashlib.md5(key_data.encode()).hexdigest()
 
-def cached(ttl: int = 300, prefix: str = ""):
+def cached(ttl: int = 300, prefix: str = "", tags: Iterable[str] = ()):
     def decorator(func):
         @wraps(func)
         async def wrapper(*args, **kwargs):
             key = f"{prefix}:{cache_key(*args, **kwargs)}"
-            cached_value = await cache_manager.get(key)
-            if cached_value is not None:
-                return cached_value
-            result = await func(*args, **kwargs)
-            await cache_manager.set(key, result, ttl)
-            return result
+            return await cache_manager.get_or_set(key, lambda: func(*args, **kwargs), ttl, tags=tags)
         return wrapper
     return decorator
@@ -0,0 +1,159 @@
+"""
+Sérialisation des valeurs stockées dans Redis par CacheManager.
+
+Format binaire : 2 octets d'en-tête puis la charge utile.
+  - octet 0 : marqueur 0xB1 (jamais en tête d'un JSON, permet de relire
+    les anciennes entrées JSON texte pendant un déploiement)
+  - octet 1 : (codec << 4) | compression
+
+Codecs : msgpack (par défaut) avec types d'extension pour datetime et ObjectId,
+ou JSON. Compression zstd (si `zstandard` est installé) sinon zlib, appliquée
+uniquement au-delà de CACHE_COMPRESS_MIN_BYTES.
+
+Les documents Beanie / schémas Pydantic sont stockés sous leur forme rendue
+(jsonable_encoder), identique à ce que FastAPI renverrait au client.
+"""
+
+import json
+import os
+import struct
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from bson import ObjectId
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+
+MAGIC = 0xB1
+
+CODEC_JSON = 1
+CODEC_MSGPACK = 2
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_ZSTD = 2
+
+# Types d'extension msgpack
+EXT_DATETIME = 1
+EXT_OBJECTID = 2
+
+_EPOCH = datetime(1970, 1, 1)
+_DATETIME_STRUCT = struct.Struct(">qB")  # microsecondes depuis epoch + tz (0 naïf, 1 UTC)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _encode_default(value: Any) -> Any:
+    if isinstance(value, (bytes, bytearray)):
+        # str(b"...") donnerait "b'...'" : refuser plutôt que corrompre l'entrée
+        raise TypeError("bytes non sérialisables par le codec JSON du cache")
+    if hasattr(value, "model_dump"):
+        from fastapi.encoders import jsonable_encoder
+        return jsonable_encoder(value)
+    return str(value)
+
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            micros = (value - _EPOCH) // _MICROSECOND
+            return msgpack.ExtType(EXT_DATETIME, _DATETIME_STRUCT.pack(micros, 0))
+        micros = (value.astimezone(timezone.utc).replace(tzinfo=None) - _EPOCH) // _MICROSECOND
+        return msgpack.ExtType(EXT_DATETIME, _DATETIME_STRUCT.pack(micros, 1))
+    if isinstance(value, ObjectId):
+        return msgpack.ExtType(EXT_OBJECTID, value.binary)
+    return _encode_default(value)
+
+
+def _msgpack_ext_hook(code: int, data: bytes) -> Any:
+    if code == EXT_DATETIME:
+        micros, aware = _DATETIME_STRUCT.unpack(data)
+        value = _EPOCH + micros * _MICROSECOND
+        return value.replace(tzinfo=timezone.utc) if aware else value
+    if code == EXT_OBJECTID:
+        return ObjectId(data)
+    return msgpack.ExtType(code, data)
+
+
+class CacheCodec:
+    """Encode/décode les valeurs du cache Redis (codec + compression)."""
+
+    def __init__(
+        self,
+        codec: str = "msgpack",
+        compression: str = "auto",
+        compress_min_bytes: int = 1024,
+        zlib_level: int = 1,
+        zstd_level: int = 3,
+    ):
+        if codec == "msgpack" and MSGPACK_AVAILABLE:
+            self.codec = CODEC_MSGPACK
+        else:
+            self.codec = CODEC_JSON
+
+        if compression == "auto":
+            compression = "zstd" if ZSTD_AVAILABLE else "zlib"
+        if compression == "zstd" and ZSTD_AVAILABLE:
+            self.compression = COMPRESSION_ZSTD
+        elif compression in ("zlib", "zstd"):
+            self.compression = COMPRESSION_ZLIB
+        else:
+            self.compression = COMPRESSION_NONE
+
+        self.compress_min_bytes = compress_min_bytes
+        self.zlib_level = zlib_level
+        self._zstd_compressor = zstandard.ZstdCompressor(level=zstd_level) if ZSTD_AVAILABLE else None
+        self._zstd_decompressor = zstandard.ZstdDecompressor() if ZSTD_AVAILABLE else None
+
+    def _serialize(self, value: Any) -> bytes:
+        if self.codec == CODEC_MSGPACK:
+            return msgpack.packb(value, default=_msgpack_default, use_bin_type=True)
+        return json.dumps(value, default=_encode_default, separators=(",", ":")).encode()
+
+    def encode(self, value: Any) -> bytes:
+        payload = self._serialize(value)
+        compression = COMPRESSION_NONE
+        if self.compression != COMPRESSION_NONE and len(payload) >= self.compress_min_bytes:
+            if self.compression == COMPRESSION_ZSTD:
+                payload = self._zstd_compressor.compress(payload)
+            else:
+                payload = zlib.compress(payload, self.zlib_level)
+            compression = self.compression
+        return bytes((MAGIC, (self.codec << 4) | compression)) + payload
+
+    def decode(self, data: bytes) -> Any:
+        if not data or data[0] != MAGIC:
+            # Ancienne entrée JSON texte (avant le passage au format binaire)
+            return json.loads(data)
+
+        codec, compression = data[1] >> 4, data[1] & 0x0F
+        payload = data[2:]
+        if compression == COMPRESSION_ZSTD:
+            if not ZSTD_AVAILABLE:
+                raise ValueError("Entrée compressée en zstd mais zstandard n'est pas installé")
+            payload = self._zstd_decompressor.decompress(payload)
+        elif compression == COMPRESSION_ZLIB:
+            payload = zlib.decompress(payload)
+
+        if codec == CODEC_MSGPACK:
+            return msgpack.unpackb(payload, ext_hook=_msgpack_ext_hook, raw=False, strict_map_key=False)
+        return json.loads(payload)
+
+
+def codec_from_env() -> CacheCodec:
+    return CacheCodec(
+        codec=os.getenv("CACHE_CODEC", "msgpack").lower(),
+        compression=os.getenv("CACHE_COMPRESSION", "auto").lower(),
+        compress_min_bytes=int(os.getenv("CACHE_COMPRESS_MIN_BYTES", "1024")),
+    )
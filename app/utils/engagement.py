@@ -1,4 +1,37 @@
+"""
+Compteurs d'engagement (likes, commentaires, partages, vues) des contenus.
+
+Les incréments passent par un tampon write-behind : les deltas sont cumulés
+en mémoire par (content_type, content_id, champ) puis écrits toutes les
+ENGAGEMENT_FLUSH_INTERVAL_MS ms (ou dès ENGAGEMENT_FLUSH_MAX_EVENTS événements)
+avec un seul bulk_write par collection. Un contenu viral reçoit ainsi une
+écriture par intervalle au lieu d'une par événement.
+
+Les lectures de ce worker ajoutent les deltas encore en attente (pending_delta /
+apply_pending) ; les autres workers voient l'incrément au plus tard après un
+intervalle de flush.
+
+Les compteurs font foi pour l'affichage (read_counter : une lecture par _id,
+quel que soit le nombre de likes). Les contenus sans document (livestream)
+ont leurs compteurs dans la collection `content_counters`, _id "<type>:<id>".
+reconcile_counters() recalcule périodiquement les compteurs depuis les
+collections likes / comments / shares et corrige les écarts en bulk. Chaque
+écriture de compteur date le document (COUNTERS_UPDATED_AT, horloge MongoDB) :
+un compteur modifié après le comptage n'est pas corrigé, un delta encore en
+attente dans un autre worker ne s'ajoutera donc jamais à une valeur réparée.
+"""
+
+import asyncio
+import os
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
 from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
 
 from app.models.movie import Movie
 from app.models.breakingNews import BreakingNews
@@ -33,31 +66,424 @@ CONTENT_MODELS = {
 }
 
 
-async def _update_counter(content_type: str, content_id: str, field: str, delta: int) -> None:
-    """Mise a jour atomique via $inc — evite les race conditions avec plusieurs workers."""
+# Alias acceptés par les routes publiques
+CONTENT_TYPE_ALIASES = {
+    "sports": "sport",
+    "news": "breaking_news",
+    "event": "tele_realite",
+}
+
+
+def normalize_content_type(content_type: str) -> str:
+    return CONTENT_TYPE_ALIASES.get(content_type, content_type)
+
+
+# Contenus sans document propre : compteurs dans une collection dédiée
+STANDALONE_COUNTER_TYPES = {"livestream"}
+COUNTERS_COLLECTION = "content_counters"
+
+
+ENGAGEMENT_WRITE_BEHIND = os.getenv("ENGAGEMENT_WRITE_BEHIND", "true").lower() == "true"
+ENGAGEMENT_FLUSH_INTERVAL_MS = int(os.getenv("ENGAGEMENT_FLUSH_INTERVAL_MS", "500"))
+ENGAGEMENT_FLUSH_MAX_EVENTS = int(os.getenv("ENGAGEMENT_FLUSH_MAX_EVENTS", "1000"))
+
+COUNTER_FIELDS = ("likes", "comments", "shares", "views")
+# Date (serveur MongoDB) de la dernière écriture d'un compteur du document
+COUNTERS_UPDATED_AT = "counters_updated_at"
+
+CounterKey = Tuple[str, str, str]  # (content_type, content_id, champ)
+
+
+def _clamped_inc(deltas: Dict[str, int]) -> list:
+    """
+    Update pipeline appliquant les deltas ; $max garantit qu'un compteur ne
+    descend pas sous 0. Date l'écriture pour reconcile_counters.
+    """
+    return [{"$set": {
+        **{
+            field: {"$max": [0, {"$add": [{"$ifNull": [f"${field}", 0]}, delta]}]}
+            for field, delta in deltas.items()
+        },
+        COUNTERS_UPDATED_AT: "$$NOW",
+    }}]
+
+
+def _counter_target(content_type: str, content_id: str):
+    """
+    (collection, _id, upsert) portant les compteurs du contenu, ou None si le
+    type est inconnu ou l'id invalide.
+    """
+    if content_type in STANDALONE_COUNTER_TYPES:
+        from app.config import get_database  # app.config importe les routers
+        return get_database()[COUNTERS_COLLECTION], f"{content_type}:{content_id}", True
     model = CONTENT_MODELS.get(content_type)
     if not model:
+        return None
+    try:
+        return model.get_motor_collection(), ObjectId(content_id), False
+    except (InvalidId, TypeError):
+        return None
+
+
+async def _update_counter(content_type: str, content_id: str, field: str, delta: int) -> None:
+    """Mise a jour atomique immédiate (sans tampon) — evite les race conditions avec plusieurs workers."""
+    target = _counter_target(content_type, content_id)
+    if not target:
         return
+    col, _id, upsert = target
     try:
-        col = model.get_motor_collection()
-        # $max garantit que le champ ne descend pas sous 0
-        pipeline = [{"$set": {field: {"$max": [0, {"$add": [{"$ifNull": [f"${field}", 0]}, delta]}]}}}]
-        await col.update_one({"_id": ObjectId(content_id)}, pipeline)
+        await col.update_one({"_id": _id}, _clamped_inc({field: delta}), upsert=upsert)
     except Exception as e:
         print(f"[engagement] Erreur update {content_type}/{content_id} {field}: {e}")
 
 
+class EngagementBuffer:
+    def __init__(self, interval_ms: int = ENGAGEMENT_FLUSH_INTERVAL_MS, max_events: int = ENGAGEMENT_FLUSH_MAX_EVENTS):
+        self.interval = interval_ms / 1000
+        self.max_events = max_events
+        self._pending: Dict[CounterKey, int] = defaultdict(int)
+        # Deltas en cours d'écriture : toujours visibles en lecture
+        self._inflight: Dict[CounterKey, int] = {}
+        self._events = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self.stats = {"events": 0, "flushes": 0, "documents_written": 0, "errors": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def add(self, content_type: str, content_id: str, field: str, delta: int):
+        if not delta or (content_type not in CONTENT_MODELS and content_type not in STANDALONE_COUNTER_TYPES):
+            return
+        if not self.running:
+            # Tampon arrêté (scripts, arrêt du worker) : écriture directe
+            await _update_counter(content_type, content_id, field, delta)
+            return
+        self._pending[(content_type, content_id, field)] += delta
+        self._events += 1
+        self.stats["events"] += 1
+        if self._events >= self.max_events:
+            self._wakeup.set()
+
+    def pending_delta(self, content_type: str, content_id: str, field: str) -> int:
+        key = (content_type, content_id, field)
+        return self._pending.get(key, 0) + self._inflight.get(key, 0)
+
+    def apply_pending(self, content_type: str, content_id: str, doc: dict) -> dict:
+        """Ajoute aux compteurs de `doc` les deltas pas encore écrits (lecture de ses propres écritures)."""
+        for field in COUNTER_FIELDS:
+            delta = self.pending_delta(content_type, content_id, field)
+            if delta:
+                doc[field] = max(0, (doc.get(field) or 0) + delta)
+        return doc
+
+    def pending_count(self) -> int:
+        return len(self._pending) + len(self._inflight)
+
+    async def flush(self) -> int:
+        """Ecrit les deltas en attente : un bulk_write non ordonné par collection."""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            self._inflight, self._pending = dict(self._pending), defaultdict(int)
+            self._events = 0
+
+            # Regrouper par collection puis par document (plusieurs champs en un seul update)
+            by_collection: Dict[str, dict] = defaultdict(lambda: defaultdict(dict))
+            keys_by_collection = defaultdict(list)
+            collections = {}
+            for key, delta in self._inflight.items():
+                content_type, content_id, field = key
+                if not delta:
+                    continue
+                target = _counter_target(content_type, content_id)
+                if not target:
+                    continue
+                col, _id, upsert = target
+                collections[col.name] = (col, upsert)
+                docs = by_collection[col.name]
+                docs[_id][field] = docs[_id].get(field, 0) + delta
+                keys_by_collection[col.name].append(key)
+
+            written = 0
+            failed: Dict[CounterKey, int] = {}
+            for name, docs in by_collection.items():
+                col, upsert = collections[name]
+                ops = [UpdateOne({"_id": _id}, _clamped_inc(deltas), upsert=upsert) for _id, deltas in docs.items()]
+                try:
+                    await col.bulk_write(ops, ordered=False)
+                    written += len(ops)
+                except BulkWriteError as e:
+                    # Erreurs propres à certains documents : elles se reproduiraient, pas de nouvel essai
+                    errors = e.details.get("writeErrors", [])
+                    self.stats["errors"] += 1
+                    written += len(ops) - len(errors)
+                    print(f"[engagement] {len(errors)} compteur(s) rejeté(s) sur {name}: {errors[:1]}")
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    print(f"[engagement] Erreur flush {name} ({len(ops)} documents): {e}")
+                    for key in keys_by_collection[name]:
+                        failed[key] = self._inflight[key]
+
+            # Deltas non écrits : remis en attente pour le prochain flush
+            for key, delta in failed.items():
+                self._pending[key] += delta
+            self._inflight = {}
+            self.stats["flushes"] += 1
+            self.stats["documents_written"] += written
+            return written
+
+    async def _loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"[engagement] Erreur boucle de flush: {e}")
+
+    def start(self):
+        if not ENGAGEMENT_WRITE_BEHIND or self.running:
+            return
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        """Arrête la boucle et vide le tampon (arrêt propre du worker)."""
+        if not self._task:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        started = time.perf_counter()
+        pending = len(self._pending)
+        await self.flush()
+        if self._pending:
+            print(f"⚠️ [engagement] {len(self._pending)} compteur(s) non écrit(s) à l'arrêt")
+        elif pending:
+            print(f"✅ [engagement] {pending} compteur(s) écrit(s) à l'arrêt en {time.perf_counter() - started:.3f}s")
+
+
+engagement_buffer = EngagementBuffer()
+
+
+async def increment_and_read(content_type: str, content_id: str, field: str, delta: int = 1) -> Optional[int]:
+    """
+    Incrémente un compteur et retourne sa nouvelle valeur en un seul aller-retour.
+    Retourne None si le contenu n'existe pas.
+    """
+    target = _counter_target(content_type, content_id)
+    if not target:
+        return None
+    col, _id, upsert = target
+
+    if engagement_buffer.running:
+        # Lecture (qui vaut test d'existence) puis delta différé
+        doc = await col.find_one({"_id": _id}, {field: 1})
+        if doc is None:
+            if not upsert:
+                return None
+            doc = {}
+        await engagement_buffer.add(content_type, content_id, field, delta)
+        return max(0, (doc.get(field) or 0) + engagement_buffer.pending_delta(content_type, content_id, field))
+
+    doc = await col.find_one_and_update(
+        {"_id": _id}, _clamped_inc({field: delta}),
+        projection={field: 1}, return_document=ReturnDocument.AFTER, upsert=upsert,
+    )
+    return None if doc is None else int(doc.get(field) or 0)
+
+
+async def read_counters(content_type: str, content_id: str) -> Optional[Dict[str, int]]:
+    """
+    Compteurs d'un contenu (likes, comments, shares, views) en une lecture par
+    _id, deltas en attente de ce worker inclus. None si le type est inconnu.
+    """
+    target = _counter_target(content_type, content_id)
+    if not target:
+        return None
+    col, _id, _ = target
+    doc = await col.find_one({"_id": _id}, {field: 1 for field in COUNTER_FIELDS}) or {}
+    counters = {field: int(doc.get(field) or 0) for field in COUNTER_FIELDS}
+    return engagement_buffer.apply_pending(content_type, content_id, counters)
+
+
+async def read_counters_many(items: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Optional[Dict[str, int]]]:
+    """
+    Compteurs de plusieurs contenus : une requête $in par collection.
+    None pour un contenu inconnu ou supprimé (sauf compteurs autonomes, à 0).
+    """
+    result: Dict[Tuple[str, str], Optional[Dict[str, int]]] = {item: None for item in items}
+    by_collection = defaultdict(list)
+    for content_type, content_id in items:
+        target = _counter_target(content_type, content_id)
+        if target:
+            by_collection[target[0].name].append((target, (content_type, content_id)))
+
+    projection = {field: 1 for field in COUNTER_FIELDS}
+    for rows in by_collection.values():
+        col = rows[0][0][0]
+        docs = {}
+        async for doc in col.find({"_id": {"$in": [target[1] for target, _ in rows]}}, projection):
+            docs[doc["_id"]] = doc
+        for (_, _id, upsert), (content_type, content_id) in rows:
+            doc = docs.get(_id)
+            if doc is None and not upsert:
+                continue
+            counters = {field: int((doc or {}).get(field) or 0) for field in COUNTER_FIELDS}
+            result[(content_type, content_id)] = engagement_buffer.apply_pending(content_type, content_id, counters)
+    return result
+
+
+async def read_counter(content_type: str, content_id: str, field: str) -> Optional[int]:
+    counters = await read_counters(content_type, content_id)
+    return None if counters is None else counters[field]
+
+
 async def increment_like(content_type: str, content_id: str, delta: int) -> None:
-    await _update_counter(content_type, content_id, "likes", delta)
+    await engagement_buffer.add(content_type, content_id, "likes", delta)
 
 
 async def increment_comment(content_type: str, content_id: str, delta: int) -> None:
-    await _update_counter(content_type, content_id, "comments", delta)
+    await engagement_buffer.add(content_type, content_id, "comments", delta)
 
 
 async def increment_share(content_type: str, content_id: str, delta: int) -> None:
-    await _update_counter(content_type, content_id, "shares", delta)
+    await engagement_buffer.add(content_type, content_id, "shares", delta)
 
 
 async def increment_view(content_type: str, content_id: str, delta: int = 1) -> None:
-    await _update_counter(content_type, content_id, "views", delta)
+    await engagement_buffer.add(content_type, content_id, "views", delta)
+
+
+RECONCILE_BATCH_SIZE = 1000
+# Attente entre le comptage et la correction : tout delta d'un événement
+# antérieur au comptage est écrit (flush de chaque worker) avant la relecture
+RECONCILE_SETTLE_SECONDS = float(
+    os.getenv("ENGAGEMENT_RECONCILE_SETTLE_SECONDS", str(max(10.0, ENGAGEMENT_FLUSH_INTERVAL_MS / 1000 * 10)))
+)
+
+
+def _counter_collections() -> list:
+    from app.config import get_database
+
+    collections = {model.get_motor_collection().name: model.get_motor_collection() for model in CONTENT_MODELS.values()}
+    collections[COUNTERS_COLLECTION] = get_database()[COUNTERS_COLLECTION]
+    return list(collections.values())
+
+
+def _written_since(doc: dict, counted_at: datetime) -> bool:
+    updated_at = doc.get(COUNTERS_UPDATED_AT)
+    return updated_at is not None and updated_at >= counted_at
+
+
+async def _repair_batch(field: str, batch: list, counted_at: datetime) -> int:
+    """
+    Aligne `field` sur le compte réel pour un lot de (collection, _id, upsert, count),
+    compté à `counted_at`. Compteurs écrits depuis : ignorés (le compte est déjà
+    dépassé), corrigés au prochain passage. Ecriture conditionnelle sur la
+    valeur lue : un flush entre la relecture et la correction n'est pas écrasé.
+    """
+    by_collection = defaultdict(list)
+    for col, _id, upsert, count in batch:
+        by_collection[col.name].append((col, _id, upsert, count))
+
+    repaired = 0
+    for rows in by_collection.values():
+        col = rows[0][0]
+        stored = {}
+        async for doc in col.find({"_id": {"$in": [row[1] for row in rows]}}, {field: 1, COUNTERS_UPDATED_AT: 1}):
+            stored[doc["_id"]] = doc
+        ops = []
+        for _, _id, upsert, count in rows:
+            doc = stored.get(_id)
+            if doc is not None and _written_since(doc, counted_at):
+                continue
+            if doc is None:
+                # Compteurs autonomes créés au besoin ; contenu supprimé : lignes orphelines ignorées
+                if upsert:
+                    ops.append(UpdateOne({"_id": _id}, {"$set": {field: count}}, upsert=True))
+                continue
+            if doc.get(field) != count:
+                ops.append(UpdateOne({"_id": _id, field: doc.get(field)}, {"$set": {field: count}}))
+        if ops:
+            result = await col.bulk_write(ops, ordered=False)
+            repaired += result.modified_count + result.upserted_count
+    return repaired
+
+
+async def _count_field(source) -> Tuple[datetime, list]:
+    """Nombre de lignes par contenu : (date du comptage côté MongoDB, [(collection, _id, upsert, count)])."""
+    from app.config import get_database
+
+    # Horloge du serveur, comme COUNTERS_UPDATED_AT ($$NOW)
+    counted_at = (await get_database().command("hello"))["localTime"].replace(tzinfo=None)
+    rows = []
+    pipeline = [
+        {"$group": {"_id": {"type": "$content_type", "id": "$content_id"}, "count": {"$sum": 1}}}
+    ]
+    async for row in source.aggregate(pipeline, allowDiskUse=True):
+        target = _counter_target(row["_id"].get("type"), row["_id"].get("id"))
+        if target:
+            rows.append((*target, row["count"]))
+    return counted_at, rows
+
+
+async def _repair_field(field: str, counted_at: datetime, rows: list) -> dict:
+    seen = defaultdict(set)  # collection → _ids ayant au moins une ligne source
+    repaired = 0
+    for i in range(0, len(rows), RECONCILE_BATCH_SIZE):
+        batch = rows[i:i + RECONCILE_BATCH_SIZE]
+        for col, _id, _, _ in batch:
+            seen[col.name].add(_id)
+        repaired += await _repair_batch(field, batch, counted_at)
+
+    # Compteurs positifs sans aucune ligne source (et non écrits depuis le comptage) : remis à 0
+    for col in _counter_collections():
+        ops = []
+        async for doc in col.find({field: {"$gt": 0}}, {field: 1, COUNTERS_UPDATED_AT: 1}):
+            if doc["_id"] not in seen[col.name] and not _written_since(doc, counted_at):
+                ops.append(UpdateOne({"_id": doc["_id"], field: doc[field]}, {"$set": {field: 0}}))
+        for i in range(0, len(ops), RECONCILE_BATCH_SIZE):
+            result = await col.bulk_write(ops[i:i + RECONCILE_BATCH_SIZE], ordered=False)
+            repaired += result.modified_count
+    return {"checked": len(rows), "repaired": repaired}
+
+
+async def reconcile_counters() -> dict:
+    """
+    Recalcule likes / comments / shares depuis leurs collections (une agrégation
+    $group par collection) et corrige en bulk les compteurs qui ont dérivé.
+    Les vues n'ont pas de source durable (view_logs expire) : non concernées.
+    """
+    from app.models.like import Like
+    from app.models.comment import Comment
+    from app.models.share import Share
+
+    started = time.perf_counter()
+    counts = {}
+    for field, model in (("likes", Like), ("comments", Comment), ("shares", Share)):
+        counts[field] = await _count_field(model.get_motor_collection())
+
+    # Les deltas des événements comptés, en attente dans n'importe quel worker,
+    # sont écrits pendant l'attente : ils datent leur compteur, qui est alors ignoré
+    if engagement_buffer.running:
+        await engagement_buffer.flush()
+    await asyncio.sleep(RECONCILE_SETTLE_SECONDS)
+
+    report = {}
+    for field, (counted_at, rows) in counts.items():
+        report[field] = await _repair_field(field, counted_at, rows)
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    total = sum(report[field]["repaired"] for field in ("likes", "comments", "shares"))
+    print(f"🧮 [engagement] Compteurs réconciliés : {total} correction(s) en {report['seconds']}s")
+    return report
@@ -0,0 +1,117 @@
+"""
+Validation HTTP (GET conditionnel) pour les endpoints publics.
+
+La réponse est sérialisée une seule fois puis mise en cache avec son ETag
+(hash du corps) et sa date Last-Modified. Tant que l'entrée est en cache,
+une requête portant If-None-Match / If-Modified-Since à jour reçoit un 304
+sans accès à MongoDB ni re-sérialisation du corps.
+"""
+
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from app.utils.cache import cache_manager
+
+
+def latest_timestamp(items: Iterable[Any]) -> Optional[datetime]:
+    """Plus récent updated_at (ou created_at à défaut) d'une liste d'objets ou de dicts."""
+    latest = None
+    for item in items:
+        get = item.get if isinstance(item, dict) else lambda f, i=item: getattr(i, f, None)
+        value = get("updated_at") or get("created_at")
+        if isinstance(value, datetime) and (latest is None or value > latest):
+            latest = value
+    return latest
+
+
+def _to_utc(value: datetime) -> datetime:
+    # Les dates de l'application sont des datetime naïfs en UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Comparaison faible (RFC 9110 §13.1.2) : on ignore le préfixe W/
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def _not_modified(request: Request, etag: str, last_modified: Optional[str]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match prime sur If-Modified-Since
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+async def conditional_response(
+    request: Request,
+    key: str,
+    loader: Callable[[], Awaitable[Any]],
+    *,
+    ttl: int = 60,
+    tags: Optional[Iterable[str]] = None,
+    max_age: int = 30,
+    stale_while_revalidate: int = 60,
+    last_modified: Optional[Callable[[Any], Optional[datetime]]] = None,
+) -> Response:
+    """
+    Sert `loader()` en JSON avec ETag / Last-Modified / Cache-Control,
+    et répond 304 si la copie du client est à jour.
+
+    - key, ttl, tags : entrée de cache (voir CacheManager.get_or_set)
+    - last_modified   : extrait la date de dernière modification du résultat
+    Les exceptions levées par `loader` (ex. HTTPException 404) sont propagées
+    et ne sont pas mises en cache.
+    """
+
+    async def _render() -> dict:
+        value = await loader()
+        # Corps gardé en str : sérialisable tel quel par les deux codecs du cache
+        # (le codec JSON ne sait pas représenter des bytes)
+        body = json.dumps(
+            jsonable_encoder(value),
+            ensure_ascii=False,
+            allow_nan=False,
+            indent=None,
+            separators=(",", ":"),
+        )
+        modified = last_modified(value) if last_modified else None
+        return {
+            "etag": '"' + hashlib.blake2b(body.encode("utf-8"), digest_size=16).hexdigest() + '"',
+            "last_modified": format_datetime(_to_utc(modified), usegmt=True) if modified else None,
+            "body": body,
+        }
+
+    entry = await cache_manager.get_or_set(f"http:{key}", _render, ttl=ttl, tags=tags)
+
+    headers = {
+        "ETag": entry["etag"],
+        "Cache-Control": f"public, max-age={max_age}, stale-while-revalidate={stale_while_revalidate}",
+    }
+    if entry["last_modified"]:
+        headers["Last-Modified"] = entry["last_modified"]
+
+    if _not_modified(request, entry["etag"], entry["last_modified"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry["body"], media_type="application/json", headers=headers)
@@ -1,38 +1,162 @@
-from fastapi import Request, HTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
-from collections import defaultdict
-from datetime import datetime, timedelta
-import asyncio
+"""
+Rate limiting par token bucket.
+
+- Redis (partagé entre les workers gunicorn) : un script Lua atomique par
+  requête, un seul aller-retour.
+- Repli en mémoire si Redis est absent ou en erreur : buckets répartis en
+  shards LRU bornés (les clients inactifs sont évincés).
+- Politiques par route : limites plus strictes pour la connexion et le
+  comptage de vues.
+"""
+
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config.settings import settings
+from app.utils.cache import cache_manager
+
+
+def get_client_ip(request: Request) -> str:
+    """IP réelle du client (header x-forwarded-for pour proxy/Fly.io)."""
+    forwarded = request.headers.get("x-forwarded-for")
+    if forwarded:
+        return forwarded.split(",")[0].strip()
+    if request.client:
+        return request.client.host
+    return "unknown"
+
+
+# ======================
+# Politiques
+# ======================
+class RatePolicy:
+    """Bucket de `burst` jetons, rechargé de `per_minute` jetons par minute."""
+
+    __slots__ = ("name", "per_minute", "burst", "refill_per_ms")
+
+    def __init__(self, name: str, per_minute: int, burst: Optional[int] = None):
+        self.name = name
+        self.per_minute = per_minute
+        self.burst = burst or per_minute
+        self.refill_per_ms = per_minute / 60000.0
+
+
+DEFAULT_POLICY = RatePolicy("default", settings.RATE_LIMIT_PER_MINUTE)
+LOGIN_POLICY = RatePolicy("login", settings.RATE_LIMIT_LOGIN_PER_MINUTE, burst=5)
+VIEWS_POLICY = RatePolicy("views", settings.RATE_LIMIT_VIEWS_PER_MINUTE, burst=20)
+
+# (méthode, chemin) → politique ; les autres routes utilisent DEFAULT_POLICY
+ROUTE_POLICIES: Dict[Tuple[str, str], RatePolicy] = {
+    ("POST", "/api/v1/users/login"): LOGIN_POLICY,
+    ("POST", "/api/v1/users/register"): LOGIN_POLICY,
+    ("POST", "/api/v1/users/forgot-password"): LOGIN_POLICY,
+    ("POST", "/api/v1/users/auth/google/mobile"): LOGIN_POLICY,
+    ("POST", "/api/v1/views/increment"): VIEWS_POLICY,
+}
+
+
+# ======================
+# Backend Redis
+# ======================
+# KEYS[1] = bucket ; ARGV = burst, jetons/ms, maintenant (ms)
+# Retourne {autorisé (0/1), jetons restants, attente avant le prochain jeton (ms)}
+_TOKEN_BUCKET_LUA = """
+local burst = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 't', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil then
+  tokens = burst
+  ts = now
+end
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+  allowed = 1
+else
+  wait = math.ceil((1 - tokens) / rate)
+end
+redis.call('HSET', KEYS[1], 't', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil((burst - tokens) / rate) + 1000)
+return {allowed, math.floor(tokens), wait}
+"""
+
 
 # ======================
-# Rate Limiter performant
+# Backend mémoire
 # ======================
+class LocalTokenBuckets:
+    """
+    Buckets en mémoire du worker, répartis en shards LRU bornés.
+    Pas de verrou : chaque opération est synchrone dans la boucle asyncio.
+    """
+
+    def __init__(self, shards: int = 16, max_keys_per_shard: int = 4096):
+        self.max_keys_per_shard = max_keys_per_shard
+        self._shards: List["OrderedDict[str, list]"] = [OrderedDict() for _ in range(shards)]
+
+    def take(self, key: str, policy: RatePolicy, now_ms: float) -> Tuple[bool, int, int]:
+        shard = self._shards[zlib.crc32(key.encode()) % len(self._shards)]
+        state = shard.get(key)
+        if state is None:
+            state = [float(policy.burst), now_ms]
+            shard[key] = state
+            if len(shard) > self.max_keys_per_shard:
+                shard.popitem(last=False)
+        else:
+            shard.move_to_end(key)
+
+        tokens = min(policy.burst, state[0] + max(0.0, now_ms - state[1]) * policy.refill_per_ms)
+        state[1] = now_ms
+        if tokens >= 1:
+            state[0] = tokens - 1
+            return True, int(state[0]), 0
+        state[0] = tokens
+        return False, 0, int((1 - tokens) / policy.refill_per_ms) + 1
+
+    def __len__(self) -> int:
+        return sum(len(s) for s in self._shards)
+
+
 class RateLimiter:
-    def __init__(self, requests_per_minute: int = 100000):
-        self.requests_per_minute = requests_per_minute
-        self.clients = defaultdict(lambda: {"count": 0, "reset": datetime.utcnow()})
-        self.lock = asyncio.Lock()
-    
-    async def is_allowed(self, identifier: str) -> bool:
-        async with self.lock:
-            now = datetime.utcnow()
-            client = self.clients[identifier]
-
-            # Reset du compteur chaque minute
-            if now >= client["reset"]:
-                client["count"] = 0
-                client["reset"] = now + timedelta(minutes=1)
-
-            if client["count"] >= self.requests_per_minute:
-                return False
-
-            client["count"] += 1
-            return True
+    def __init__(self):
+        self.local = LocalTokenBuckets()
+        self._script = None
+        self._script_client = None
+
+    async def take(self, key: str, policy: RatePolicy) -> Tuple[bool, int, int]:
+        """Consomme un jeton : (autorisé, jetons restants, attente en ms)."""
+        now_ms = time.time() * 1000
+        client = cache_manager.redis_client
+        if client is not None:
+            try:
+                if self._script_client is not client:
+                    # EVALSHA avec repli automatique sur EVAL
+                    self._script = client.register_script(_TOKEN_BUCKET_LUA)
+                    self._script_client = client
+                allowed, remaining, wait = await self._script(
+                    keys=[f"rl:{key}"], args=[policy.burst, policy.refill_per_ms, int(now_ms)]
+                )
+                return bool(allowed), int(remaining), int(wait)
+            except Exception:
+                pass
+        return self.local.take(key, policy, now_ms)
+
 
 # ======================
-# Middleware FastAPI
+# Middleware ASGI
 # ======================
-class RateLimitMiddleware(BaseHTTPMiddleware):
+class RateLimitMiddleware:
     # Endpoints à exclure du rate limit
     EXCLUDED_PATHS = {
         "/openapi.json",
@@ -44,32 +168,32 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
     # Localhost IPs → dev
     LOCALHOST_IPS = {"127.0.0.1", "localhost", "::1"}
 
-    # Production IPs → Render ou serveurs internes
-    # Laisse vide pour appliquer le rate limit à toutes les IP externes
-    PRODUCTION_IPS = set()
-
-    def __init__(self, app, requests_per_minute: int = 100000):
-        super().__init__(app)
-        self.limiter = RateLimiter(requests_per_minute)
+    def __init__(self, app: ASGIApp, limiter: Optional[RateLimiter] = None):
+        self.app = app
+        self.limiter = limiter or RateLimiter()
 
-    async def dispatch(self, request: Request, call_next):
-        # Ignore les chemins exclus
-        if request.url.path in self.EXCLUDED_PATHS:
-            return await call_next(request)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"] in self.EXCLUDED_PATHS:
+            return await self.app(scope, receive, send)
 
-        client_ip = request.client.host if request.client else "unknown"
+        client_ip = get_client_ip(Request(scope))
 
         # Dev : ignore localhost
         if client_ip in self.LOCALHOST_IPS:
-            return await call_next(request)
-
-        # Prod : applique le rate limit pour toutes les IP externes
-        if not await self.limiter.is_allowed(client_ip):
-            raise HTTPException(
-                status_code=429,
-                detail=f"Too many requests from {client_ip}. Please try again later."
-            )
+            return await self.app(scope, receive, send)
 
-        response = await call_next(request)
-        return response
+        policy = ROUTE_POLICIES.get((scope["method"], scope["path"]), DEFAULT_POLICY)
+        allowed, _, wait_ms = await self.limiter.take(f"{policy.name}:{client_ip}", policy)
+        if allowed:
+            return await self.app(scope, receive, send)
 
+        response = JSONResponse(
+            status_code=429,
+            content={"detail": "Trop de requêtes, veuillez réessayer plus tard."},
+            headers={
+                "Retry-After": str(max(1, -(-wait_ms // 1000))),
+                "X-RateLimit-Limit": str(policy.per_minute),
+                "X-RateLimit-Remaining": "0",
+            },
+        )
+        await response(scope, receive, send)
@@ -0,0 +1,505 @@
+"""
+Index inversé en mémoire pour la recherche plein texte (alimenté par
+app/services/search_engine.py).
+
+- Normalisation : minuscules, accents retirés (« Économie » → « economie »),
+  élisions et mots vides français ignorés, racinisation légère (pluriels,
+  e final) : « reportages économiques » et « reportage economique » se rejoignent.
+- Champs pondérés (titre ×3, catégories / tags / noms ×2, description ×1),
+  classement BM25.
+- Chaque mot de la requête est cherché exactement et comme préfixe (frappe
+  en cours) ; s'il ne correspond à rien, à distance d'édition 1 ou 2 (fautes).
+- Segment principal compact (tableaux NumPy concaténés) + segment delta pour
+  les mises à jour incrémentales. Un document modifié ou supprimé est marqué
+  mort ; ses postings disparaissent au compactage suivant.
+
+Toutes les méthodes sont synchrones : appelées depuis la boucle d'événements,
+elles ne sont jamais interrompues. Seul build_segment() tourne dans un thread,
+sur des données figées par begin_compaction().
+"""
+
+import bisect
+import math
+import re
+import unicodedata
+from array import array
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Poids relatif d'un terme trouvé par préfixe ou par distance d'édition
+PREFIX_PENALTY = 0.8
+FUZZY_PENALTY = {1: 0.6, 2: 0.4}
+MAX_PREFIX_EXPANSIONS = 50
+MAX_FUZZY_EXPANSIONS = 10
+
+STOPWORDS = frozenset("""
+a au aux avec ce ces d dans de des du elle en et il ils j l la le les leur lui
+m ma mais me mes n ne nos notre nous on ou par pas pour qu que qui s sa se ses
+son sur t ta te tes ton tu un une vos votre vous y
+""".split())
+
+_LIGATURES = str.maketrans({"œ": "oe", "æ": "ae", "ß": "ss", "’": "'"})
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+Segment = Tuple[Dict[str, int], "np.ndarray", "np.ndarray", "np.ndarray"]  # (terme → rang, offsets, docs, tfs)
+
+
+def fold(text: str) -> str:
+    """Minuscules sans accents ni ligatures : « Cœur d'Été » → « coeur d'ete »."""
+    return unicodedata.normalize("NFKD", text.lower().translate(_LIGATURES)).encode("ascii", "ignore").decode("ascii")
+
+
+def stem(token: str) -> str:
+    """Racinisation légère : pluriels (s, x, aux → al) puis e final."""
+    if len(token) <= 3 or token.isdigit():
+        return token
+    if token.endswith("aux") and len(token) > 4:
+        token = token[:-3] + "al"
+    elif token[-1] in "sx":
+        token = token[:-1]
+    if len(token) > 4 and token.endswith("e"):
+        token = token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    return [
+        stem(token) for token in _TOKEN_RE.findall(fold(text))
+        if token not in STOPWORDS and (len(token) > 1 or token.isdigit())
+    ]
+
+
+def max_edit_distance(token: str) -> int:
+    if len(token) <= 4:
+        return 0
+    return 1 if len(token) <= 8 else 2
+
+
+def edit_distances(token: str, terms: "np.ndarray") -> "np.ndarray":
+    """
+    Distance de Levenshtein entre `token` et chaque ligne de `terms` (matrice
+    uint8 de termes ASCII de même longueur), calculée ligne à ligne pour tous
+    les termes à la fois. L'insertion (dépendance à gauche dans une ligne)
+    devient un minimum cumulé : d[j] = min_k (t[k] + j - k).
+    """
+    n, length = terms.shape
+    steps = np.arange(length + 1, dtype=np.int16)
+    previous = np.broadcast_to(steps, (n, length + 1))
+    current = np.empty((n, length + 1), dtype=np.int16)
+    for i, char in enumerate(token.encode(), 1):
+        current[:, 0] = i
+        np.minimum(previous[:, 1:] + 1, previous[:, :-1] + (terms != char), out=current[:, 1:])
+        previous = np.minimum.accumulate(current - steps, axis=1) + steps
+    return previous[:, -1]
+
+
+def _empty_segment() -> Segment:
+    return {}, np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+
+
+class SearchIndex:
+    def __init__(self):
+        self.keys: List[Optional[Tuple[str, str]]] = []   # n° de document → (type, id)
+        self.payloads: List[Optional[dict]] = []           # n° de document → résultat affiché
+        self.doc_of: Dict[Tuple[str, str], int] = {}
+        self.types: List[str] = []
+        self._type_code: Dict[str, int] = {}
+        self._alive = np.zeros(1024, dtype=bool)
+        self._doclen = np.zeros(1024, dtype=np.float32)
+        self._types = np.zeros(1024, dtype=np.int16)
+        self.live_count = 0
+        self._total_len = 0.0
+
+        self._main: Segment = _empty_segment()
+        # Part BM25 de chaque posting du segment principal (tf saturé, longueur
+        # normalisée avec la longueur moyenne du compactage) : un produit par terme
+        self._impacts = np.zeros(0, dtype=np.float32)
+        # Postings des documents ajoutés depuis le dernier compactage : terme → (docs, tfs)
+        self._delta: Dict[str, Tuple[array, array]] = {}
+        # Delta en cours d'intégration au segment principal (compactage dans un thread)
+        self._frozen: Optional[Dict[str, Tuple[array, array]]] = None
+        # Documents vivants au début du compactage en cours (renumérotation)
+        self._compaction_alive: Optional["np.ndarray"] = None
+        self.delta_docs = 0
+        self.dead_docs = 0
+
+        # Vocabulaire trié (préfixes) et par (initiale, longueur) (distance d'édition)
+        self._vocab: List[str] = []
+        self._vocab_set = set()
+        self._by_shape: Dict[Tuple[str, int], List[str]] = defaultdict(list)
+        # Mêmes groupes en matrices uint8 pour edit_distances(), reconstruites si le groupe a grandi
+        self._shape_matrix: Dict[Tuple[str, int], "np.ndarray"] = {}
+
+    def __len__(self) -> int:
+        return self.live_count
+
+    # ─── Mises à jour ─────────────────────────────────────────────────────────
+
+    def _grow(self, size: int):
+        capacity = len(self._alive)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        for name in ("_alive", "_doclen", "_types"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _renumber(self, retained: "np.ndarray"):
+        """Ne garde que les n° de document `retained` (croissants), renumérotés 0..k-1."""
+        mapping = np.full(len(self.keys), -1, dtype=np.int32)
+        mapping[retained] = np.arange(len(retained), dtype=np.int32)
+        self.keys = [self.keys[n] for n in retained.tolist()]
+        self.payloads = [self.payloads[n] for n in retained.tolist()]
+        self.doc_of = {key: n for n, key in enumerate(self.keys) if key is not None}
+        capacity = 1024
+        while capacity < len(retained):
+            capacity *= 2
+        for name in ("_alive", "_doclen", "_types"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(retained)] = old[retained]
+            setattr(self, name, new)
+        for term, (d, t) in self._delta.items():
+            self._delta[term] = (array("i", mapping[np.frombuffer(d, dtype=np.int32)].tobytes()), t)
+
+    def _add_term(self, term: str):
+        if term in self._vocab_set:
+            return
+        self._vocab_set.add(term)
+        bisect.insort(self._vocab, term)
+        self._by_shape[(term[0], len(term))].append(term)
+
+    def add(self, content_type: str, content_id: str, texts: Iterable[Tuple[str, float]], payload: dict) -> bool:
+        """Indexe (ou réindexe) un document ; `texts` : (texte, poids du champ)."""
+        key = (content_type, content_id)
+        self.remove(content_type, content_id)
+
+        tf: Dict[str, float] = defaultdict(float)
+        length = 0.0
+        for text, weight in texts:
+            for token in tokenize(text):
+                tf[token] += weight
+                length += weight
+        if not tf:
+            return False
+
+        n = len(self.keys)
+        self._grow(n + 1)
+        if content_type not in self._type_code:
+            self._type_code[content_type] = len(self.types)
+            self.types.append(content_type)
+        self.keys.append(key)
+        self.payloads.append(payload)
+        self.doc_of[key] = n
+        self._alive[n] = True
+        self._doclen[n] = length
+        self._types[n] = self._type_code[content_type]
+        self.live_count += 1
+        self._total_len += length
+        self.delta_docs += 1
+
+        for term, freq in tf.items():
+            postings = self._delta.get(term)
+            if postings is None:
+                postings = self._delta[term] = (array("i"), array("f"))
+                self._add_term(term)
+            postings[0].append(n)
+            postings[1].append(freq)
+        return True
+
+    def remove(self, content_type: str, content_id: str) -> bool:
+        n = self.doc_of.pop((content_type, content_id), None)
+        if n is None:
+            return False
+        self._alive[n] = False
+        self.live_count -= 1
+        self._total_len -= float(self._doclen[n])
+        self.keys[n] = None
+        self.payloads[n] = None
+        self.dead_docs += 1
+        return True
+
+    def get_payload(self, content_type: str, content_id: str) -> Optional[dict]:
+        n = self.doc_of.get((content_type, content_id))
+        return None if n is None else self.payloads[n]
+
+    # ─── Compactage ───────────────────────────────────────────────────────────
+
+    def begin_compaction(self) -> Optional[Tuple[Segment, Dict[str, Tuple[array, array]], "np.ndarray"]]:
+        """Fige le delta courant ; les ajouts suivants vont dans un nouveau delta."""
+        if self._frozen is not None:
+            return None
+        self._frozen, self._delta = self._delta, {}
+        self._compaction_alive = self._alive[:len(self.keys)].copy()
+        self.delta_docs = 0
+        self.dead_docs = 0
+        return self._main, self._frozen, self._compaction_alive
+
+    @staticmethod
+    def build_segment(main: Segment, frozen: Dict[str, Tuple[array, array]], alive: "np.ndarray") -> Segment:
+        """
+        Fusionne segment principal et delta figé, sans les documents morts (thread).
+        Les documents vivants sont renumérotés 0..k-1 dans leur ordre ;
+        finish_compaction applique la même renumérotation au reste de l'index.
+        """
+        terms, offsets, docs, tfs = main
+        keep = alive[docs] if len(docs) else np.zeros(0, dtype=bool)
+        new_terms: Dict[str, int] = {}
+        doc_parts, tf_parts, counts = [], [], []
+        for term in sorted(terms.keys() | frozen.keys()):
+            term_docs, term_tfs = [], []
+            rank = terms.get(term)
+            if rank is not None:
+                start, end = offsets[rank], offsets[rank + 1]
+                mask = keep[start:end]
+                term_docs.append(docs[start:end][mask])
+                term_tfs.append(tfs[start:end][mask])
+            if term in frozen:
+                d = np.frombuffer(frozen[term][0], dtype=np.int32)
+                t = np.frombuffer(frozen[term][1], dtype=np.float32)
+                mask = alive[d]
+                term_docs.append(d[mask])
+                term_tfs.append(t[mask])
+            count = sum(len(part) for part in term_docs)
+            if not count:
+                continue
+            new_terms[term] = len(counts)
+            counts.append(count)
+            doc_parts.extend(term_docs)
+            tf_parts.extend(term_tfs)
+
+        new_offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=new_offsets[1:])
+        new_docs = np.concatenate(doc_parts).astype(np.int32) if doc_parts else np.zeros(0, dtype=np.int32)
+        new_docs = (np.cumsum(alive, dtype=np.int32) - 1)[new_docs]
+        new_tfs = np.concatenate(tf_parts).astype(np.float32) if tf_parts else np.zeros(0, dtype=np.float32)
+        return new_terms, new_offsets, new_docs, new_tfs
+
+    def finish_compaction(self, segment: Segment):
+        """
+        Installe le nouveau segment principal et libère les n° des documents
+        morts au début du compactage ; ceux supprimés depuis restent réservés
+        jusqu'au compactage suivant. La taille des tableaux suit ainsi le
+        nombre de documents, pas le nombre d'écritures.
+        """
+        alive = self._compaction_alive
+        retained = np.concatenate([
+            np.flatnonzero(alive), np.arange(len(alive), len(self.keys), dtype=np.int64)
+        ])
+        self._renumber(retained)
+        self._compaction_alive = None
+        self._install(segment)
+
+    def _install(self, segment: Segment):
+        self._main = segment
+        docs, tfs = segment[2], segment[3]
+        self._impacts = self._saturate(tfs, self._doclen[docs])
+        self._frozen = None
+        self._vocab = sorted(segment[0].keys() | self._delta.keys())
+        self._vocab_set = set(self._vocab)
+        self._by_shape = defaultdict(list)
+        self._shape_matrix = {}
+        for term in self._vocab:
+            self._by_shape[(term[0], len(term))].append(term)
+
+    def compact(self):
+        """Compactage synchrone (construction initiale, scripts)."""
+        frozen = self.begin_compaction()
+        if frozen is not None:
+            self.finish_compaction(self.build_segment(*frozen))
+
+    # ─── Recherche ────────────────────────────────────────────────────────────
+
+    def _saturate(self, tfs: "np.ndarray", lengths: "np.ndarray") -> "np.ndarray":
+        avgdl = max(self._total_len / self.live_count, 1e-6) if self.live_count else 1.0
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / avgdl)
+        return (tfs * (BM25_K1 + 1) / (tfs + norm)).astype(np.float32)
+
+    def _postings(self, term: str) -> List[Tuple["np.ndarray", "np.ndarray"]]:
+        """(documents, impacts BM25) du terme, segment principal puis deltas."""
+        parts = []
+        terms, offsets, docs, _ = self._main
+        rank = terms.get(term)
+        if rank is not None:
+            start, end = offsets[rank], offsets[rank + 1]
+            parts.append((docs[start:end], self._impacts[start:end]))
+        for segment in (self._frozen, self._delta):
+            if segment and term in segment:
+                d, t = segment[term]
+                # Copie : une vue bloquerait les append() suivants sur ces array
+                d = np.array(d, dtype=np.int32)
+                parts.append((d, self._saturate(np.array(t, dtype=np.float32), self._doclen[d])))
+        return parts
+
+    def expand(self, token: str) -> List[Tuple[str, float]]:
+        """Termes du vocabulaire correspondant à `token` : exact, préfixe, sinon proches."""
+        expansions = []
+        if token in self._vocab_set:
+            expansions.append((token, 1.0))
+        if len(token) >= 2:
+            i = bisect.bisect_left(self._vocab, token)
+            count = 0
+            while i < len(self._vocab) and count < MAX_PREFIX_EXPANSIONS and self._vocab[i].startswith(token):
+                if self._vocab[i] != token:
+                    expansions.append((self._vocab[i], PREFIX_PENALTY))
+                    count += 1
+                i += 1
+        if expansions:
+            return expansions
+
+        limit = max_edit_distance(token)
+        if not limit:
+            return []
+        close = []
+        for length in range(max(1, len(token) - limit), len(token) + limit + 1):
+            shape = (token[0], length)
+            terms = self._by_shape.get(shape)
+            if not terms:
+                continue
+            matrix = self._shape_matrix.get(shape)
+            if matrix is None or len(matrix) != len(terms):
+                matrix = np.frombuffer("".join(terms).encode(), dtype=np.uint8).reshape(len(terms), length)
+                self._shape_matrix[shape] = matrix
+            distances = edit_distances(token, matrix)
+            close.extend((int(distances[i]), terms[i]) for i in np.flatnonzero(distances <= limit))
+        close.sort()
+        return [(term, FUZZY_PENALTY[distance]) for distance, term in close[:MAX_FUZZY_EXPANSIONS]]
+
+    def search(self, query: str, limit: int = 10, per_type: bool = True) -> List[Tuple[dict, float]]:
+        """
+        Documents correspondant à `query`, triés par score BM25 décroissant :
+        `limit` par type de contenu (per_type) ou au total. Tous les mots doivent
+        correspondre ; sinon, repli sur les documents qui en contiennent au moins un.
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        size = len(self.keys)
+        if not tokens or not self.live_count:
+            return []
+
+        expanded = [expansions for expansions in map(self.expand, tokens) if expansions]
+        effective = len(expanded)
+        if not effective:
+            return []
+
+        n_docs = self.live_count
+        total = np.zeros(size, dtype=np.float32)
+        # Nombre de mots trouvés par document (inutile pour un seul mot)
+        matched = np.zeros(size, dtype=np.int16) if effective > 1 else None
+        for expansions in expanded:
+            if len(expansions) == 1:
+                # Cas courant (mot exact seul) : un document figure au plus une
+                # fois dans les postings d'un terme, cumul direct
+                term, penalty = expansions[0]
+                parts = self._postings(term)
+                idf = self._idf(n_docs, self._live_df(parts))
+                for docs, impacts in parts:
+                    total[docs] += (idf * penalty) * impacts
+                    if matched is not None:
+                        matched[docs] += 1
+                continue
+            token_scores = np.zeros(size, dtype=np.float32)
+            for term, penalty in expansions:
+                parts = self._postings(term)
+                idf = self._idf(n_docs, self._live_df(parts))
+                for docs, impacts in parts:
+                    # Meilleure variante du mot par document (pas de cumul des préfixes)
+                    np.maximum.at(token_scores, docs, (idf * penalty) * impacts)
+            total += token_scores
+            if matched is not None:
+                matched += token_scores > 0
+
+        alive = self._alive[:size]
+        if matched is None:
+            candidates = np.flatnonzero(alive & (total > 0))
+        else:
+            candidates = np.flatnonzero(alive & (matched == effective))
+            if not len(candidates):
+                candidates = np.flatnonzero(alive & (matched > 0))
+        if not len(candidates):
+            return []
+
+        if per_type:
+            # Regroupement par type : tri stable d'entiers 16 bits (radix, linéaire)
+            codes = self._types[candidates]
+            candidates = candidates[np.argsort(codes, kind="stable")]
+            bounds = np.cumsum(np.bincount(codes, minlength=len(self.types)))
+            selected = np.concatenate([
+                self._top(candidates[start:end], total, limit)
+                for start, end in zip(np.concatenate(([0], bounds[:-1])), bounds)
+            ])
+        else:
+            selected = self._top(candidates, total, limit)
+        selected = selected[np.argsort(-total[selected], kind="stable")]
+        return [(self.payloads[n], float(total[n])) for n in selected]
+
+    def _live_df(self, parts: List[Tuple["np.ndarray", "np.ndarray"]]) -> int:
+        """Documents vivants parmi les postings (un document réindexé garde ses anciens postings)."""
+        if not self.dead_docs and self._frozen is None:
+            # Aucun n° mort référencé : le compactage les a tous retirés
+            return sum(len(d) for d, _ in parts)
+        return sum(int(self._alive[d].sum()) for d, _ in parts)
+
+    @staticmethod
+    def _idf(n_docs: int, df: int) -> float:
+        return math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+
+    @staticmethod
+    def _top(candidates: "np.ndarray", scores: "np.ndarray", k: int) -> "np.ndarray":
+        if len(candidates) <= k:
+            return candidates
+        part = np.argpartition(-scores[candidates], k - 1)[:k]
+        return candidates[part]
+
+    # ─── Instantané ───────────────────────────────────────────────────────────
+
+    def export_state(self) -> dict:
+        """État sérialisable (pickle) ; delta et delta figé inclus tels quels."""
+        delta = {}
+        for segment in (self._frozen, self._delta):
+            for term, (d, t) in (segment or {}).items():
+                old = delta.get(term)
+                delta[term] = (old[0] + d, old[1] + t) if old else (array("i", d), array("f", t))
+        size = len(self.keys)
+        return {
+            "keys": list(self.keys),
+            "payloads": list(self.payloads),
+            "types": list(self.types),
+            "alive": self._alive[:size].copy(),
+            "doclen": self._doclen[:size].copy(),
+            "type_codes": self._types[:size].copy(),
+            "main": self._main,
+            "delta": delta,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "SearchIndex":
+        index = cls()
+        size = len(state["keys"])
+        index._grow(max(size, 1))
+        index.keys = state["keys"]
+        index.payloads = state["payloads"]
+        index.types = state["types"]
+        index._type_code = {t: i for i, t in enumerate(index.types)}
+        index._alive[:size] = state["alive"]
+        index._doclen[:size] = state["doclen"]
+        index._types[:size] = state["type_codes"]
+        index.doc_of = {key: n for n, key in enumerate(index.keys) if key is not None}
+        index.live_count = len(index.doc_of)
+        index.dead_docs = size - index.live_count
+        index._total_len = float(index._doclen[:size][index._alive[:size]].sum())
+        index._delta = state["delta"]
+        index.delta_docs = len({n for d, _ in index._delta.values() for n in d})
+        index._install(state["main"])
+        return index
@@ -1,10 +1,93 @@
+"""
+Hachage des mots de passe (bcrypt).
 
+bcrypt coûte plusieurs dizaines de millisecondes de CPU par appel : les
+versions async exécutent le calcul dans un pool de threads borné (bcrypt
+relâche le GIL) pour ne pas bloquer la boucle d'événements du worker, et
+limitent le nombre de connexions traitées en parallèle.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Coût bcrypt : l'augmenter fait re-hacher les anciens mots de passe à la connexion suivante
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Threads dédiés au hachage, par worker gunicorn
+AUTH_HASH_WORKERS = int(os.getenv("AUTH_HASH_WORKERS", "2"))
+# Connexions traitées simultanément par worker (au-delà : attente puis 503)
+AUTH_MAX_CONCURRENT_LOGINS = int(os.getenv("AUTH_MAX_CONCURRENT_LOGINS", "16"))
+AUTH_LOGIN_WAIT_TIMEOUT = float(os.getenv("AUTH_LOGIN_WAIT_TIMEOUT", "5"))
+
+pwd_context = CryptContext(
+	schemes=["bcrypt"],
+	deprecated="auto",
+	bcrypt__default_rounds=BCRYPT_ROUNDS,
+	# Un hash sous ce coût est considéré obsolète (needs_update / verify_and_update)
+	bcrypt__min_rounds=BCRYPT_ROUNDS,
+)
+
+_hash_executor = ThreadPoolExecutor(max_workers=AUTH_HASH_WORKERS, thread_name_prefix="auth-hash")
+_login_slots = asyncio.Semaphore(AUTH_MAX_CONCURRENT_LOGINS)
+
 
 def hash_password(password: str) -> str:
 	return pwd_context.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
 	return pwd_context.verify(plain_password, hashed_password)
+
+
+async def hash_password_async(password: str) -> str:
+	"""Hache le mot de passe hors de la boucle d'événements."""
+	loop = asyncio.get_running_loop()
+	return await loop.run_in_executor(_hash_executor, pwd_context.hash, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+	"""
+	Vérifie le mot de passe hors de la boucle d'événements.
+	Retourne (valide, nouveau_hash) : nouveau_hash est renseigné quand le hash
+	stocké utilise un coût obsolète et doit être remplacé.
+	"""
+	loop = asyncio.get_running_loop()
+	try:
+		return await loop.run_in_executor(
+			_hash_executor, pwd_context.verify_and_update, plain_password, hashed_password
+		)
+	except ValueError:
+		# Hash stocké illisible (compte importé, valeur vide...)
+		return False, None
+
+
+@asynccontextmanager
+async def login_slot():
+	"""
+	Limite les vérifications de mot de passe simultanées de ce worker.
+	Une rafale de connexions attend au plus AUTH_LOGIN_WAIT_TIMEOUT secondes
+	puis reçoit un 503 au lieu d'allonger indéfiniment la file du pool.
+	"""
+	try:
+		# asyncio.timeout et non wait_for : en 3.11, wait_for peut expirer alors que
+		# acquire() a abouti, et le jeton pris n'est jamais rendu. Ici l'annulation
+		# arrive dans acquire(), qui rend lui-même un jeton obtenu trop tard.
+		async with asyncio.timeout(AUTH_LOGIN_WAIT_TIMEOUT):
+			await _login_slots.acquire()
+	except asyncio.TimeoutError:
+		raise HTTPException(
+			status_code=503,
+			detail="Trop de connexions simultanées, veuillez réessayer.",
+			headers={"Retry-After": "1"},
+		)
+	try:
+		yield
+	finally:
+		_login_slots.release()
+
+
+def shutdown_hash_executor():
+	_hash_executor.shutdown(wait=False, cancel_futures=True)
@@ -69,6 +69,31 @@ def get_highest_active_category(categories: list[Optional[str]]) -> Optional[str
     return max(valid_categories, key=lambda cat: SUBSCRIPTION_HIERARCHY.get(cat, 0))
 
 
+def category_rank_expression(field: str = "$category") -> dict:
+    """
+    Expression d'agrégation MongoDB donnant le niveau hiérarchique d'une catégorie
+    (0 pour gratuit ou inconnue), à combiner avec $max dans un $group.
+    """
+    return {
+        "$switch": {
+            "branches": [
+                {"case": {"$eq": [field, category]}, "then": level}
+                for category, level in SUBSCRIPTION_HIERARCHY.items()
+                if category is not None
+            ],
+            "default": 0,
+        }
+    }
+
+
+def category_from_rank(rank: int) -> Optional[str]:
+    """Inverse de category_rank_expression : niveau → catégorie (None pour gratuit)."""
+    for category, level in SUBSCRIPTION_HIERARCHY.items():
+        if level == rank:
+            return category
+    return None
+
+
 def get_category_display_name(category: Optional[str]) -> str:
     """
     Retourne le nom d'affichage pour une catégorie.
@@ -0,0 +1,243 @@
+"""
+Autocomplétion de la recherche (GET /search/suggest), en mémoire.
+
+Les expressions suggérées (titres, catégories, animateurs, équipes) sont
+normalisées comme la recherche (minuscules, sans accents) et rangées dans un
+tableau trié : une frappe = deux bisect pour trouver la plage du préfixe, puis
+les k expressions les plus populaires de la plage. Chaque expression est
+aussi accessible par ses mots (« finale » complète « Les Étalons en finale »).
+
+Le poids d'une expression est la somme des popularités (vues, likes) des
+contenus qui la portent : une catégorie partagée par beaucoup de contenus
+populaires remonte avant un titre isolé. Le top-k d'une plage est choisi avec
+NumPy (argpartition sur les poids) ; pour les plages larges (un ou deux
+caractères), il est gardé jusqu'au prochain changement qui le touche.
+
+Comme SearchIndex, toutes les méthodes sont synchrones et appelées depuis la
+boucle d'événements ; build() peut tourner dans un thread sur un index privé.
+"""
+
+import bisect
+import re
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.utils.search_index import STOPWORDS, fold
+
+try:
+    import numpy as np
+except ImportError:
+    # Le moteur de recherche est désactivé sans NumPy (voir search_engine.py)
+    np = None
+
+MAX_SUGGESTIONS = 20
+# Au-delà, le top-k de la plage est mis en cache par préfixe
+SCAN_LIMIT = 512
+# Mots d'une expression par lesquels elle peut être complétée
+MAX_WORD_STARTS = 6
+# Une expression figure au plus MAX_WORD_STARTS fois dans une plage : ce
+# nombre de meilleures variantes contient toujours MAX_SUGGESTIONS expressions
+TOP_POOL = MAX_WORD_STARTS * MAX_SUGGESTIONS
+MAX_TEXT_LENGTH = 80
+
+_KEY_RE = re.compile(r"[a-z0-9]+")
+
+Ref = Tuple[str, str]  # (type de contenu, id)
+
+
+def suggest_key(text: str) -> str:
+    """« Les Étalons, en finale ! » → « les etalons en finale »."""
+    return " ".join(_KEY_RE.findall(fold(text)))
+
+
+def _word_starts(key: str) -> List[str]:
+    """L'expression entière puis ses suffixes commençant aux mots non vides."""
+    words = key.split(" ")
+    variants = [key]
+    for i in range(1, min(len(words), MAX_WORD_STARTS)):
+        if words[i] not in STOPWORDS and len(words[i]) > 1:
+            variants.append(" ".join(words[i:]))
+    return variants
+
+
+class SuggestIndex:
+    def __init__(self):
+        # Expressions : n° → clé, texte affiché, genre (title, category, host, team), poids, contenus
+        self._phrase_of: Dict[Tuple[str, str], int] = {}
+        self._keys: List[str] = []
+        self._texts: List[str] = []
+        self._kinds: List[str] = []
+        # Poids par n° d'expression (0 : expression morte) et longueur de la clé (départage)
+        self._weights = np.zeros(1024, dtype=np.float64)
+        self._lengths = np.zeros(1024, dtype=np.int32)
+        self._contributors: List[Dict[Ref, float]] = []
+        self.dead_phrases = 0
+
+        # Contenus : ref → (popularité, n° d'expressions, infos renvoyées pour un titre)
+        self._docs: Dict[Ref, Tuple[float, List[int], dict]] = {}
+        self._phrases_of_doc: Dict[Ref, List[Tuple[str, str]]] = {}
+
+        # Variantes triées (expression entière et suffixes par mot) → n° d'expression
+        self._variants: List[str] = []
+        self._variant_phrase = array("i")
+        self._heavy: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._phrase_of) - self.dead_phrases
+
+    # ─── Mises à jour ─────────────────────────────────────────────────────────
+
+    def _phrase(self, kind: str, text: str, key: str, sort: bool) -> int:
+        n = self._phrase_of.get((kind, key))
+        if n is not None:
+            if not self._contributors[n]:
+                self.dead_phrases -= 1
+            return n
+        n = len(self._keys)
+        if n >= len(self._weights):
+            self._weights = np.concatenate([self._weights, np.zeros(len(self._weights), dtype=np.float64)])
+            self._lengths = np.concatenate([self._lengths, np.zeros(len(self._lengths), dtype=np.int32)])
+        self._phrase_of[(kind, key)] = n
+        self._keys.append(key)
+        self._texts.append(text[:MAX_TEXT_LENGTH])
+        self._kinds.append(kind)
+        self._lengths[n] = len(key)
+        self._contributors.append({})
+        for variant in _word_starts(key):
+            if sort:
+                i = bisect.bisect_left(self._variants, variant)
+                self._variants.insert(i, variant)
+                self._variant_phrase.insert(i, n)
+            else:
+                self._variants.append(variant)
+                self._variant_phrase.append(n)
+        return n
+
+    def _invalidate(self, n: int):
+        if not self._heavy:
+            return
+        for variant in _word_starts(self._keys[n]):
+            for end in range(1, len(variant) + 1):
+                self._heavy.pop(variant[:end], None)
+
+    def add(self, ref: Ref, phrases: Iterable[Tuple[str, str]], weight: float, info: dict, _sort: bool = True):
+        """(Ré)enregistre les expressions `phrases` ((genre, texte)) du contenu `ref`."""
+        self.remove(ref)
+        phrases = [(kind, text) for kind, text in phrases if text and suggest_key(text)]
+        if not phrases:
+            return
+        numbers = []
+        for kind, text in phrases:
+            n = self._phrase(kind, text.strip(), suggest_key(text), _sort)
+            if ref in self._contributors[n]:
+                continue
+            self._contributors[n][ref] = weight
+            self._weights[n] += weight
+            numbers.append(n)
+            if _sort:
+                self._invalidate(n)
+        self._docs[ref] = (weight, numbers, info)
+        self._phrases_of_doc[ref] = phrases
+
+    def remove(self, ref: Ref) -> bool:
+        entry = self._docs.pop(ref, None)
+        if entry is None:
+            return False
+        self._phrases_of_doc.pop(ref, None)
+        weight, numbers, _ = entry
+        for n in numbers:
+            self._contributors[n].pop(ref, None)
+            self._weights[n] -= weight
+            if not self._contributors[n]:
+                # Variantes laissées en place (réutilisées si l'expression revient) jusqu'au compactage
+                self._weights[n] = 0.0
+                self.dead_phrases += 1
+            self._invalidate(n)
+        return True
+
+    def set_weights(self, weights: Dict[Ref, float]):
+        """Met à jour la popularité des contenus connus (rafraîchissement périodique)."""
+        for ref, weight in weights.items():
+            entry = self._docs.get(ref)
+            if entry is None or entry[0] == weight:
+                continue
+            old, numbers, info = entry
+            for n in numbers:
+                self._contributors[n][ref] = weight
+                self._weights[n] += weight - old
+            self._docs[ref] = (weight, numbers, info)
+        self._heavy = {}
+        if self.dead_phrases > max(1000, len(self._phrase_of) // 5):
+            self.compact()
+
+    def compact(self):
+        """Reconstruit les tableaux sans les expressions mortes."""
+        fresh = self.build(
+            (ref, self._phrases_of_doc[ref], weight, info) for ref, (weight, _, info) in self._docs.items()
+        )
+        self.__dict__.update(fresh.__dict__)
+
+    @classmethod
+    def build(cls, entries: Iterable[Tuple[Ref, List[Tuple[str, str]], float, dict]]) -> "SuggestIndex":
+        """Construction en bloc (un seul tri) : [(ref, expressions, popularité, infos)]."""
+        index = cls()
+        for ref, phrases, weight, info in entries:
+            index.add(ref, phrases, weight, info, _sort=False)
+        order = sorted(range(len(index._variants)), key=index._variants.__getitem__)
+        index._variants = [index._variants[i] for i in order]
+        index._variant_phrase = array("i", np.frombuffer(index._variant_phrase, dtype=np.int32)[order].tobytes())
+        return index
+
+    # ─── Complétion ───────────────────────────────────────────────────────────
+
+    def _top(self, lo: int, hi: int, k: int) -> List[int]:
+        # Copie de la tranche : une vue bloquerait les insert() suivants sur l'array
+        numbers = np.frombuffer(self._variant_phrase[lo:hi], dtype=np.int32)
+        weights = self._weights[numbers]
+        if len(numbers) > TOP_POOL:
+            pool = np.argpartition(-weights, TOP_POOL - 1)[:TOP_POOL]
+            numbers, weights = numbers[pool], weights[pool]
+        # Poids décroissant puis, à poids égal, l'expression la plus courte
+        order = np.lexsort((self._lengths[numbers], -weights))
+        top = []
+        for n in numbers[order].tolist():
+            if self._weights[n] <= 0 or n in top:
+                continue
+            top.append(n)
+            if len(top) == k:
+                break
+        return top
+
+    def complete(self, prefix: str, k: int = 8) -> List[dict]:
+        """Les k expressions les plus populaires commençant (ou dont un mot commence) par `prefix`."""
+        key = suggest_key(prefix)
+        if not key:
+            return []
+        k = min(k, MAX_SUGGESTIONS)
+        lo = bisect.bisect_left(self._variants, key)
+        # Les clés ne contiennent que [a-z0-9 ] : "~" les suit toutes
+        hi = bisect.bisect_left(self._variants, key + "~", lo)
+        if hi - lo <= SCAN_LIMIT:
+            numbers = self._top(lo, hi, k)
+        else:
+            numbers = self._heavy.get(key)
+            if numbers is None:
+                numbers = self._heavy[key] = self._top(lo, hi, MAX_SUGGESTIONS)
+            numbers = numbers[:k]
+        return [self._suggestion(n) for n in numbers]
+
+    def _suggestion(self, n: int) -> dict:
+        suggestion = {"text": self._texts[n], "kind": self._kinds[n]}
+        if self._kinds[n] == "title":
+            best: Optional[Ref] = max(self._contributors[n].items(), key=lambda item: item[1])[0]
+            suggestion.update(self._docs[best][2])
+        return suggestion
+
+    # ─── Instantané ───────────────────────────────────────────────────────────
+
+    def export_state(self) -> list:
+        return [(ref, self._phrases_of_doc[ref], weight, info) for ref, (weight, _, info) in self._docs.items()]
+
+    @classmethod
+    def from_state(cls, state: list) -> "SuggestIndex":
+        return cls.build(state)
@@ -0,0 +1,178 @@
+"""
+Anti-doublon des vues : une vue comptée par (contenu, visiteur) et par 24h.
+
+Ordre des vérifications :
+1. Redis (si connecté) : SET view:<type>:<id>:<visiteur> NX EX 86400 — un seul
+   aller-retour, partagé entre tous les workers.
+2. Sans Redis : paire de filtres de Bloom en mémoire (rotation toutes les 12h,
+   une clé y reste de 12 à 24h : jamais au-delà de la fenêtre de 24h) qui
+   écarte sans requête les vues répétées vues par ce worker, puis
+   insertion dans view_logs avec un _id déterministe : l'index unique sur _id
+   tranche entre workers, l'index TTL sur created_at purge après 24h.
+   C'est aussi le repli durable si Redis ne répond plus.
+
+Un faux positif du filtre de Bloom (VIEW_BLOOM_ERROR_RATE, 1% par défaut)
+fait ignorer une vue réellement nouvelle ; jamais l'inverse.
+"""
+
+import hashlib
+import math
+import os
+import time
+from datetime import datetime
+from typing import List, Optional, Set, Tuple
+
+from pymongo.errors import DuplicateKeyError
+
+from app.utils.cache import cache_manager
+
+VIEW_DEDUPE_TTL = 86400
+VIEW_BLOOM_CAPACITY = int(os.getenv("VIEW_BLOOM_CAPACITY", "1000000"))
+VIEW_BLOOM_ERROR_RATE = float(os.getenv("VIEW_BLOOM_ERROR_RATE", "0.01"))
+
+
+def view_identifier(user_id: Optional[str], client_ip: Optional[str]) -> str:
+    """user_id si connecté, sinon IP."""
+    if user_id:
+        return f"u:{user_id}"
+    if client_ip:
+        return f"ip:{client_ip}"
+    return "anonymous"
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        # Double hachage (Kirsch-Mitzenmacher)
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def add(self, key: str):
+        for p in self._positions(key):
+            self.bits[p >> 3] |= 1 << (p & 7)
+
+
+class RotatingBloom:
+    """
+    Filtre courant + précédent ; le courant est remplacé toutes les `period`
+    secondes. Une clé ajoutée reste connue entre `period` et 2 × `period`.
+    Les rotations restent calées sur `period` même si le filtre n'est pas
+    consulté pendant un moment (plus d'une période sans accès : les deux
+    filtres sont expirés).
+    """
+
+    def __init__(self, period: int, capacity: int, error_rate: float):
+        self.period = period
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.current = BloomFilter(capacity, error_rate)
+        self.previous: Optional[BloomFilter] = None
+        self._rotated_at = time.monotonic()
+
+    def _maybe_rotate(self):
+        elapsed = time.monotonic() - self._rotated_at
+        if elapsed < self.period:
+            return
+        self.previous = self.current if elapsed < 2 * self.period else None
+        self.current = BloomFilter(self.capacity, self.error_rate)
+        self._rotated_at += self.period * int(elapsed // self.period)
+
+    def __contains__(self, key: str) -> bool:
+        self._maybe_rotate()
+        return key in self.current or (self.previous is not None and key in self.previous)
+
+    def add(self, key: str):
+        self._maybe_rotate()
+        self.current.add(key)
+
+
+class ViewDedupe:
+    def __init__(self, ttl: int = VIEW_DEDUPE_TTL):
+        self.ttl = ttl
+        self._bloom: Optional[RotatingBloom] = None
+        self.stats = {"redis": 0, "bloom": 0, "mongo": 0, "counted": 0, "duplicates": 0}
+
+    @property
+    def bloom(self) -> RotatingBloom:
+        # Alloué au premier besoin : inutile tant que Redis répond
+        if self._bloom is None:
+            # Rotation à ttl / 2 : une clé n'y survit jamais plus de ttl, une vue
+            # revenue après 24h est tranchée par view_logs
+            self._bloom = RotatingBloom(self.ttl // 2, VIEW_BLOOM_CAPACITY, VIEW_BLOOM_ERROR_RATE)
+        return self._bloom
+
+    async def first_view(self, content_type: str, content_id: str, identifier: str) -> bool:
+        """True si c'est la première vue de ce visiteur sur ce contenu depuis 24h (et l'enregistre)."""
+        key = f"{content_type}:{content_id}:{identifier}"
+        counted = await self._check(key, content_type, content_id, identifier)
+        self.stats["counted" if counted else "duplicates"] += 1
+        return counted
+
+    async def _check(self, key: str, content_type: str, content_id: str, identifier: str) -> bool:
+        redis_client = cache_manager.redis_client
+        if redis_client:
+            try:
+                self.stats["redis"] += 1
+                return bool(await redis_client.set(f"view:{key}", b"1", nx=True, ex=self.ttl))
+            except Exception as e:
+                print(f"[views] Redis indisponible pour l'anti-doublon, repli MongoDB: {e}")
+
+        if key in self.bloom:
+            self.stats["bloom"] += 1
+            return False
+        self.bloom.add(key)
+        return await self._record_mongo(key, content_type, content_id, identifier)
+
+    async def viewed(self, items: List[Tuple[str, str]], identifier: str) -> Set[Tuple[str, str]]:
+        """Sous-ensemble de `items` ((content_type, content_id)) vus par ce visiteur depuis 24h."""
+        keys = {f"{content_type}:{content_id}:{identifier}": (content_type, content_id) for content_type, content_id in items}
+        if not keys:
+            return set()
+        redis_client = cache_manager.redis_client
+        if redis_client:
+            try:
+                values = await redis_client.mget([f"view:{key}" for key in keys])
+                return {item for item, value in zip(keys.values(), values) if value}
+            except Exception as e:
+                print(f"[views] Redis indisponible pour l'état des vues, repli MongoDB: {e}")
+
+        from app.models.view_log import ViewLog
+
+        try:
+            docs = await ViewLog.get_motor_collection().find({"_id": {"$in": list(keys)}}, {"_id": 1}).to_list(None)
+        except Exception as e:
+            print(f"[views] Erreur lecture ViewLog: {e}")
+            return set()
+        return {keys[doc["_id"]] for doc in docs}
+
+    async def _record_mongo(self, key: str, content_type: str, content_id: str, identifier: str) -> bool:
+        from app.models.view_log import ViewLog
+
+        self.stats["mongo"] += 1
+        try:
+            await ViewLog.get_motor_collection().insert_one({
+                "_id": key,
+                "content_id": content_id,
+                "content_type": content_type,
+                "identifier": identifier,
+                "created_at": datetime.utcnow(),
+            })
+            return True
+        except DuplicateKeyError:
+            return False
+        except Exception as e:
+            # En cas d'erreur DB, on laisse passer (ne pas bloquer)
+            print(f"[views] Erreur insert ViewLog: {e}")
+            return True
+
+
+view_dedupe = ViewDedupe()
@@ -3,6 +3,7 @@ Gunicorn configuration — VPS production
 """
 import os
 import multiprocessing
+import shutil
 
 # ── Socket ────────────────────────────────────────────────────────────────────
 bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
@@ -33,6 +34,9 @@ keepalive = 5           # Secondes de keep-alive HTTP
 worker_tmp_dir = "/dev/shm" if os.path.exists("/dev/shm") else "/tmp"
 tmp_upload_dir = "/tmp"
 
+# Instantanés des métriques de chaque worker, fusionnés par GET /metrics
+os.environ.setdefault("METRICS_DIR", os.path.join(worker_tmp_dir, "bf1-metrics"))
+
 # ── Logging ───────────────────────────────────────────────────────────────────
 accesslog = "-"
 errorlog  = "-"
@@ -44,6 +48,10 @@ proc_name = "bf1-backend"
 daemon    = False
 
 # ── Hooks ─────────────────────────────────────────────────────────────────────
+def on_starting(server):
+    # Les compteurs repartent de zéro à chaque démarrage du master
+    shutil.rmtree(os.environ["METRICS_DIR"], ignore_errors=True)
+
 def when_ready(server):
     server.log.info(f"BF1 Backend prêt — {workers} workers sur :{os.getenv('PORT', '8000')}")
 
@@ -0,0 +1,176 @@
+"""
+Benchmark des codecs du cache Redis (app/utils/cache_codec.py).
+
+Compare, sur des formes de réponses réelles (archives limit=1000, grille
+hebdo des programmes, liste de news), l'ancien format JSON texte avec les
+variantes msgpack / compression : temps d'encodage, de décodage et octets stockés.
+
+Usage :
+    python scripts/bench_cache_codec.py
+"""
+
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.cache_codec import CacheCodec, ZSTD_AVAILABLE  # noqa: E402
+
+random.seed(42)
+NOW = datetime.utcnow().replace(microsecond=0)
+
+WORDS = (
+    "reportage économie politique sport culture société santé éducation "
+    "invité débat journal édition spéciale burkina ouagadougou bobo football "
+    "marathon entreprise jeunesse musique concert festival agriculture"
+).split()
+
+
+def _sentence(n: int) -> str:
+    return " ".join(random.choice(WORDS) for _ in range(n)).capitalize()
+
+
+def archive_doc() -> dict:
+    return {
+        "_id": ObjectId(),
+        "title": _sentence(6),
+        "guest_name": _sentence(2),
+        "guest_role": _sentence(3),
+        "image": f"https://cdn.bf1.tv/archives/{random.randint(1, 10**6)}.jpg",
+        "thumbnail": f"https://cdn.bf1.tv/archives/thumb/{random.randint(1, 10**6)}.jpg",
+        "video_url": f"https://cdn.bf1.tv/videos/{random.randint(1, 10**6)}.mp4",
+        "description": _sentence(40),
+        "duration_minutes": random.randint(10, 120),
+        "is_premium": random.random() < 0.7,
+        "price": float(random.choice([0, 500, 1000, 1500])),
+        "required_subscription_category": random.choice([None, "basic", "standard", "premium"]),
+        "views": random.randint(0, 50000),
+        "likes": random.randint(0, 5000),
+        "rating": round(random.uniform(0, 5), 1),
+        "rating_count": random.randint(0, 800),
+        "purchases_count": random.randint(0, 300),
+        "popularity_score": random.uniform(0, 1000),
+        "category": random.choice(["Politique", "Économie", "Culture", "Sport"]),
+        "tags": [random.choice(WORDS) for _ in range(4)],
+        "archived_date": NOW - timedelta(days=random.randint(0, 2000)),
+        "original_publish_date": NOW - timedelta(days=random.randint(0, 4000)),
+        "created_at": NOW - timedelta(days=random.randint(0, 1000)),
+        "updated_at": None,
+        "is_active": True,
+    }
+
+
+def program_doc(day: datetime, hour: int) -> dict:
+    start = day + timedelta(hours=hour)
+    return {
+        "id": str(ObjectId()),
+        "title": _sentence(4),
+        "description": _sentence(25),
+        "start_time": start,
+        "end_time": start + timedelta(minutes=55),
+        "type": random.choice(["Actualités", "Sport", "Culture", "Politique"]),
+        "category": random.choice([None, "Magazine", "Journal", "Divertissement"]),
+        "image_url": f"https://cdn.bf1.tv/programs/{random.randint(1, 10**6)}.jpg",
+        "thumbnail_url": None,
+        "host": _sentence(2),
+        "guests": [_sentence(2) for _ in range(random.randint(0, 3))],
+        "is_live": False,
+        "has_replay": random.random() < 0.5,
+        "replay_url": None,
+        "channel_id": str(ObjectId()),
+        "duration_minutes": 55,
+        "created_at": NOW,
+        "updated_at": None,
+    }
+
+
+def program_week() -> dict:
+    monday = NOW.replace(hour=0, minute=0, second=0) - timedelta(days=NOW.weekday())
+    days = []
+    for d in range(7):
+        day = monday + timedelta(days=d)
+        programs = [program_doc(day, h) for h in range(6, 24)]
+        days.append({"date": day.date().isoformat(), "day_name": day.strftime("%A"), "programs": programs})
+    return {"week_start": monday, "week_end": monday + timedelta(days=7), "days": days,
+            "types": ["Actualités", "Sport", "Culture", "Politique"]}
+
+
+def news_list() -> dict:
+    items = [{
+        "_id": ObjectId(),
+        "title": _sentence(8),
+        "category": random.choice(["Politique", "Économie", "Société"]),
+        "description": _sentence(80),
+        "image": f"https://cdn.bf1.tv/news/{random.randint(1, 10**6)}.jpg",
+        "author": _sentence(2),
+        "allow_comments": True,
+        "views": random.randint(0, 10000),
+        "likes": random.randint(0, 1000),
+        "created_at": NOW - timedelta(hours=random.randint(0, 500)),
+        "updated_at": None,
+    } for _ in range(20)]
+    return {"items": items, "total": 1834, "skip": 0, "limit": 20}
+
+
+class LegacyJson:
+    """Format historique de CacheManager : json.dumps(default=str) en texte."""
+
+    def encode(self, value):
+        return json.dumps(value, default=str).encode()
+
+    def decode(self, data):
+        return json.loads(data)
+
+
+def bench(codec, value, rounds: int):
+    encoded = codec.encode(value)
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        codec.encode(value)
+    t1 = time.perf_counter()
+    for _ in range(rounds):
+        codec.decode(encoded)
+    t2 = time.perf_counter()
+    return (t1 - t0) / rounds * 1e6, (t2 - t1) / rounds * 1e6, len(encoded)
+
+
+def main():
+    shapes = {
+        "archives (limit=1000)": ([archive_doc() for _ in range(1000)], 20),
+        "programmes (grille hebdo)": (program_week(), 200),
+        "news (page de 20)": (news_list(), 1000),
+    }
+    codecs = {
+        "json texte (ancien)": LegacyJson(),
+        "json": CacheCodec(codec="json", compression="none"),
+        "msgpack": CacheCodec(codec="msgpack", compression="none"),
+        "msgpack + zlib": CacheCodec(codec="msgpack", compression="zlib"),
+    }
+    if ZSTD_AVAILABLE:
+        codecs["msgpack + zstd"] = CacheCodec(codec="msgpack", compression="zstd")
+    else:
+        print("ℹ️  zstandard non installé : variante zstd ignorée\n")
+
+    for shape_name, (value, rounds) in shapes.items():
+        print(f"📦 {shape_name}")
+        print(f"   {'codec':<22}{'encode (µs)':>14}{'decode (µs)':>14}{'octets':>12}")
+        for codec_name, codec in codecs.items():
+            enc, dec, size = bench(codec, value, rounds)
+            print(f"   {codec_name:<22}{enc:>14.1f}{dec:>14.1f}{size:>12,}")
+        print()
+
+    # Aller-retour sans perte : datetime et ObjectId restent typés
+    sample = archive_doc()
+    decoded = CacheCodec(codec="msgpack").decode(CacheCodec(codec="msgpack").encode(sample))
+    assert decoded == sample, "aller-retour msgpack incorrect"
+    print("✅ Aller-retour msgpack sans perte (datetime, ObjectId)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark du comptage des likes d'un contenu très liké (app/services/like_service.py).
+
+Insère N likes sur un seul reel dans une base jetable, puis compare :
+- l'ancien count_likes : Like.find(...).to_list() puis len() ;
+- un count() sur l'index (content_id, content_type) ;
+- le compteur dénormalisé lu par read_counter (une lecture par _id).
+
+Nécessite un MongoDB joignable (MONGODB_URI) ; la base BENCH_DBNAME est
+supprimée à la fin.
+
+Usage :
+    python scripts/bench_like_counts.py [likes] [répétitions]
+    MONGODB_URI=mongodb://localhost:27017 python scripts/bench_like_counts.py 100000 20
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+from beanie import init_beanie
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.like import Like  # noqa: E402
+from app.models.reel import Reel  # noqa: E402
+from app.utils.engagement import read_counter  # noqa: E402
+
+BENCH_DBNAME = os.getenv("BENCH_DBNAME", "bf1_bench_like_counts")
+INSERT_BATCH = 10000
+
+
+async def _timed(func, repeat: int):
+    durations = []
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = await func()
+        durations.append(time.perf_counter() - t0)
+    return result, statistics.median(durations) * 1000, max(durations) * 1000
+
+
+async def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URI", "mongodb://localhost:27017"))
+    db = client[BENCH_DBNAME]
+    await client.drop_database(BENCH_DBNAME)
+    await init_beanie(database=db, document_models=[Like, Reel])
+
+    try:
+        reel = Reel(title="Reel viral")
+        await reel.insert()
+        reel_id = str(reel.id)
+
+        print(f"📥 Insertion de {total} likes sur un reel...\n")
+        likes = Like.get_motor_collection()
+        for start in range(0, total, INSERT_BATCH):
+            await likes.insert_many([
+                {"user_id": f"user-{i}", "content_id": reel_id, "content_type": "reel"}
+                for i in range(start, min(start + INSERT_BATCH, total))
+            ], ordered=False)
+
+        # Compteur dénormalisé tel que le maintiennent increment_like / reconcile_counters
+        await Reel.get_motor_collection().update_one({"_id": reel.id}, {"$set": {"likes": total}})
+
+        async def legacy():
+            docs = await Like.find(Like.content_id == reel_id, Like.content_type == "reel").to_list()
+            return len(docs)
+
+        async def indexed_count():
+            return await Like.find(Like.content_id == reel_id, Like.content_type == "reel").count()
+
+        async def denormalized():
+            return await read_counter("reel", reel_id, "likes")
+
+        print(f"🚀 count_likes — {total} likes, {repeat} répétitions\n")
+        print(f"   {'méthode':<34}{'résultat':>10}{'p50 (ms)':>12}{'max (ms)':>12}")
+        for name, func, runs in (
+            ("find().to_list() + len (ancien)", legacy, max(1, repeat // 10)),
+            ("count() sur l'index", indexed_count, repeat),
+            ("read_counter (dénormalisé)", denormalized, repeat),
+        ):
+            result, p50, worst = await _timed(func, runs)
+            print(f"   {name:<34}{result:>10}{p50:>12.2f}{worst:>12.2f}")
+    finally:
+        await client.drop_database(BENCH_DBNAME)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
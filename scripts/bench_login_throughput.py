@@ -0,0 +1,91 @@
+"""
+Benchmark du débit de connexion sous concurrence (app/utils/security.py).
+
+Simule N connexions simultanées sur un worker : vérification bcrypt
+directement dans la boucle d'événements (ancien comportement) puis via le
+pool borné + login_slot(). Mesure le débit et la latence de la boucle
+(retard maximal d'un tick de 10 ms), qui reflète le blocage subi par les
+autres requêtes du worker pendant les connexions.
+
+Usage :
+    python scripts/bench_login_throughput.py [concurrence] [connexions]
+    BCRYPT_ROUNDS=10 AUTH_HASH_WORKERS=4 python scripts/bench_login_throughput.py 64 256
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import security  # noqa: E402
+
+PASSWORD = "motdepasse-de-test"
+
+
+async def _loop_lag_probe(stop: asyncio.Event, interval: float = 0.01) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - t0 - interval)
+    return worst
+
+
+async def _inline_login(hashed: str):
+    # Ancien comportement : bcrypt bloque la boucle
+    assert security.pwd_context.verify(PASSWORD, hashed)
+
+
+async def _pooled_login(hashed: str):
+    async with security.login_slot():
+        valid, _ = await security.verify_password_async(PASSWORD, hashed)
+    assert valid
+
+
+async def run(name: str, login, hashed: str, concurrency: int, total: int):
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_loop_lag_probe(stop))
+    sem = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with sem:
+            t0 = time.perf_counter()
+            await login(hashed)
+            latencies.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    worst_lag = await probe
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"   {name:<22}{total / elapsed:>10.1f}{p50:>12.1f}{p99:>12.1f}{worst_lag * 1000:>16.1f}")
+
+
+async def main():
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    total = int(sys.argv[2]) if len(sys.argv) > 2 else 128
+    hashed = security.pwd_context.hash(PASSWORD)
+
+    print(f"🔐 bcrypt rounds={security.BCRYPT_ROUNDS}, pool={security.AUTH_HASH_WORKERS} threads, "
+          f"slots={security.AUTH_MAX_CONCURRENT_LOGINS}, concurrence={concurrency}, connexions={total}\n")
+    print(f"   {'mode':<22}{'login/s':>10}{'p50 (ms)':>12}{'p99 (ms)':>12}{'lag boucle (ms)':>16}")
+    await run("inline (ancien)", _inline_login, hashed, concurrency, total)
+    await run("pool borné", _pooled_login, hashed, concurrency, total)
+
+    # Re-hachage transparent quand le coût augmente
+    weak = security.pwd_context.hash(PASSWORD, rounds=max(4, security.BCRYPT_ROUNDS - 2))
+    valid, new_hash = await security.verify_password_async(PASSWORD, weak)
+    assert valid and new_hash and security.pwd_context.verify(PASSWORD, new_hash)
+    print("\n✅ Hash à coût obsolète re-haché à la vérification")
+    security.shutdown_hash_executor()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
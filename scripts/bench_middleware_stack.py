@@ -0,0 +1,123 @@
+"""
+Micro-benchmark de la pile de middlewares sur une route triviale (/health).
+
+Compare l'ancienne pile (LoggingMiddleware + SecurityHeadersMiddleware en
+BaseHTTPMiddleware, resilience_middleware via app.middleware("http"), GZip)
+avec CoreMiddleware (ASGI pur) + GZip. Les requêtes sont envoyées en
+process via httpx.ASGITransport : seul le coût applicatif est mesuré.
+
+Usage :
+    python scripts/bench_middleware_stack.py [requêtes] [concurrence]
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import time
+
+import httpx
+from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.error_resilience import resilience_middleware  # noqa: E402
+from app.core.middlewares import CoreMiddleware, SECURITY_HEADERS  # noqa: E402
+
+
+# Ancienne pile, reprise telle quelle
+class LegacyLoggingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        logging.info(f"{request.method} {request.url}")
+        return await call_next(request)
+
+
+class LegacySecurityHeadersMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        response.headers['X-Content-Type-Options'] = 'nosniff'
+        response.headers['X-Frame-Options'] = 'DENY'
+        response.headers['X-XSS-Protection'] = '1; mode=block'
+        return response
+
+
+def _base_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy", "version": "2.0.0"}
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    app.add_middleware(GZipMiddleware, minimum_size=1000)
+    return app
+
+
+def legacy_app() -> FastAPI:
+    app = _base_app()
+    app.add_middleware(LegacyLoggingMiddleware)
+    app.add_middleware(LegacySecurityHeadersMiddleware)
+    app.middleware("http")(resilience_middleware)
+    return app
+
+
+def fused_app() -> FastAPI:
+    app = _base_app()
+    app.add_middleware(CoreMiddleware)
+    return app
+
+
+async def bench(app: FastAPI, total: int, concurrency: int):
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Mêmes en-têtes et même comportement en erreur dans les deux piles
+        r = await client.get("/health")
+        assert all(r.headers[k] == v for k, v in SECURITY_HEADERS.items())
+        r = await client.get("/boom")
+        assert r.status_code == 500 and r.json()["error"] == "Erreur interne du serveur"
+
+        for _ in range(200):  # échauffement
+            await client.get("/health")
+
+        latencies = []
+        sem = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with sem:
+                t0 = time.perf_counter()
+                await client.get("/health")
+                latencies.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - t0
+
+    latencies.sort()
+    return total / elapsed, latencies[len(latencies) // 2] * 1e6, latencies[int(len(latencies) * 0.99) - 1] * 1e6
+
+
+async def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    # Le logger applicatif est à WARNING en production : le log INFO ne s'affiche pas
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("app.core.error_resilience").disabled = True
+
+    print(f"🚀 /health — {total} requêtes, concurrence {concurrency}\n")
+    print(f"   {'pile':<36}{'req/s':>10}{'p50 (µs)':>12}{'p99 (µs)':>12}")
+    for name, factory in (
+        ("BaseHTTPMiddleware x3 (ancienne)", legacy_app),
+        ("CoreMiddleware ASGI pur", fused_app),
+    ):
+        rps, p50, p99 = await bench(factory(), total, concurrency)
+        print(f"   {name:<36}{rps:>10.0f}{p50:>12.0f}{p99:>12.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
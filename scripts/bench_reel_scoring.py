@@ -0,0 +1,89 @@
+"""
+Benchmark du scoring des reels : calculate_reel_score (une boucle Python)
+contre le scoring vectorisé, à 1k, 10k et 100k reels.
+
+- scalaire   : calculate_reel_score sur chaque dict ;
+- score_reels: extraction des colonnes depuis les dicts + calculate_reel_scores
+  (ce que font le feed matérialisé et roll_trending_window) ;
+- colonnes   : calculate_reel_scores seul, colonnes déjà construites.
+
+L'égalité des scores est vérifiée par scripts/check_reel_scores.py.
+
+Usage :
+    python scripts/bench_reel_scoring.py [tailles...] [--buckets N]
+    python scripts/bench_reel_scoring.py 1000 10000 100000
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.reel_service import (  # noqa: E402
+    _current_hour, calculate_reel_score, calculate_reel_scores, reel_score_columns, score_reels,
+)
+
+REPEAT = 5
+
+random.seed(42)
+
+
+def _reel(now: datetime, buckets: int) -> dict:
+    views = random.randint(0, 50000)
+    hour = _current_hour(now)
+    return {
+        "likes": random.randint(0, views),
+        "comments": random.randint(0, 300),
+        "shares": random.randint(0, 100),
+        "saves": random.randint(0, 50),
+        "views": views,
+        "watch_completions": random.randint(0, views),
+        "watch_time_total": random.random() * views * 30,
+        "duration": random.choice([None, 15.0, 30.0, 60.0]),
+        "recent_likes": random.randint(0, 500),
+        "recent_views": random.randint(0, 5000),
+        "recent_shares": random.randint(0, 50),
+        "trend_buckets": {
+            str(hour - h): {"l": random.randint(0, 20), "v": random.randint(1, 100), "s": random.randint(0, 3)}
+            for h in random.sample(range(48), buckets)
+        },
+        "created_at": now - timedelta(hours=random.random() * 24 * 30),
+    }
+
+
+def _best(func) -> float:
+    durations = []
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - t0)
+    return statistics.median(durations) * 1000
+
+
+def main():
+    args = sys.argv[1:]
+    buckets = 0
+    if "--buckets" in args:
+        i = args.index("--buckets")
+        buckets = int(args[i + 1])
+        del args[i:i + 2]
+    sizes = [int(arg) for arg in args] or [1000, 10000, 100000]
+    now = datetime.utcnow()
+
+    print(f"🚀 Scoring des reels — médiane de {REPEAT} passes, {buckets} buckets trending par reel\n")
+    print(f"   {'reels':>8}{'scalaire (ms)':>16}{'score_reels (ms)':>19}{'colonnes (ms)':>16}{'gain':>8}")
+    for size in sizes:
+        reels = [_reel(now, buckets) for _ in range(size)]
+        columns = reel_score_columns(reels, now)
+        scalar = _best(lambda: [calculate_reel_score(reel, now=now) for reel in reels])
+        batch = _best(lambda: score_reels(reels, now=now))
+        vectorized = _best(lambda: calculate_reel_scores(columns, now))
+        print(f"   {size:>8}{scalar:>16.1f}{batch:>19.1f}{vectorized:>16.2f}{scalar / batch:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark du feed des reels (GET /reels, reel_service.list_reels).
+
+Peuple une base jetable avec N reels, puis mesure la latence p50 / p99 de
+list_reels sur plusieurs pages, avec et sans reels déjà vus :
+- avant : scoring en direct (count + 200 documents complets convertis et
+  scorés à chaque requête) ;
+- après : classement matérialisé par app/services/reel_feed.py (fusion des
+  vus + une requête $in sur la page).
+
+Nécessite un MongoDB joignable (MONGODB_URI) ; la base BENCH_DBNAME est
+supprimée à la fin.
+
+Usage :
+    python scripts/bench_reels_feed.py [reels] [répétitions]
+    MONGODB_URI=mongodb://localhost:27017 python scripts/bench_reels_feed.py 20000 200
+"""
+
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+from beanie import init_beanie
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.reel import Reel  # noqa: E402
+from app.services.reel_feed import reel_feed  # noqa: E402
+from app.services.reel_service import _current_hour, list_reels  # noqa: E402
+
+BENCH_DBNAME = os.getenv("BENCH_DBNAME", "bf1_bench_reels")
+INSERT_BATCH = 5000
+LIMIT = 20
+
+random.seed(42)
+
+
+def _reel(now: datetime) -> dict:
+    views = random.randint(0, 20000)
+    hour = _current_hour(now)
+    buckets = {
+        str(hour - h): {"l": random.randint(0, 50), "v": random.randint(1, 500), "s": random.randint(0, 5)}
+        for h in random.sample(range(48), random.randint(0, 24))
+    }
+    return {
+        "video_url": f"https://cdn.example.com/reels/{random.getrandbits(64):x}.mp4",
+        "title": f"Reel {random.getrandbits(32):x}",
+        "description": "Bench " * 20,
+        "allow_comments": True,
+        "duration": random.choice([None, 15.0, 30.0, 60.0]),
+        "tags": ["bench"],
+        "likes": random.randint(0, views),
+        "comments": random.randint(0, 200),
+        "shares": random.randint(0, 100),
+        "views": views,
+        "saves": random.randint(0, 50),
+        "watch_time_total": random.random() * views * 30,
+        "watch_completions": random.randint(0, views),
+        "recent_likes": sum(b["l"] for b in buckets.values()),
+        "recent_views": sum(b["v"] for b in buckets.values()),
+        "recent_shares": sum(b["s"] for b in buckets.values()),
+        "trend_buckets": buckets,
+        "trend_hours": [int(h) for h in buckets],
+        "trending_score": 0.0,
+        "created_at": now - timedelta(hours=random.random() * 24 * 60),
+    }
+
+
+async def _timed(repeat: int, seen_ids):
+    durations = []
+    for i in range(repeat):
+        skip = (i % 5) * LIMIT
+        t0 = time.perf_counter()
+        await list_reels(skip, LIMIT, seen_ids)
+        durations.append(time.perf_counter() - t0)
+    durations.sort()
+    return statistics.median(durations) * 1000, durations[max(0, int(len(durations) * 0.99) - 1)] * 1000
+
+
+async def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URI", "mongodb://localhost:27017"))
+    db = client[BENCH_DBNAME]
+    await client.drop_database(BENCH_DBNAME)
+    await init_beanie(database=db, document_models=[Reel])
+
+    try:
+        now = datetime.utcnow()
+        print(f"📥 Insertion de {total} reels...\n")
+        for start in range(0, total, INSERT_BATCH):
+            count = min(INSERT_BATCH, total - start)
+            await Reel.get_motor_collection().insert_many([_reel(now) for _ in range(count)], ordered=False)
+
+        ids = [str(doc["_id"]) async for doc in Reel.get_motor_collection().find({}, {"_id": 1}).limit(500)]
+        scenarios = [("sans vus", []), ("50 vus", random.sample(ids, 50))]
+
+        print(f"🚀 list_reels — {repeat} requêtes (pages 1 à 5), limit={LIMIT}\n")
+        print(f"   {'méthode':<26}{'vus':<12}{'p50 (ms)':>11}{'p99 (ms)':>11}")
+        for name, seen in scenarios:
+            p50, p99 = await _timed(repeat, seen)
+            print(f"   {'scoring en direct':<26}{name:<12}{p50:>11.1f}{p99:>11.1f}")
+
+        t0 = time.perf_counter()
+        await reel_feed.refresh()
+        print(f"\n   matérialisation : {reel_feed.stats['candidates']} reels en {time.perf_counter() - t0:.2f}s\n")
+        for name, seen in scenarios:
+            p50, p99 = await _timed(repeat, seen)
+            print(f"   {'feed matérialisé':<26}{name:<12}{p50:>11.1f}{p99:>11.1f}")
+    finally:
+        await client.drop_database(BENCH_DBNAME)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,122 @@
+"""
+Benchmark de la recherche globale (app/services/search_service.py).
+
+Peuple une base jetable avec N documents répartis sur les 7 collections
+recherchées, puis compare la latence :
+- de l'ancienne recherche : 7 requêtes $regex insensibles à la casse sur
+  title/description, exécutées l'une après l'autre (parcours complet) ;
+- de search_all : 7 requêtes $text parallèles, classées par score.
+
+Nécessite un MongoDB joignable (MONGODB_URI) ; la base BENCH_DBNAME est
+supprimée à la fin.
+
+Usage :
+    python scripts/bench_search.py [documents] [répétitions]
+    MONGODB_URI=mongodb://localhost:27017 python scripts/bench_search.py 100000 20
+"""
+
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+from beanie import init_beanie
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.search_service import SEARCH_SOURCES, normalize_query, search_all  # noqa: E402
+
+BENCH_DBNAME = os.getenv("BENCH_DBNAME", "bf1_bench_search")
+INSERT_BATCH = 5000
+LIMIT = 8
+
+random.seed(42)
+
+WORDS = (
+    "reportage économie politique sport culture société santé éducation "
+    "invité débat journal édition spéciale burkina ouagadougou bobo football "
+    "marathon entreprise jeunesse musique concert festival agriculture élection "
+    "cinéma basket cyclisme tour faso étalons championnat finale émission direct"
+).split()
+
+QUERIES = ["économie", "football étalons", "festival musique", "Ouagadougou", "zzzz introuvable"]
+
+
+def _sentence(n: int) -> str:
+    return " ".join(random.choice(WORDS) for _ in range(n)).capitalize()
+
+
+def _doc(key: str) -> dict:
+    doc = {"title": _sentence(5), "description": _sentence(40), "category": random.choice(WORDS), "views": random.randint(0, 50000)}
+    if key == "sports":
+        doc["sport_type"] = random.choice(["Football", "Basket", "Cyclisme", "Athlétisme"])
+    if key == "tele_realite":
+        doc["sub_type"] = random.choice(["tele_realite", "event"])
+    return doc
+
+
+async def legacy_search(query: str, limit: int) -> int:
+    """Ancienne implémentation : regex non ancrée, collections interrogées en série."""
+    total = 0
+    for key, model, _, _ in SEARCH_SOURCES:
+        clauses = [{"title": {"$regex": query, "$options": "i"}}, {"description": {"$regex": query, "$options": "i"}}]
+        if key == "sports":
+            clauses.append({"sport_type": {"$regex": query, "$options": "i"}})
+        docs = await model.get_motor_collection().find({"$or": clauses}).limit(limit).to_list(None)
+        total += len(docs)
+    return total
+
+
+async def indexed_search(query: str, limit: int) -> int:
+    return (await search_all(normalize_query(query), limit))["totalFound"]
+
+
+async def _timed(func, query: str, repeat: int):
+    durations = []
+    found = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        found = await func(query, LIMIT)
+        durations.append(time.perf_counter() - t0)
+    durations.sort()
+    return found, statistics.median(durations) * 1000, durations[max(0, int(len(durations) * 0.99) - 1)] * 1000
+
+
+async def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URI", "mongodb://localhost:27017"))
+    db = client[BENCH_DBNAME]
+    await client.drop_database(BENCH_DBNAME)
+    # Crée aussi les index texte déclarés dans les modèles
+    await init_beanie(database=db, document_models=[model for _, model, _, _ in SEARCH_SOURCES])
+
+    try:
+        per_collection = total // len(SEARCH_SOURCES)
+        print(f"📥 Insertion de {per_collection * len(SEARCH_SOURCES)} documents ({per_collection} par collection)...\n")
+        for key, model, _, _ in SEARCH_SOURCES:
+            collection = model.get_motor_collection()
+            for start in range(0, per_collection, INSERT_BATCH):
+                count = min(INSERT_BATCH, per_collection - start)
+                await collection.insert_many([_doc(key) for _ in range(count)], ordered=False)
+
+        print(f"🚀 Recherche globale — {repeat} répétitions par requête, limit={LIMIT}\n")
+        print(f"   {'requête':<20}{'méthode':<26}{'trouvés':>9}{'p50 (ms)':>11}{'p99 (ms)':>11}")
+        for query in QUERIES:
+            for name, func, runs in (
+                ("$regex séquentiel", legacy_search, max(1, repeat // 5)),
+                ("$text parallèle", indexed_search, repeat),
+            ):
+                found, p50, p99 = await _timed(func, query, runs)
+                print(f"   {query:<20}{name:<26}{found:>9}{p50:>11.1f}{p99:>11.1f}")
+    finally:
+        await client.drop_database(BENCH_DBNAME)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
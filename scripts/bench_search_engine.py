@@ -0,0 +1,179 @@
+"""
+Benchmark du moteur de recherche en mémoire (app/utils/search_index.py).
+
+Construit un index de N documents synthétiques répartis sur les types de
+contenu (mots tirés selon une loi de Zipf, comme un texte réel privé de ses
+mots vides : les mots des requêtes figurent dans 5 à 15 % des documents),
+puis mesure :
+- le temps de construction et de compactage ;
+- la latence p50 / p99 de requêtes exactes, accentuées, par préfixe et avec
+  fautes de frappe (objectif : < 5 ms à 200k documents) ;
+- les mises à jour incrémentales (ajouts dans le delta, puis compactage) ;
+- la taille et le temps de chargement de l'instantané disque ;
+- l'autocomplétion (app/utils/suggest_index.py) : construction et latence
+  par frappe, en microsecondes.
+
+Ne nécessite ni MongoDB ni Redis.
+
+Usage :
+    python scripts/bench_search_engine.py [documents] [répétitions]
+    python scripts/bench_search_engine.py 200000 200
+"""
+
+import os
+import pickle
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.search_index import SearchIndex  # noqa: E402
+from app.utils.suggest_index import SuggestIndex  # noqa: E402
+
+LIMIT = 8
+UPDATES = 5000
+
+random.seed(42)
+
+TYPES = ["sport", "tele_realite", "reportage", "divertissement", "jtandmag", "breaking_news",
+         "archive", "reel", "movie", "magazine", "series", "missed", "emission_category"]
+
+WORDS = (
+    "reportage économie politique sport culture société santé éducation "
+    "invité débat journal édition spéciale burkina ouagadougou bobo football "
+    "marathon entreprise jeunesse musique concert festival agriculture élection "
+    "cinéma basket cyclisme tour faso étalons championnat finale émission direct "
+    "koudougou banfora fada gaoua kaya ziniaré dori tenkodogo ouahigouya "
+    "théâtre danse humour comédie drame série documentaire interview magazine"
+).split()
+# Vocabulaire de queue longue : noms propres, rarement partagés
+RARE = [f"{random.choice(WORDS)[:4]}{i}" for i in range(20000)]
+VOCABULARY = WORDS + RARE
+# Zipf décalé : les premiers rangs (mots vides) sont retirés par l'index
+ZIPF_OFFSET = 50
+CUM_WEIGHTS = []
+for rank in range(len(VOCABULARY)):
+    CUM_WEIGHTS.append((CUM_WEIGHTS[-1] if CUM_WEIGHTS else 0) + 1 / (rank + ZIPF_OFFSET))
+
+QUERIES = {
+    "exacte": ["football", "festival musique", "ouagadougou", "championnat finale"],
+    "accents": ["economie", "ETALONS", "theatre", "election burkina"],
+    "préfixe": ["ouaga", "champ", "docum", "festi"],
+    "fautes": ["footbal", "ouagadougu", "cyclsme", "documantaire"],
+    "absente": ["zzzz introuvable"],
+}
+# Frappes successives
+PREFIXES = ["o", "ou", "oua", "ouag", "f", "fe", "fes", "festival m", "cham", "zz"]
+
+
+def _sentence(n: int) -> str:
+    return " ".join(random.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=n)).capitalize()
+
+
+def _add(index: SearchIndex, n: int):
+    content_type = TYPES[n % len(TYPES)]
+    title = _sentence(5)
+    texts = [(title, 3.0), (random.choice(WORDS), 2.0), (_sentence(30), 1.0)]
+    index.add(content_type, str(n), texts, {"id": str(n), "title": title, "type": content_type})
+
+
+def _suggestion_entries(total: int):
+    for n in range(total):
+        phrases = [("title", _sentence(4)), ("category", random.choice(WORDS))]
+        if n % 5 == 0:
+            phrases.append(("host", f"{random.choice(WORDS).capitalize()} {random.choice(RARE)}"))
+        weight = 1.0 + random.paretovariate(1.2) * 100
+        yield (TYPES[n % len(TYPES)], str(n)), phrases, weight, {"id": str(n), "type": TYPES[n % len(TYPES)]}
+
+
+def _bench_suggest(total: int, repeat: int):
+    t0 = time.perf_counter()
+    index = SuggestIndex.build(_suggestion_entries(total))
+    print(f"\n🔤 Autocomplétion : {len(index)} expressions construites en {time.perf_counter() - t0:.1f}s\n")
+    print(f"   {'frappe':<14}{'1re (µs)':>10}{'p50 (µs)':>10}{'p99 (µs)':>10}  meilleure suggestion")
+    for prefix in PREFIXES:
+        t0 = time.perf_counter()
+        top = index.complete(prefix, 8)
+        first = (time.perf_counter() - t0) * 1e6
+        durations = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            index.complete(prefix, 8)
+            durations.append(time.perf_counter() - t0)
+        durations.sort()
+        p50 = statistics.median(durations) * 1e6
+        p99 = durations[max(0, int(len(durations) * 0.99) - 1)] * 1e6
+        best = top[0]["text"] if top else "-"
+        print(f"   {prefix!r:<14}{first:>10.0f}{p50:>10.0f}{p99:>10.0f}  {best}")
+
+
+def _timed(index: SearchIndex, queries, repeat: int):
+    durations = []
+    found = 0
+    for _ in range(repeat):
+        for query in queries:
+            t0 = time.perf_counter()
+            found = len(index.search(query, limit=LIMIT, per_type=True))
+            durations.append(time.perf_counter() - t0)
+    durations.sort()
+    return found, statistics.median(durations) * 1000, durations[max(0, int(len(durations) * 0.99) - 1)] * 1000
+
+
+def _report(index: SearchIndex, repeat: int):
+    print(f"   {'requêtes':<12}{'trouvés':>9}{'p50 (ms)':>11}{'p99 (ms)':>11}")
+    for name, queries in QUERIES.items():
+        found, p50, p99 = _timed(index, queries, repeat)
+        print(f"   {name:<12}{found:>9}{p50:>11.2f}{p99:>11.2f}")
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    index = SearchIndex()
+    t0 = time.perf_counter()
+    for n in range(total):
+        _add(index, n)
+    added = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    index.compact()
+    compacted = time.perf_counter() - t0
+    print(f"📥 {total} documents indexés en {added:.1f}s, compactage {compacted:.1f}s\n")
+
+    print(f"🚀 Recherche — {repeat} répétitions par requête, limit={LIMIT} par type\n")
+    _report(index, repeat)
+
+    print(f"\n✏️  {UPDATES} mises à jour incrémentales (delta non compacté)\n")
+    t0 = time.perf_counter()
+    for n in random.sample(range(total), UPDATES):
+        _add(index, n)
+    print(f"   {UPDATES / (time.perf_counter() - t0):.0f} mises à jour/s")
+    _report(index, repeat // 4 or 1)
+    t0 = time.perf_counter()
+    index.compact()
+    print(f"   compactage du delta : {time.perf_counter() - t0:.1f}s")
+
+    path = os.path.join(tempfile.gettempdir(), "bench-search-index.pkl")
+    try:
+        t0 = time.perf_counter()
+        with open(path, "wb") as f:
+            pickle.dump(index.export_state(), f, protocol=pickle.HIGHEST_PROTOCOL)
+        saved = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        with open(path, "rb") as f:
+            SearchIndex.from_state(pickle.load(f))
+        loaded = time.perf_counter() - t0
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        print(f"\n💾 Instantané : {size_mb:.1f} Mo, écrit en {saved:.2f}s, rechargé en {loaded:.2f}s")
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+    _bench_suggest(total, repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Vérifie que le scoring vectorisé des reels (calculate_reel_scores /
+score_reels) donne les mêmes scores que calculate_reel_score.
+
+Reels aléatoires + cas limites (durée absente ou nulle, 0 vue, created_at
+absent, reel de moins de 2h, vitesses trending sur les seuils, reels vus).
+Écart relatif toléré : 1e-12 (exp / log1p de NumPy et de math peuvent
+différer d'un ulp) ; l'ordre du classement doit être identique.
+
+Code de sortie 1 en cas d'écart.
+
+Usage :
+    python scripts/check_reel_scores.py [reels]
+"""
+
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.reel_service import _current_hour, calculate_reel_score, score_reels  # noqa: E402
+
+TOLERANCE = 1e-12
+
+random.seed(7)
+
+
+def random_reel(i: int, now: datetime) -> dict:
+    views = random.choice([0, 1, random.randint(0, 100), random.randint(0, 100000)])
+    reel = {
+        "id": f"reel{i}",
+        "likes": random.randint(0, max(views, 1)),
+        "comments": random.randint(0, 500),
+        "shares": random.randint(0, 200),
+        "saves": random.randint(0, 100),
+        "views": views,
+        "watch_completions": random.randint(0, max(views, 1)),
+        "watch_time_total": random.random() * max(views, 1) * 90,
+        "duration": random.choice([None, 0, 0.0, 7.5, 15.0, 30.0, 60.0, 180.0]),
+        "recent_likes": random.randint(0, 300),
+        "recent_views": random.choice([0, random.randint(0, 2000)]),
+        "recent_shares": random.randint(0, 40),
+        "created_at": random.choice([
+            None,
+            now - timedelta(minutes=random.random() * 119),
+            now - timedelta(hours=random.random() * 24 * 90),
+            now + timedelta(minutes=5),
+        ]),
+    }
+    if random.random() < 0.5:
+        hour = _current_hour(now)
+        reel["trend_buckets"] = {
+            str(hour - h): {"l": random.randint(0, 30), "v": random.randint(0, 200), "s": random.randint(0, 5)}
+            for h in random.sample(range(72), random.randint(1, 30))
+        }
+    for field in ("saves", "watch_completions", "watch_time_total"):
+        if random.random() < 0.05:
+            reel.pop(field)
+    return reel
+
+
+def threshold_reels(now: datetime) -> list:
+    """Vitesses trending exactement sur les seuils (0.5, 0.2, 0.05, 0.01)."""
+    reels = []
+    for recent_likes, recent_views in ((50, 100), (20, 100), (5, 100), (1, 100), (51, 100), (0, 0)):
+        reels.append({
+            "id": f"seuil{len(reels)}", "likes": 3, "views": 10, "recent_likes": recent_likes,
+            "recent_views": recent_views, "recent_shares": 0, "created_at": now - timedelta(hours=3),
+        })
+    return reels
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    now = datetime.utcnow()
+    reels = [random_reel(i, now) for i in range(total)] + threshold_reels(now)
+    seen = {reel["id"] for reel in random.sample(reels, len(reels) // 10)}
+
+    failures = 0
+    for label, seen_ids in (("sans vus", None), ("avec vus", seen)):
+        expected = [calculate_reel_score(reel, seen_ids, now=now) for reel in reels]
+        actual = score_reels(reels, seen_ids, now=now)
+        worst = 0.0
+        for reel, e, a in zip(reels, expected, actual):
+            error = abs(a - e) / max(abs(e), 1e-300)
+            worst = max(worst, error)
+            if error > TOLERANCE:
+                failures += 1
+                if failures <= 5:
+                    print(f"❌ {reel['id']}: attendu {e!r}, obtenu {a!r}")
+        same_order = sorted(range(len(reels)), key=expected.__getitem__) == sorted(range(len(reels)), key=actual.__getitem__)
+        if not same_order:
+            failures += 1
+        print(f"{'✅' if worst <= TOLERANCE and same_order else '❌'} {label} : {len(reels)} reels, "
+              f"écart relatif max {worst:.2e}, classement {'identique' if same_order else 'différent'}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Vérifie le classement de SearchIndex après des mises à jour incrémentales :
+un document réindexé ou supprimé garde ses anciens postings jusqu'au
+compactage, ils ne doivent compter ni dans les résultats ni dans l'IDF.
+
+Pour plusieurs requêtes, compare l'index mis à jour (avant et après
+compactage, et rechargé depuis un instantané) à un index construit d'un
+bloc sur les mêmes documents : mêmes résultats, scores positifs.
+
+Code de sortie 1 en cas d'écart.
+
+Usage :
+    python scripts/check_search_index.py [documents] [mises à jour]
+"""
+
+import os
+import random
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.search_index import SearchIndex  # noqa: E402
+
+WORDS = (
+    "journal edition finale etalons match coupe burkina football basket meteo concert festival "
+    "ouagadougou reportage economie sante culture musique cinema serie"
+).split()
+QUERIES = ["journal", "journal edition", "finale", "coupe burkina", "festival musique", "edition 20h", "jour"]
+
+random.seed(11)
+
+
+def fresh(documents: dict) -> SearchIndex:
+    index = SearchIndex()
+    for content_id, title in documents.items():
+        index.add("news", content_id, [(title, 3.0)], {"id": content_id})
+    index.compact()
+    return index
+
+
+def ids(index: SearchIndex, query: str):
+    hits = index.search(query, limit=10000, per_type=False)
+    return sorted(payload["id"] for payload, _ in hits), [score for _, score in hits]
+
+
+def compare(label: str, index: SearchIndex, documents: dict) -> int:
+    reference = fresh(documents)
+    failures = 0
+    for query in QUERIES:
+        got, scores = ids(index, query)
+        expected, _ = ids(reference, query)
+        if got != expected or any(score <= 0 for score in scores):
+            failures += 1
+            print(f"❌ {label} '{query}' : {len(got)} résultats (attendu {len(expected)}), "
+                  f"score min {min(scores, default=0):.3f}")
+    if not failures:
+        print(f"✅ {label} : {len(QUERIES)} requêtes identiques à l'index reconstruit")
+    return failures
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    updates = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    failures = 0
+
+    # Cas minimal : trois éditions du journal, une seule retitrée
+    documents = {str(i): f"Journal de 20h edition {i}" for i in range(3)}
+    index = fresh(documents)
+    documents["0"] = "Journal de 20h edition speciale"
+    index.add("news", "0", [(documents["0"], 3.0)], {"id": "0"})
+    failures += compare("journal retitré", index, documents)
+
+    # Mises à jour aléatoires (réindexations et suppressions) sur un index compacté
+    documents = {str(i): " ".join(random.sample(WORDS, 4)) for i in range(total)}
+    index = fresh(documents)
+    for _ in range(updates):
+        content_id = str(random.randrange(total))
+        if random.random() < 0.2:
+            documents.pop(content_id, None)
+            index.remove("news", content_id)
+        else:
+            documents[content_id] = " ".join(random.sample(WORDS, 4))
+            index.add("news", content_id, [(documents[content_id], 3.0)], {"id": content_id})
+    failures += compare("delta non compacté", index, documents)
+    failures += compare("instantané rechargé", SearchIndex.from_state(index.export_state()), documents)
+    index.compact()
+    failures += compare("après compactage", index, documents)
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()